@@ -0,0 +1,211 @@
+"""
+Vectorized scoring of every 1-5 card play of one or many hands.
+
+Rows follow the same order as HandSimulator.find_best_hand_exhaustive
+(fewest cards first, then lexicographic positions) and every arithmetic
+step mirrors ScoringPlan.score_terms, so argmax over a batch picks exactly
+the play the scalar search picks. Requires NumPy.
+"""
+import itertools
+from functools import lru_cache
+from typing import List, Tuple, Optional, Dict
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency, only needed for batch scoring
+    np = None
+
+from engine.scoring import Card, ScoringPlan
+from engine.hand_evaluator import HAND_TABLE, HAND_TYPES, ALL_SUITS_MASK
+
+MAX_PLAYED = 5
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("engine.batch requires numpy (pip install numpy)")
+
+
+@lru_cache(maxsize=None)
+def _hand_type_lookup():
+    """Sorted prime products with their (not flush, flush) hand type indexes."""
+    type_index = {t: i for i, t in enumerate(HAND_TYPES)}
+    products = sorted(HAND_TABLE)
+    keys = np.array(products, dtype=np.int64)
+    plain = np.array([type_index[HAND_TABLE[p][0]] for p in products], dtype=np.int64)
+    flush = np.array([type_index[HAND_TABLE[p][1]] for p in products], dtype=np.int64)
+    return keys, plain, flush
+
+
+@lru_cache(maxsize=None)
+def subset_table(n: int):
+    """
+    Every 1-5 card subset of an n-card hand as (idx, masks, sizes): idx is
+    (rows, 5) positions padded with n (an identity card), masks the
+    position bitmasks and sizes the number of cards played.
+    """
+    _require_numpy()
+    rows = []
+    for r in range(1, min(n, MAX_PLAYED) + 1):
+        for combo in itertools.combinations(range(n), r):
+            rows.append(combo + (n,) * (MAX_PLAYED - r))
+    idx = np.array(rows, dtype=np.int64).reshape(-1, MAX_PLAYED)
+    sizes = (idx < n).sum(axis=1)
+    masks = np.zeros(len(rows), dtype=np.int64)
+    for k in range(MAX_PLAYED):
+        col = idx[:, k]
+        masks |= np.where(col < n, np.left_shift(1, col), 0)
+    for arr in (idx, sizes, masks):
+        arr.setflags(write=False)
+    return idx, masks, sizes
+
+
+class BatchScores:
+    """Per-play arrays of shape (hands, rows) for hands of one size."""
+    __slots__ = ('hands', 'masks', 'hand_types', 'chips', 'mult', 'total')
+
+    def __init__(self, hands, masks, hand_types, chips, mult, total):
+        self.hands = hands
+        self.masks = masks
+        self.hand_types = hand_types
+        self.chips = chips
+        self.mult = mult
+        self.total = total
+
+    def best_rows(self):
+        """Row of the best play per hand; ties go to the earliest row."""
+        return self.total.argmax(axis=1)
+
+    def top_rows(self, hand: int, k: int):
+        order = np.argsort(-self.total[hand], kind='stable')
+        return order[:k]
+
+    def play(self, hand: int, row: int) -> Tuple[str, List[Card], dict]:
+        mask = int(self.masks[row])
+        cards = self.hands[hand]
+        combo = [cards[i] for i in range(len(cards)) if mask >> i & 1]
+        result = {
+            "chips": int(self.chips[hand, row]),
+            "mult": int(self.mult[hand, row]),
+            "total": int(self.total[hand, row]),
+        }
+        return HAND_TYPES[self.hand_types[hand, row]], combo, result
+
+
+class BatchScorer:
+    """
+    Scores every play of many same-plan hands as array operations.
+    Build one per ScoringPlan; it is cheap to keep alongside the plan.
+    """
+
+    def __init__(self, plan: ScoringPlan):
+        _require_numpy()
+        self.plan = plan
+        self.type_chips = np.array([plan.levels.get(t, (0.0, 0.0))[0] for t in HAND_TYPES])
+        self.type_mult = np.array([plan.levels.get(t, (0.0, 0.0))[1] for t in HAND_TYPES])
+        # Joker steps as (steps, hand types) tables, padded with identity steps
+        # (adding 0 and multiplying by 1 leave every value bit-identical).
+        per_type = [plan.steps(t) for t in HAND_TYPES]
+        depth = max(len(steps) for steps in per_type)
+        table = np.zeros((depth, len(HAND_TYPES), 3))
+        table[..., 2] = 1.0
+        for t, steps in enumerate(per_type):
+            if steps:
+                table[:len(steps), t] = steps
+        self.step_chips, self.step_mult, self.step_x = table[..., 0], table[..., 1], table[..., 2]
+        self.uniform_steps = not plan.type_steps
+
+    def _card_arrays(self, hands: List[List[Card]]):
+        # Column n is the padding card: it adds nothing and multiplies by 1.
+        n = len(hands[0])
+        terms = np.empty((len(hands), n + 1, 4))
+        primes = np.ones((len(hands), n + 1), dtype=np.int64)
+        suits = np.full((len(hands), n + 1), ALL_SUITS_MASK, dtype=np.int64)
+        terms[:, n] = (0.0, 0.0, 1.0, 1.0)
+        for h, hand in enumerate(hands):
+            terms[h, :n] = self.plan.card_terms(hand)
+            primes[h, :n] = [c.prime for c in hand]
+            suits[h, :n] = [c.suit_mask for c in hand]
+        return terms, primes, suits
+
+    def score(self, hands: List[List[Card]], rows=None) -> BatchScores:
+        """
+        Scores every 1-5 card play of each hand; all hands must have the same
+        size. `rows` restricts scoring to those rows of subset_table(n).
+        """
+        n = len(hands[0])
+        if any(len(hand) != n for hand in hands):
+            raise ValueError("BatchScorer.score needs hands of equal size; use score_groups")
+        idx, masks, sizes = subset_table(n)
+        if rows is not None:
+            idx, masks, sizes = idx[rows], masks[rows], sizes[rows]
+        terms, primes, suit_masks = self._card_arrays(hands)
+
+        # Classification: rank signature lookup plus a suit mask for flushes.
+        product = primes[:, idx].prod(axis=2)
+        suits = np.bitwise_and.reduce(suit_masks[:, idx], axis=2)
+        keys, plain, flush_type = _hand_type_lookup()
+        at = np.searchsorted(keys, product)
+        is_flush = (sizes == MAX_PLAYED) & (suits != 0)
+        hand_types = np.where(is_flush, flush_type[at], plain[at])
+
+        chips = self.type_chips[hand_types]
+        mult = self.type_mult[hand_types]
+
+        # 1. Played Cards, left to right
+        for k in range(MAX_PLAYED):
+            col = terms[:, idx[:, k]]
+            chips = chips + col[..., 0]
+            mult = (mult + col[..., 1]) * col[..., 2]
+
+        # 2. Held in Hand, in position order
+        held_x = np.ones_like(mult)
+        for i in range(n):
+            x = terms[:, i, 3]
+            if (x != 1.0).any():
+                held = (masks >> i & 1) == 0
+                held_x = np.where(held, held_x * x[:, None], held_x)
+        mult = mult * held_x
+
+        # 3. Jokers
+        if self.uniform_steps:
+            for chips_add, mult_add, x in self.plan.joker_steps:
+                chips = chips + chips_add
+                mult = (mult + mult_add) * x
+        else:
+            for k in range(len(self.step_x)):
+                chips = chips + self.step_chips[k][hand_types]
+                mult = (mult + self.step_mult[k][hand_types]) * self.step_x[k][hand_types]
+
+        chips = np.round(np.maximum(0.0, chips)).astype(np.int64)
+        mult = np.round(np.maximum(1.0, mult)).astype(np.int64)
+        return BatchScores(hands, masks, hand_types, chips, mult, chips * mult)
+
+    def score_groups(self, hands: List[List[Card]]) -> Dict[int, Tuple[List[int], BatchScores]]:
+        """Groups hands by size; maps size -> (original indexes, scores)."""
+        groups: Dict[int, List[int]] = {}
+        for i, hand in enumerate(hands):
+            groups.setdefault(len(hand), []).append(i)
+        return {n: (ids, self.score([hands[i] for i in ids])) for n, ids in groups.items() if n}
+
+    def best_plays(self, hands: List[List[Card]]) -> List[Tuple[str, List[Card], dict]]:
+        """find_best_hand for many hands at once, in input order."""
+        out: List[Optional[Tuple[str, List[Card], dict]]] = [("", [], {})] * len(hands)
+        for ids, scores in self.score_groups(hands).values():
+            for h, row in enumerate(scores.best_rows()):
+                out[ids[h]] = scores.play(h, int(row))
+        return out
+
+    def best_totals(self, hands: List[List[Card]]) -> List[int]:
+        """Best play total per hand (0 for an empty hand), in input order."""
+        out = [0] * len(hands)
+        for ids, scores in self.score_groups(hands).values():
+            for i, total in zip(ids, scores.total.max(axis=1).tolist()):
+                out[i] = total
+        return out
+
+    def top_plays(self, hand: List[Card], k: int) -> List[Tuple[str, List[Card], dict]]:
+        if not hand:
+            return []
+        scores = self.score([hand])
+        return [scores.play(0, int(row)) for row in scores.top_rows(0, k)]
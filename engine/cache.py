@@ -0,0 +1,102 @@
+"""
+Bounded caches and canonical fingerprints for game states.
+
+A spectator overlay submits the same state over and over; fingerprints are
+order-insensitive where the game is (hand, deck, consumables, shop) and
+order-sensitive where it is not (jokers, by position).
+"""
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, TYPE_CHECKING
+
+from engine.scoring import HandLevel
+
+if TYPE_CHECKING:
+    from engine.decision_engine import GameState
+
+
+class LRUCache:
+    """Least-recently-used map bounded by entry count, with hit/miss/eviction counters."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: Hashable, value: Any):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def cards_key(cards) -> bytes:
+    """Order-independent, compact encoding of a multiset of cards."""
+    return b''.join(code.to_bytes(2, 'little') for code in sorted(c.code for c in cards))
+
+
+def jokers_key(jokers) -> tuple:
+    """Joker lineup in position order; the list order itself does not matter."""
+    return tuple((j.id, j.effect_type, j.value, j.condition, j.counter)
+                 for j in sorted(jokers, key=lambda j: j.position))
+
+
+def levels_key(hand_levels: Dict[str, HandLevel]) -> tuple:
+    return tuple(sorted((name, level.chips, level.mult) for name, level in hand_levels.items()))
+
+
+def plan_key(jokers, hand_levels: Dict[str, HandLevel]) -> tuple:
+    """Everything ScoringEngine.compile depends on."""
+    return (jokers_key(jokers), levels_key(hand_levels))
+
+
+def state_fingerprint(state: 'GameState') -> bytes:
+    """128-bit digest of everything a recommendation depends on."""
+    canonical = (
+        state.ante,
+        state.blind_type,
+        state.money,
+        jokers_key(state.jokers),
+        tuple(sorted(state.consumables)),
+        cards_key(state.hand),
+        cards_key(state.deck),
+        levels_key(state.hand_levels),
+        state.hands_left,
+        state.discards_left,
+        state.required_score,
+        state.current_score,
+        tuple(sorted(json.dumps(item, sort_keys=True, default=str) for item in state.shop_items)),
+    )
+    return hashlib.blake2b(repr(canonical).encode('utf-8'), digest_size=16).digest()
@@ -0,0 +1,500 @@
+"""
+Compact game-data catalog: data/jokers.json and the wiki sync output
+(data/wiki/parsed/*.json) compiled into one file that opens lazily.
+
+File layout (little endian):
+
+    magic b"BALCAT2\\0" | u64 header offset | u32 header length
+    entry table    fixed-size ENTRY records, one per catalog entry
+    pair table     PAIR records (key, value string refs) holding wiki
+                   infobox params and languages; entries point at a run
+    index tables   open-addressing hash tables of SLOT records keyed by
+                   crc32: ids, casefolded names, internal ids
+    strings        UTF-8 blob of every string, deduplicated
+    header         JSON: section offsets and the kind/rarity/effect enums
+
+Every field is typed: enums are one byte, numbers are fixed-width, strings
+are (offset, length) references into the blob and absent strings use the
+NONE offset. Catalog maps the file and reads only the header on open; a
+lookup hashes the key, probes a few slots comparing key bytes in place and
+decodes one entry with a struct unpack and string slices. Nothing per entry
+is JSON, so `params`, `languages`, `data` and `wiki` are rebuilt from the
+typed fields on access.
+"""
+import json
+import mmap
+import os
+import struct
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from engine.scoring import Joker
+
+MAGIC = b"BALCAT2\0"
+VERSION = 2
+PREFIX = struct.Struct("<8sQI")
+# kind, rarity, effect type, flags, effect value, wiki page id, wiki revision
+# id, (offset, length) of id, name, internal id, effect condition, wiki
+# title, wiki template and wiki timestamp, then (first pair, count) of
+# params and languages
+ENTRY = struct.Struct("<BBBBdII" + "IH" * 7 + "IHIH")
+PAIR = struct.Struct("<IHIH")
+SLOT = struct.Struct("<IIHI")  # crc32 of the key, key offset, key length, entry number + 1 (0 = empty)
+INDEXES = ("id", "name", "internal_id")
+NONE = 0xFFFFFFFF  # string offset of an absent string
+
+HAS_EFFECT = 1
+HAS_DATA = 2
+HAS_WIKI = 4
+
+WIKI_BASE_URL = "https://balatrowiki.org"
+
+
+@dataclass(frozen=True)
+class EffectRecord:
+    """A joker effect as given by the CORE_SPEC schema."""
+    type: str
+    value: float
+    condition: Optional[str]
+
+
+@dataclass(frozen=True)
+class WikiPage:
+    """Where a wiki record came from; `url` is derived from the title like wiki_sync does."""
+    title: str
+    pageid: int
+    revid: int
+    timestamp: Optional[str]
+    template: Optional[str]
+
+    @property
+    def url(self) -> str:
+        return f"{WIKI_BASE_URL}/w/{self.title.replace(' ', '_')}"
+
+
+class CatalogEntry:
+    """
+    One catalog item. kind, id and name are decoded with the entry; the
+    other fields decode from its fixed-width record on first use.
+    """
+    __slots__ = ('kind', 'id', 'name', '_catalog', '_record', '_cache')
+
+    def __init__(self, catalog: 'Catalog', record: tuple):
+        self._catalog = catalog
+        self._record = record
+        self._cache: Dict[str, object] = {}
+        self.kind = catalog.kinds[record[0]]
+        self.id = catalog._string(record[7], record[8])
+        self.name = catalog._string(record[9], record[10])
+
+    def _decode(self, name: str):
+        if name in self._cache:
+            return self._cache[name]
+        catalog = self._catalog
+        (_, rarity, effect_type, flags, value, pageid, revid, _, _, _, _, internal_off, internal_len,
+         cond_off, cond_len, title_off, title_len, template_off, template_len, time_off, time_len,
+         params_first, params_count, lang_first, lang_count) = self._record
+        if name == 'internal_id':
+            decoded = catalog._string(internal_off, internal_len)
+        elif name == 'rarity':
+            decoded = catalog._rarities[rarity]
+        elif name == 'effect':
+            decoded = None
+            if flags & HAS_EFFECT:
+                decoded = EffectRecord(catalog._effect_types[effect_type], value, catalog._string(cond_off, cond_len))
+        elif name == 'page':
+            decoded = None
+            if flags & HAS_WIKI:
+                decoded = WikiPage(catalog._string(title_off, title_len), pageid, revid,
+                                   catalog._string(time_off, time_len), catalog._string(template_off, template_len))
+        elif name == 'params':
+            decoded = catalog._pairs(params_first, params_count)
+        else:
+            decoded = catalog._pairs(lang_first, lang_count)
+        self._cache[name] = decoded
+        return decoded
+
+    @property
+    def internal_id(self) -> Optional[str]:
+        return self._decode('internal_id')
+
+    @property
+    def rarity(self) -> Optional[str]:
+        return self._decode('rarity')
+
+    @property
+    def effect(self) -> Optional[EffectRecord]:
+        return self._decode('effect')
+
+    @property
+    def page(self) -> Optional[WikiPage]:
+        """Title, ids and template of the wiki page, if the entry has a wiki record."""
+        return self._decode('page')
+
+    @property
+    def params(self) -> Dict[str, str]:
+        """The wiki infobox parameters (empty without a wiki record)."""
+        return self._decode('params')
+
+    @property
+    def languages(self) -> Dict[str, str]:
+        """The wiki Languages template entries (empty without one)."""
+        return self._decode('languages')
+
+    @property
+    def data(self) -> Optional[Dict]:
+        """The data/jokers.json record, if the entry has one."""
+        if not self._record[3] & HAS_DATA:
+            return None
+        effect = self.effect
+        return {
+            "id": self.id,
+            "name": self.name,
+            "rarity": self.rarity,
+            "effect": {"type": effect.type, "value": effect.value, "condition": effect.condition} if effect else None,
+        }
+
+    @property
+    def wiki(self) -> Optional[Dict]:
+        """The parsed wiki record, as wiki_sync.parse_page wrote it, if the entry has one."""
+        page = self.page
+        if page is None:
+            return None
+        record = {
+            "kind": self.kind,
+            "title": page.title,
+            "pageid": page.pageid,
+            "revid": page.revid,
+            "timestamp": page.timestamp,
+            "url": page.url,
+            "template": page.template,
+            "params": dict(self.params),
+        }
+        if self.languages:
+            record["languages"] = dict(self.languages)
+            if "internal" in self.languages:
+                record["internal_id"] = self.languages["internal"]
+        return record
+
+    def to_joker(self, position: int) -> Joker:
+        if self.effect is None:
+            raise ValueError(f"{self.id!r} has no joker effect")
+        return Joker(self.id, self.name, self.effect.type, self.effect.value, position, self.effect.condition)
+
+    def __repr__(self) -> str:
+        return f"CatalogEntry(kind={self.kind!r}, id={self.id!r}, name={self.name!r})"
+
+
+def _effect_record(raw: Optional[Dict]) -> Optional[EffectRecord]:
+    if not raw or not raw.get("type"):
+        return None
+    value = raw.get("value")
+    return EffectRecord(raw["type"], float(value) if value is not None else 0.0, raw.get("condition"))
+
+
+def _load_sources(data_root: Path) -> List[Dict]:
+    """
+    Merged source items, each {"kind", "id", "name", "internal_id",
+    "rarity", "effect", "data", "wiki"}. A wiki joker whose internal id (or
+    title) matches a data/jokers.json entry is merged into that entry.
+    """
+    items = []
+    by_joker_key = {}
+    jokers_path = data_root / "jokers.json"
+    if jokers_path.exists():
+        for raw in json.loads(jokers_path.read_text(encoding="utf-8")):
+            item = {
+                "kind": "jokers",
+                "id": raw["id"],
+                "name": raw["name"],
+                "internal_id": raw["id"],
+                "rarity": raw.get("rarity"),
+                "effect": _effect_record(raw.get("effect")),
+                "data": raw,
+                "wiki": None,
+            }
+            items.append(item)
+            by_joker_key[raw["id"]] = item
+            by_joker_key.setdefault(raw["name"].casefold(), item)
+
+    parsed_root = data_root / "wiki" / "parsed"
+    for path in sorted(parsed_root.glob("*.json")) if parsed_root.is_dir() else ():
+        kind = path.stem
+        for record in json.loads(path.read_text(encoding="utf-8")):
+            internal_id = record.get("internal_id")
+            if kind == "jokers":
+                item = by_joker_key.get(internal_id) or by_joker_key.get(record["title"].casefold())
+                if item is not None and item["wiki"] is None:
+                    item["wiki"] = record
+                    continue
+            items.append({
+                "kind": kind,
+                "id": internal_id or f"{kind}:{record['pageid']}",
+                "name": record["title"],
+                "internal_id": internal_id,
+                "rarity": record.get("params", {}).get("rarity") or None,
+                "effect": None,
+                "data": None,
+                "wiki": record,
+            })
+    return items
+
+
+class _Strings:
+    def __init__(self):
+        self.blob = bytearray()
+        self.offsets: Dict[bytes, int] = {}
+
+    def add(self, text: Optional[str]) -> Tuple[int, int]:
+        if text is None:
+            return NONE, 0
+        raw = str(text).encode("utf-8")
+        if len(raw) > 0xFFFF:
+            raise ValueError(f"catalog string too long: {str(text)[:40]!r}...")
+        offset = self.offsets.get(raw)
+        if offset is None:
+            offset = self.offsets[raw] = len(self.blob)
+            self.blob += raw
+        return offset, len(raw)
+
+
+def _hash_table(keys: List[Tuple[bytes, Tuple[int, int], int]]) -> bytearray:
+    """Open-addressing table with linear probing, at most half full."""
+    size = 1
+    while size < 2 * len(keys):
+        size *= 2
+    slots = [None] * size
+    for raw, (offset, length), number in keys:
+        h = zlib.crc32(raw)
+        i = h & (size - 1)
+        while slots[i] is not None:
+            i = (i + 1) & (size - 1)
+        slots[i] = SLOT.pack(h, offset, length, number + 1)
+    empty = SLOT.pack(0, 0, 0, 0)
+    return bytearray(b"".join(slot or empty for slot in slots))
+
+
+def build_catalog(data_root: Path, out_path: Path) -> Dict:
+    """
+    Compiles the data under `data_root` into a catalog at `out_path`
+    (written to a temporary file and renamed). Returns build stats. Items
+    whose id is already taken keep the first occurrence.
+    """
+    items = _load_sources(Path(data_root))
+    kinds: List[str] = []
+    rarities: List[Optional[str]] = [None]
+    effect_types: List[Optional[str]] = [None]
+
+    def enum(table, value):
+        if value not in table:
+            if len(table) > 0xFF:
+                raise ValueError(f"too many distinct values for a one-byte catalog field: {value!r}")
+            table.append(value)
+        return table.index(value)
+
+    strings = _Strings()
+    pairs = bytearray()
+
+    def add_pairs(mapping: Optional[Dict]) -> Tuple[int, int]:
+        first = len(pairs) // PAIR.size
+        mapping = mapping or {}
+        if len(mapping) > 0xFFFF:
+            raise ValueError("too many catalog pairs for one entry")
+        for key, value in mapping.items():
+            pairs.extend(PAIR.pack(*strings.add(key), *strings.add(value)))
+        return first, len(mapping)
+
+    entries = bytearray()
+    keys = {name: [] for name in INDEXES}
+    seen_ids = set()
+    duplicates = 0
+    kind_counts: Dict[str, int] = {}
+    for item in items:
+        if item["id"] in seen_ids:
+            duplicates += 1
+            continue
+        seen_ids.add(item["id"])
+        kind_counts[item["kind"]] = kind_counts.get(item["kind"], 0) + 1
+        number = len(entries) // ENTRY.size
+        effect = item["effect"]
+        wiki = item["wiki"] or {}
+        flags = (HAS_EFFECT if effect is not None else 0) | (HAS_DATA if item["data"] is not None else 0) \
+            | (HAS_WIKI if item["wiki"] is not None else 0)
+        id_ref = strings.add(item["id"])
+        name_ref = strings.add(item["name"])
+        internal_ref = strings.add(item["internal_id"])
+        entries += ENTRY.pack(
+            enum(kinds, item["kind"]),
+            enum(rarities, item["rarity"]),
+            enum(effect_types, effect.type if effect else None),
+            flags,
+            effect.value if effect else 0.0,
+            wiki.get("pageid") or 0,
+            wiki.get("revid") or 0,
+            *id_ref,
+            *name_ref,
+            *internal_ref,
+            *strings.add(effect.condition if effect else None),
+            *strings.add(wiki.get("title")),
+            *strings.add(wiki.get("template")),
+            *strings.add(wiki.get("timestamp")),
+            *add_pairs(wiki.get("params")),
+            *add_pairs(wiki.get("languages")),
+        )
+        keys["id"].append((item["id"].encode("utf-8"), id_ref, number))
+        folded = item["name"].casefold()
+        keys["name"].append((folded.encode("utf-8"), strings.add(folded), number))
+        if item["internal_id"] is not None:
+            keys["internal_id"].append((item["internal_id"].encode("utf-8"), internal_ref, number))
+
+    sections = {}
+    position = PREFIX.size
+    body = []
+    for name, blob in [("entries", entries), ("pairs", pairs)] \
+            + [(f"index.{n}", _hash_table(k)) for n, k in keys.items()] + [("strings", strings.blob)]:
+        sections[name] = [position, len(blob)]
+        body.append(blob)
+        position += len(blob)
+    header = json.dumps({
+        "version": VERSION,
+        "entries": len(entries) // ENTRY.size,
+        "sections": sections,
+        "kinds": kinds,
+        "rarities": rarities,
+        "effect_types": effect_types,
+    }, separators=(",", ":")).encode("utf-8")
+
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(PREFIX.pack(MAGIC, position, len(header)))
+        for blob in body:
+            f.write(blob)
+        f.write(header)
+    os.replace(tmp_path, out_path)
+    return {
+        "entries": len(entries) // ENTRY.size,
+        "duplicates": duplicates,
+        "kinds": kind_counts,
+        "bytes": position + len(header),
+    }
+
+
+class Catalog:
+    """
+    Read-only view of a catalog file. Opening maps the file and parses the
+    small header only; entries are decoded per lookup.
+
+        with Catalog("data/catalog.bin") as catalog:
+            blueprint = catalog.get("j_blueprint")
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._file.close()
+            raise ValueError(f"{self.path} is not a catalog") from None
+        if len(self._mm) < PREFIX.size or self._mm[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{self.path} is not a catalog")
+        _, header_offset, header_length = PREFIX.unpack_from(self._mm, 0)
+        header = json.loads(self._mm[header_offset:header_offset + header_length])
+        if header["version"] != VERSION:
+            self.close()
+            raise ValueError(f"{self.path}: unsupported catalog version {header['version']}")
+        self._count = header["entries"]
+        self._sections = header["sections"]
+        self._entries_at = self._sections["entries"][0]
+        self._pairs_at = self._sections["pairs"][0]
+        self._strings_at = self._sections["strings"][0]
+        self.kinds: List[str] = header["kinds"]
+        self._rarities = header["rarities"]
+        self._effect_types = header["effect_types"]
+
+    def close(self):
+        if getattr(self, "_mm", None) is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def __enter__(self) -> 'Catalog':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _string(self, offset: int, length: int) -> Optional[str]:
+        if offset == NONE:
+            return None
+        start = self._strings_at + offset
+        return str(self._mm[start:start + length], "utf-8")
+
+    def _pairs(self, first: int, count: int) -> Dict[str, str]:
+        out = {}
+        at = self._pairs_at + first * PAIR.size
+        for i in range(count):
+            key_off, key_len, value_off, value_len = PAIR.unpack_from(self._mm, at + i * PAIR.size)
+            out[self._string(key_off, key_len)] = self._string(value_off, value_len)
+        return out
+
+    def entry(self, number: int) -> CatalogEntry:
+        """The `number`-th entry in build order."""
+        if not 0 <= number < self._count:
+            raise IndexError(number)
+        return CatalogEntry(self, ENTRY.unpack_from(self._mm, self._entries_at + number * ENTRY.size))
+
+    def _search(self, index: str, key: str) -> Iterator[int]:
+        """Entry numbers whose `index` key equals `key`, in probe order."""
+        start, length = self._sections[f"index.{index}"]
+        size = length // SLOT.size
+        if not size:
+            return
+        raw = key.encode("utf-8")
+        h = zlib.crc32(raw)
+        mm, strings_at, unpack = self._mm, self._strings_at, SLOT.unpack_from
+        i = h & (size - 1)
+        while True:
+            slot_hash, offset, key_len, number = unpack(mm, start + i * SLOT.size)
+            if not number:
+                return
+            if slot_hash == h and key_len == len(raw) and \
+                    mm[strings_at + offset:strings_at + offset + key_len] == raw:
+                yield number - 1
+            i = (i + 1) & (size - 1)
+
+    def get(self, id: str) -> Optional[CatalogEntry]:
+        for number in self._search("id", id):
+            return self.entry(number)
+        return None
+
+    def by_internal_id(self, internal_id: str) -> Optional[CatalogEntry]:
+        for number in self._search("internal_id", internal_id):
+            return self.entry(number)
+        return None
+
+    def by_name(self, name: str, kind: Optional[str] = None) -> List[CatalogEntry]:
+        """Entries named `name` (case-insensitive) in build order, optionally of one kind."""
+        found = [self.entry(number) for number in sorted(self._search("name", name.casefold()))]
+        return [entry for entry in found if kind is None or entry.kind == kind]
+
+    def __iter__(self) -> Iterator[CatalogEntry]:
+        for number in range(self._count):
+            yield self.entry(number)
+
+    def of_kind(self, kind: str) -> Iterator[CatalogEntry]:
+        if kind not in self.kinds:
+            return
+        code = self.kinds.index(kind)
+        for number in range(self._count):
+            if self._mm[self._entries_at + number * ENTRY.size] == code:
+                yield self.entry(number)
@@ -1,8 +1,21 @@
-from typing import List, Dict, Optional, Union
+import math
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Iterable, Iterator, Optional, Union
 from dataclasses import dataclass, field
-from engine.scoring import Card, Joker, ScoringEngine
+from engine.scoring import Card, Joker, HandLevel, ScoringEngine
 from engine.hand_evaluator import HandEvaluator
-from engine.simulator import HandSimulator
+from engine.simulator import HandSimulator, SearchCancelled
+from engine import batch
+from engine.discard import DiscardAdvisor
+from engine.planner import RoundPlanner
+from engine.ordering import JokerOrderAdvisor
+from engine.shop import ShopEvaluator
+from engine.distribution import best_clear_play, score_distribution
+from engine.cache import LRUCache, state_fingerprint, plan_key
+from engine.session import IncrementalSession
+from engine.profiling import Profiler, stage
 
 @dataclass
 class GameState:
@@ -16,6 +29,7 @@ class GameState:
     consumables: List[str] = field(default_factory=list)
     hand: List[Card] = field(default_factory=list)
     deck: List[Card] = field(default_factory=list)
+    hand_levels: Dict[str, HandLevel] = field(default_factory=dict)  # overrides level 1 stats
     
     # Round status
     hands_left: int = 4
@@ -26,30 +40,322 @@ class GameState:
     # Shop status (if applicable)
     shop_items: List[Dict] = field(default_factory=list)
 
+_batch_engine: Optional['DecisionEngine'] = None
+
+
+def _batch_init(options: Dict):
+    global _batch_engine
+    _batch_engine = DecisionEngine(**options)
+
+
+def _batch_recommend(states: List['GameState']) -> List[Dict]:
+    # One task is (part of) one lineup group: warm its best hands in one pass.
+    _batch_engine.warm_best_hands(states)
+    return [_batch_engine.recommend_or_error(state) for state in states]
+
+
+def _windows(states: Iterable['GameState'], size: int) -> Iterator[List['GameState']]:
+    batch = []
+    for state in states:
+        batch.append(state)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
 class DecisionEngine:
-    def __init__(self):
+    def __init__(
+        self,
+        discard_workers: int = 0,
+        plan_rounds: bool = False,
+        cache_entries: int = 1024,
+        profile: bool = False,
+        seed: Optional[int] = None
+    ):
+        # Worker engines of recommend_many are built with the same options.
+        self._options = {"plan_rounds": plan_rounds, "cache_entries": cache_entries, "seed": seed}
         self.scoring_engine = ScoringEngine()
         self.simulator = HandSimulator(self.scoring_engine)
         self.evaluator = HandEvaluator()
+        self.discard_advisor = DiscardAdvisor(workers=discard_workers)
+        # Multi-turn search over the rest of the blind (opt-in, ~1s budget)
+        self.round_planner = RoundPlanner(self.simulator) if plan_rounds else None
+        if seed is not None:
+            # Reproducible answers: a fixed-seed race bounded by samples, not wall time.
+            self.discard_advisor.seed = seed
+            self.discard_advisor.time_budget = float('inf')
+            if self.round_planner is not None:
+                self.round_planner.time_budget = float('inf')
+        self.order_advisor = JokerOrderAdvisor(self.simulator)
+        self.shop_evaluator = ShopEvaluator(self)
 
-    def recommend(self, state: GameState) -> Dict:
+        # Polling overlays resubmit identical states; all caches are LRU-bounded.
+        self.recommendation_cache = LRUCache(cache_entries)
+        self.plan_cache = LRUCache(max(1, cache_entries // 16))
+        self.best_hand_cache = LRUCache(cache_entries * 4)
+        # Consecutive states share most cards; rescore only plays touching new ones.
+        self.session = IncrementalSession(self.simulator)
+
+        # Opt-in per-stage timings: adds a "timings" block to recommendations.
+        self.profiler = Profiler() if profile else None
+        self.scoring_engine.profiler = self.simulator.profiler = self.session.profiler = self.profiler
+
+    def close(self):
+        """Shuts down the discard advisor's worker processes, if any."""
+        self.discard_advisor.close()
+
+    def __enter__(self) -> 'DecisionEngine':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def recommend(self, state: GameState, cancel: Optional[threading.Event] = None) -> Dict:
         """
         Analyzes the state and provides a recommendation.
+        Repeated states are answered from a cache keyed on state_fingerprint.
+        Setting `cancel` aborts long searches with SearchCancelled.
+        With profiling on, the result carries a "timings" block.
+        """
+        prof = self.profiler
+        if prof is not None:
+            hits_before = self._cache_hits()
+        key = state_fingerprint(state)
+        cached = self.recommendation_cache.get(key)
+        if cached is not None:
+            recommendation = cached
+        else:
+            try:
+                if state.hand:
+                    recommendation = self._recommend_in_round(state, cancel)
+                elif state.shop_items:
+                    with stage(prof, 'shop'):
+                        recommendation = self._recommend_in_shop(state)
+                else:
+                    recommendation = {"action": "wait", "reason": "No actionable state detected (no hand, no shop)."}
+            except SearchCancelled:
+                if prof is not None:
+                    prof.abandon()
+                raise
+            self.recommendation_cache.put(key, recommendation)
+        recommendation = dict(recommendation)
+        if prof is not None:
+            for name, before, after in zip(('recommendation', 'plan', 'best_hand'), hits_before, self._cache_hits()):
+                if after > before:
+                    prof.count(f'{name}_cache_hits', after - before)
+            recommendation["timings"] = prof.take()
+        return recommendation
+
+    def recommend_or_error(self, state: GameState) -> Dict:
+        """recommend(), with a malformed state answered by {"error": ...} instead of raising."""
+        try:
+            return self.recommend(state)
+        except (ValueError, KeyError, IndexError, TypeError) as exc:
+            return {"error": f"{type(exc).__name__}: {exc}"}
+
+    def recommend_many(
+        self,
+        states: Iterable[GameState],
+        workers: int = 0,
+        window: int = 1024,
+        chunk_size: int = 64
+    ) -> Iterator[Dict]:
+        """
+        Recommendations for a stream of states, yielded in input order.
+
+        States are consumed `window` at a time, so memory stays bounded by
+        the window however long the stream is. Within a window identical
+        states (same state_fingerprint) are answered once, and the distinct
+        states are grouped by joker lineup and hand levels so each group
+        compiles its plan once and scores its best hands in one vectorized
+        pass. With workers > 1 each group is cut into tasks of at most
+        `chunk_size` states, and a large group into at least one task per
+        worker, for a process pool (one engine per worker, built with this
+        engine's options as in server.py); the next window is read while
+        the pool works on the current one. Malformed states yield
+        {"error": ...} in place.
+
+        Pass seed= to the engine for output that does not depend on timing:
+        its discard searches then stop on sample counts, not wall time.
+        """
+        windows = _windows(states, window)
+        if workers <= 1:
+            for batch in windows:
+                keys, answers, groups = self._distinct_groups(batch)
+                for group in groups.values():
+                    self.warm_best_hands(list(group.values()))
+                    for key, state in group.items():
+                        answers[key] = self.recommend_or_error(state)
+                for key in keys:
+                    yield dict(answers[key])
+            return
+
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_batch_init, initargs=(self._options,))
+        try:
+            pending = deque()
+            for batch in windows:
+                pending.append(self._submit_window(pool, batch, chunk_size, workers))
+                if len(pending) > 1:  # at most two windows in flight
+                    yield from self._collect_window(*pending.popleft())
+            while pending:
+                yield from self._collect_window(*pending.popleft())
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    def _distinct_groups(self, batch: List[GameState]):
+        """Fingerprints in order, answers already cached, and the other distinct states by plan key."""
+        keys = [state_fingerprint(state) for state in batch]
+        answers: Dict[bytes, Dict] = {}
+        groups: Dict[tuple, Dict[bytes, GameState]] = {}
+        for key, state in zip(keys, batch):
+            if key in answers:
+                continue
+            cached = self.recommendation_cache.get(key)
+            if cached is not None:
+                answers[key] = cached
+            else:
+                groups.setdefault(plan_key(state.jokers, state.hand_levels), {}).setdefault(key, state)
+        return keys, answers, groups
+
+    def _submit_window(self, pool: ProcessPoolExecutor, batch: List[GameState], chunk_size: int, workers: int):
+        keys, answers, groups = self._distinct_groups(batch)
+        tasks = []
+        for group in groups.values():
+            items = list(group.items())
+            # One lineup can dominate a window; spread it over every worker.
+            size = max(1, min(chunk_size, math.ceil(len(items) / workers)))
+            for i in range(0, len(items), size):
+                chunk = items[i:i + size]
+                future = pool.submit(_batch_recommend, [state for _, state in chunk])
+                tasks.append(([key for key, _ in chunk], future))
+        return keys, answers, tasks
+
+    def _collect_window(self, keys, answers, tasks) -> Iterator[Dict]:
+        for task_keys, future in tasks:
+            for key, recommendation in zip(task_keys, future.result()):
+                answers[key] = recommendation
+                if "error" not in recommendation:
+                    self.recommendation_cache.put(key, recommendation)
+        for key in keys:
+            yield dict(answers[key])
+
+    def _cache_hits(self):
+        return self.recommendation_cache.hits, self.plan_cache.hits, self.best_hand_cache.hits
+
+    def profile_snapshot(self) -> Optional[Dict]:
+        """Aggregated stage timings and counters, or None when profiling is off."""
+        return self.profiler.snapshot() if self.profiler is not None else None
+
+    def cache_stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            "recommendations": self.recommendation_cache.stats(),
+            "plans": self.plan_cache.stats(),
+            "best_hands": self.best_hand_cache.stats(),
+        }
+
+    def compile_plan(self, state: GameState):
+        """Compiled scoring plan for the state's jokers and hand levels (cached)."""
+        return self.plan_for(state.jokers, state.hand_levels)
+
+    def plan_for(self, jokers: List[Joker], hand_levels: Dict[str, HandLevel]):
+        """Compiled scoring plan for a lineup and hand levels, e.g. a hypothetical purchase (cached)."""
+        key = plan_key(jokers, hand_levels)
+        plan = self.plan_cache.get(key)
+        if plan is None:
+            plan = self.scoring_engine.compile(jokers, hand_levels)
+            self.plan_cache.put(key, plan)
+        return plan
+
+    def best_hand(self, state: GameState, plan=None):
+        """
+        find_best_hand for the state's hand, cached per (plan, hand in order).
+        Misses are rescored incrementally from the previous hand by the session.
+        """
+        pkey = plan_key(state.jokers, state.hand_levels)
+        key = (pkey, tuple(c.code for c in state.hand))
+        found = self.best_hand_cache.get(key)
+        if found is None:
+            plan = plan or self.compile_plan(state)
+            with stage(self.profiler, 'search'):
+                found = self.session.best_hand(state.hand, plan, pkey)
+            self.best_hand_cache.put(key, found)
+        return found
+
+    def warm_best_hands(self, states: List[GameState]) -> int:
+        """
+        Fills the best-hand cache for many states with one vectorized pass
+        per distinct plan (needs numpy; a no-op without it). Returns the
+        number of hands scored.
         """
-        if state.hand:
-            return self._recommend_in_round(state)
-        elif state.shop_items:
-            return self._recommend_in_shop(state)
+        if batch.np is None:
+            return 0
+        groups: Dict[tuple, List[GameState]] = {}
+        for state in states:
+            if state.hand:
+                groups.setdefault(plan_key(state.jokers, state.hand_levels), []).append(state)
+        scored = 0
+        for pkey, group in groups.items():
+            pending = {}
+            for state in group:
+                key = (pkey, tuple(c.code for c in state.hand))
+                if key not in pending and self.best_hand_cache.get(key) is None:
+                    pending[key] = state.hand
+            if not pending:
+                continue
+            scorer = batch.BatchScorer(self.compile_plan(group[0]))
+            with stage(self.profiler, 'search'):
+                found_all = scorer.best_plays(list(pending.values()))
+            for key, found in zip(pending, found_all):
+                self.best_hand_cache.put(key, found)
+            scored += len(pending)
+        return scored
+
+    def recommend_joker_order(self, state: GameState) -> Dict:
+        """
+        Suggests a joker lineup order maximizing the expected best-play score
+        over hands drawn from the state's hand and deck (see engine.ordering).
+        """
+        if len(state.jokers) < 2 or not (state.hand or state.deck):
+            return {"action": "keep_order", "reason": "Nothing to reorder."}
+        hand = state.hand or state.deck[:8]
+        with stage(self.profiler, 'search'):
+            order = self.order_advisor.recommend(hand, state.deck, state.jokers, state.hand_levels)
+        current = [j.id for j in sorted(state.jokers, key=lambda j: j.position)]
+        recommended = [j.id for j in order.jokers]
+        result = {
+            "action": "reorder_jokers" if recommended != current else "keep_order",
+            "jokers": [j.name for j in order.jokers],
+            "joker_ids": recommended,
+            "expected_score": round(order.expected_score),
+            "current_expected_score": round(order.current_score),
+            "method": order.method,
+            "orders_scored": order.orders_scored,
+        }
+        if recommended != current:
+            result["reason"] = (f"Reordering raises the expected best hand from {order.current_score:.0f} "
+                                f"to {order.expected_score:.0f}.")
         else:
-            return {"action": "wait", "reason": "No actionable state detected (no hand, no shop)."}
+            result["reason"] = "The current order is already the best found."
+        return result
+
+    def needs_search(self, state: GameState) -> bool:
+        """True when recommend() will run a sampling search (discards or round planning)."""
+        if state.required_score - state.current_score <= 0 or not state.hand:
+            return False
+        if self.best_hand(state)[2].get('total', 0) >= state.required_score - state.current_score:
+            return False
+        if self.round_planner is not None:
+            return True
+        return state.discards_left > 0 and bool(state.deck)
+
+    def _recommend_in_round(self, state: GameState, cancel: Optional[threading.Event] = None) -> Dict:
+        # One compiled plan serves every combination of this state
+        plan = self.compile_plan(state)
 
-    def _recommend_in_round(self, state: GameState) -> Dict:
         # Find best hand to play
-        hand_type, best_combo, result = self.simulator.find_best_hand(
-            state.hand, 
-            state.jokers, 
-            self.evaluator.get_hand_type
-        )
+        hand_type, best_combo, result = self.best_hand(state, plan)
         
         # Heuristic: If this hand wins the round, play it.
         remaining_needed = state.required_score - state.current_score
@@ -62,30 +368,130 @@ class DecisionEngine:
                 "reason": f"This hand will complete the blind ({result['total']} >= {remaining_needed})."
             }
         
+        if self.round_planner is not None:
+            return self._recommend_round_plan(state, plan, cancel)
+
+        # Lucky cards and chance triggers: the play most likely to clear, from exact distributions
+        with stage(self.profiler, 'search'):
+            chance = best_clear_play(plan, state.hand, remaining_needed)
+        if chance is not None and chance.probability <= 0.0:
+            chance = None
+
+        # Would redrawing from the deck give a better hand on average
+        # (or, when a random play can clear, a better chance to clear)?
+        if state.discards_left > 0 and state.deck:
+            with stage(self.profiler, 'search'):
+                options = self.discard_advisor.evaluate(state.hand, state.deck, plan, remaining_needed, cancel)
+            if self.profiler is not None:
+                self.profiler.count('discard_samples', sum(option.samples for option in options))
+            # Options come best mean first; against a chance play, compare the likeliest to clear.
+            best = options[0] if chance is None or not options else max(options, key=lambda o: o.clear_probability)
+            if options and (best.clear_probability > chance.probability if chance is not None
+                            else best.mean_score > result['total']):
+                return {
+                    "action": "discard",
+                    "cards": [f"{c.rank} of {c.suit}" for c in best.discard],
+                    "expected_score": round(best.mean_score),
+                    "clear_probability": round(best.clear_probability, 3),
+                    "reason": (f"Redrawing raises the expected best hand from {result['total']} "
+                               f"to {best.mean_score:.0f} (P(clear) {best.clear_probability:.0%}).")
+                }
+
+        if chance is not None:
+            dist = chance.distribution
+            return {
+                "action": "play",
+                "hand_type": chance.hand_type,
+                "cards": [f"{c.rank} of {c.suit}" for c in chance.cards],
+                "expected_score": round(dist.mean),
+                "clear_probability": round(chance.probability, 3),
+                "distribution": dist.summary(),
+                "reason": (f"Most likely play to complete the blind: P(total >= {remaining_needed}) "
+                           f"{chance.probability:.0%}, mean {dist.mean:.0f}.")
+            }
+
         # Otherwise, suggest the best scoring hand
-        return {
+        recommendation = {
             "action": "play",
             "hand_type": hand_type,
             "cards": [f"{c.rank} of {c.suit}" for c in best_combo],
             "expected_score": result['total'],
             "reason": "Highest scoring hand available."
         }
+        # Remove one copy per played card: duplicates are the same interned object.
+        held = list(state.hand)
+        for card in best_combo:
+            held.remove(card)
+        dist = score_distribution(plan, hand_type, best_combo, held)
+        if not dist.is_deterministic:
+            recommendation["expected_score"] = round(dist.mean)
+            recommendation["distribution"] = dist.summary()
+        return recommendation
+
+    def _recommend_round_plan(self, state: GameState, plan, cancel: Optional[threading.Event] = None) -> Dict:
+        with stage(self.profiler, 'search'):
+            round_plan = self.round_planner.plan_round(state, plan, cancel)
+        if self.profiler is not None:
+            self.profiler.count('planner_nodes', round_plan.nodes)
+        first = round_plan.first_action
+        steps = [
+            {
+                "action": step.action,
+                "cards": [f"{c.rank} of {c.suit}" for c in step.cards],
+                "score": step.score,
+                "win_probability": round(step.win_probability, 3),
+            }
+            for step in round_plan.steps
+        ]
+        recommendation = dict(steps[0]) if steps else {"action": "play", "cards": []}
+        recommendation.update({
+            "win_probability": round(round_plan.win_probability, 3),
+            "plan": steps,
+            "search": {
+                "nodes": round_plan.nodes,
+                "nodes_per_second": round(round_plan.nodes_per_second),
+                "cache_hit_rate": round(round_plan.cache_hit_rate, 3),
+                "cache_evictions": round_plan.cache_evictions,
+                "complete": round_plan.complete,
+            },
+            "reason": (f"Best line over the remaining {state.hands_left} hands / "
+                       f"{state.discards_left} discards clears with P={round_plan.win_probability:.0%}."),
+        })
+        if first is not None and first.action == 'play':
+            recommendation["expected_score"] = first.score
+        return recommendation
 
     def _recommend_in_shop(self, state: GameState) -> Dict:
-        # Very basic shop logic
-        best_item = None
-        for item in state.shop_items:
-            if item['cost'] <= state.money:
-                # Prioritize Jokers for now
-                if item['type'] == 'Joker':
-                    best_item = item
-                    break
-        
-        if best_item:
+        # Marginal best-play gain of each affordable item against lost interest
+        options = self.shop_evaluator.evaluate(state)
+        ranked = [
+            {
+                "item": option.item.get('name'),
+                "type": option.item.get('type'),
+                "cost": option.cost,
+                "expected_gain": round(option.mean_gain, 1),
+                "gain_ratio": round(option.gain_ratio, 4),
+                "interest_lost": option.interest_lost,
+                "value": round(option.value, 4),
+                "notes": option.notes,
+            }
+            for option in options
+        ]
+        if options and options[0].value > 0:
+            best = options[0]
             return {
                 "action": "buy",
-                "item": best_item['name'],
-                "reason": f"Affordable {best_item['type']} that fits current budget."
+                "item": best.item.get('name'),
+                "expected_gain": round(best.mean_gain, 1),
+                "options": ranked,
+                "reason": (f"{best.item.get('name')} raises the expected best hand by {best.mean_gain:.0f} "
+                           f"({best.gain_ratio:.0%}) for ${best.cost}, losing ${best.interest_lost}/round of interest.")
             }
-            
-        return {"action": "skip", "reason": "Nothing affordable or valuable in shop."}
+
+        if not options:
+            return {"action": "skip", "reason": "Nothing affordable in shop."}
+        return {
+            "action": "skip",
+            "options": ranked,
+            "reason": "No affordable item is worth its cost in lost interest."
+        }
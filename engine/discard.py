@@ -0,0 +1,203 @@
+"""
+Expected value of discarding: for each set of cards to throw away, how good
+is the best play after redrawing from the remaining deck?
+
+Every candidate is evaluated on the same sampled draw orders (common random
+numbers), so differences between candidates are not drowned by draw luck.
+Candidates are raced: samples are added in rounds and a candidate is dropped
+once its confidence interval falls entirely below the leader's.
+"""
+import itertools
+import math
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Tuple, Sequence
+
+from engine.scoring import Card, ScoringEngine, ScoringPlan
+from engine.simulator import HandSimulator, SearchCancelled
+from engine import batch
+
+MAX_DISCARD = 5
+
+
+@dataclass
+class DiscardOption:
+    discard: List[Card]
+    samples: int
+    mean_score: float
+    std_error: float
+    clear_probability: float
+
+
+def _best_totals(plan: ScoringPlan, hands: List[List[Card]]) -> List[int]:
+    """Best play total for each hand, vectorized when numpy is available."""
+    if batch.np is not None:
+        return batch.BatchScorer(plan).best_totals(hands)
+    simulator = HandSimulator(ScoringEngine())
+    return [simulator.find_best_hand(hand, [], plan=plan)[2].get('total', 0) for hand in hands]
+
+
+def _score_chunk(plan: ScoringPlan, kept: List[Tuple[List[Card], int]], draws: List[List[Card]]) -> List[List[int]]:
+    """Worker task: totals for every (kept cards, draw count) candidate on every draw."""
+    hands = [cards + draw[:n_draw] for cards, n_draw in kept for draw in draws]
+    totals = _best_totals(plan, hands)
+    per = len(draws)
+    return [totals[i * per:(i + 1) * per] for i in range(len(kept))]
+
+
+class _Stats:
+    __slots__ = ('n', 'total', 'total_sq', 'cleared')
+
+    def __init__(self):
+        self.n = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.cleared = 0
+
+    def add(self, scores: Sequence[int], needed: int):
+        for s in scores:
+            self.n += 1
+            self.total += s
+            self.total_sq += s * s
+            self.cleared += s >= needed
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.n if self.n else 0.0
+
+    @property
+    def std_error(self) -> float:
+        if self.n < 2:
+            return float('inf')
+        var = max(0.0, (self.total_sq - self.total * self.total / self.n) / (self.n - 1))
+        return math.sqrt(var / self.n)
+
+
+class DiscardAdvisor:
+    """
+    Races every discard of 1-5 cards against each other on shared draws.
+
+    `workers` > 1 spreads each round over a process pool (created lazily and
+    kept until close(), or the end of a `with` block); `time_budget` caps
+    the wall time of evaluate().
+    The race also stops once all survivors' intervals lie within
+    `tolerance` (relative) of each other, i.e. they are interchangeable.
+    """
+
+    CANCEL_SLICE = 32
+
+    def __init__(
+        self,
+        workers: int = 0,
+        round_samples: int = 16,
+        max_samples: int = 256,
+        confidence_z: float = 2.0,
+        tolerance: float = 0.02,
+        time_budget: float = 0.5,
+        seed: Optional[int] = None
+    ):
+        self.workers = workers
+        self.round_samples = round_samples
+        self.max_samples = max_samples
+        self.confidence_z = confidence_z
+        self.tolerance = tolerance
+        self.time_budget = time_budget
+        self.seed = seed
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def __enter__(self) -> 'DiscardAdvisor':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _map(self, plan, kept, draws, cancel: Optional[threading.Event] = None) -> List[List[int]]:
+        if self.workers <= 1 or len(kept) < 2 * self.workers:
+            # In-process: score in slices so a cancel is noticed quickly.
+            out = []
+            for i in range(0, len(kept), self.CANCEL_SLICE):
+                if cancel is not None and cancel.is_set():
+                    raise SearchCancelled()
+                out.extend(_score_chunk(plan, kept[i:i + self.CANCEL_SLICE], draws))
+            return out
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        size = math.ceil(len(kept) / self.workers)
+        futures = [self._pool.submit(_score_chunk, plan, kept[i:i + size], draws)
+                   for i in range(0, len(kept), size)]
+        out = []
+        for f in futures:
+            out.extend(f.result())
+        return out
+
+    def evaluate(
+        self,
+        hand: List[Card],
+        deck: List[Card],
+        plan: ScoringPlan,
+        needed: int,
+        cancel: Optional[threading.Event] = None
+    ) -> List[DiscardOption]:
+        """
+        Estimates, for every discard of 1-5 cards, the best play score after
+        redrawing and the probability it reaches `needed`. Best mean first.
+        Raises SearchCancelled between rounds once `cancel` is set.
+        """
+        if not hand or not deck:
+            return []
+        started = time.perf_counter()
+        rng = random.Random(self.seed)
+        n = len(hand)
+        max_discard = min(MAX_DISCARD, n)
+
+        candidates = []
+        for r in range(1, max_discard + 1):
+            for idx in itertools.combinations(range(n), r):
+                chosen = set(idx)
+                kept = [hand[i] for i in range(n) if i not in chosen]
+                candidates.append(([hand[i] for i in idx], kept, min(r, len(deck))))
+        stats = [_Stats() for _ in candidates]
+        live = list(range(len(candidates)))
+
+        samples = 0
+        while live and samples < self.max_samples:
+            if cancel is not None and cancel.is_set():
+                raise SearchCancelled()
+            # Common random numbers: every live candidate sees the same draws.
+            draws = [rng.sample(deck, min(max_discard, len(deck))) for _ in range(self.round_samples)]
+            kept = [(candidates[c][1], candidates[c][2]) for c in live]
+            for c, scores in zip(live, self._map(plan, kept, draws, cancel)):
+                stats[c].add(scores, needed)
+            samples += len(draws)
+
+            z = self.confidence_z
+            leader_low = max(stats[c].mean - z * stats[c].std_error for c in live)
+            live = [c for c in live if stats[c].mean + z * stats[c].std_error >= leader_low]
+            top_high = max(stats[c].mean + z * stats[c].std_error for c in live)
+            if len(live) == 1 or top_high - leader_low <= self.tolerance * max(1.0, leader_low):
+                break
+            if time.perf_counter() - started > self.time_budget:
+                break
+
+        # Survivors of the race rank ahead of eliminated candidates.
+        survivors = set(live)
+        ranked = sorted((c for c in range(len(candidates)) if stats[c].n),
+                        key=lambda c: (c not in survivors, -stats[c].mean))
+        return [
+            DiscardOption(
+                discard=candidates[c][0],
+                samples=stats[c].n,
+                mean_score=stats[c].mean,
+                std_error=stats[c].std_error,
+                clear_probability=stats[c].cleared / stats[c].n,
+            )
+            for c in ranked
+        ]
@@ -0,0 +1,266 @@
+"""
+Exact score distributions for plays with probabilistic cards.
+
+ScoringPlan.score gives the no-trigger outcome of a play. Lucky cards
+(1 in 5 for +20 Mult) and chance triggers ("played Hearts have a 1 in 2
+chance to give x1.5 Mult") make the total a random variable. This module
+computes its full discrete distribution by dynamic programming over the
+pipeline: the state after each played card is a (chips, mult) pair, each
+card's independent outcomes branch it, and equal states merge, so a play
+of five Lucky cards has six mult states, not 32 paths. Held chance triggers
+branch the same way; joker steps are deterministic.
+
+Glass cards always give x2 Mult; their 1 in 4 break happens after scoring
+and only changes the deck, so it adds no uncertainty to the score.
+
+When the support of a step grows past `max_support`, neighbouring states
+are merged into probability-weighted means (a bounded-support
+approximation that preserves the total probability and the mean mult).
+The 5 played cards of Balatro stay far below the default bound.
+"""
+import bisect
+import itertools
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from engine.scoring import Card, ScoringPlan, ENH_LUCKY, card_terms
+from engine.hand_evaluator import HandEvaluator
+
+LUCKY_CHANCE = 1 / 5
+LUCKY_MULT = 20.0
+MAX_SUPPORT = 4096
+MAX_PLAYED = 5
+
+# (probability, (chips, +mult, xmult)) of one played card
+Outcome = Tuple[float, Tuple[float, float, float]]
+
+
+class ScoreDistribution:
+    """Discrete distribution of a play's total: ascending totals with their probabilities."""
+    __slots__ = ('totals', 'probs', '_tail')
+
+    def __init__(self, outcomes: Dict[int, float]):
+        self.totals = sorted(outcomes)
+        self.probs = [outcomes[t] for t in self.totals]
+        # _tail[i] = P(total >= totals[i])
+        tail = []
+        acc = 0.0
+        for p in reversed(self.probs):
+            acc += p
+            tail.append(acc)
+        self._tail = tail[::-1]
+
+    @classmethod
+    def point(cls, total: int) -> 'ScoreDistribution':
+        return cls({total: 1.0})
+
+    def __len__(self) -> int:
+        return len(self.totals)
+
+    @property
+    def is_deterministic(self) -> bool:
+        return len(self.totals) == 1
+
+    @property
+    def mean(self) -> float:
+        return sum(t * p for t, p in zip(self.totals, self.probs))
+
+    @property
+    def min(self) -> int:
+        return self.totals[0]
+
+    @property
+    def max(self) -> int:
+        return self.totals[-1]
+
+    def clear_probability(self, needed: float) -> float:
+        """P(total >= needed)."""
+        i = bisect.bisect_left(self.totals, needed)
+        return min(1.0, self._tail[i]) if i < len(self.totals) else 0.0
+
+    def percentile(self, q: float) -> int:
+        """Smallest total t with P(total <= t) >= q, for q in [0, 1]."""
+        acc = 0.0
+        for total, p in zip(self.totals, self.probs):
+            acc += p
+            if acc >= q - 1e-12:
+                return total
+        return self.totals[-1]
+
+    def summary(self, needed: Optional[float] = None, quantiles: Sequence[float] = (0.1, 0.5, 0.9)) -> Dict:
+        result = {
+            'mean': round(self.mean, 2),
+            'min': self.min,
+            'max': self.max,
+            'percentiles': {f"p{round(q * 100)}": self.percentile(q) for q in quantiles},
+        }
+        if needed is not None:
+            result['clear_probability'] = round(self.clear_probability(needed), 6)
+        return result
+
+
+def card_outcomes(plan: ScoringPlan, card: Card) -> List[Outcome]:
+    """
+    The played outcomes of `card` under `plan`: the no-trigger term first,
+    then one entry per distinct combination of its chance effects.
+    """
+    chips, add, x, _ = plan.term(card)
+    if card.enh != ENH_LUCKY and not any(t.chance < 1.0 for t in plan.played_triggers):
+        return [(1.0, (chips, add, x))]
+    # Rebuild from the card's own terms so every branch folds triggers in lineup order.
+    chips, add, x, _ = card_terms(card)
+    outcomes = [(1.0, (chips, add, x))]
+    if card.enh == ENH_LUCKY:
+        # Lucky's +20 Mult comes before the edition's xMult, like any +mult in `add`.
+        outcomes = [(1.0 - LUCKY_CHANCE, (chips, add, x)), (LUCKY_CHANCE, (chips, add + LUCKY_MULT, x))]
+    for trigger in plan.played_triggers:
+        if not trigger.cards(card):
+            continue
+        branched = []
+        for p, (c, a, m) in outcomes:
+            fired = (c + trigger.chips, a + trigger.mult / m, m * trigger.x)
+            if trigger.chance >= 1.0:
+                branched.append((p, fired))
+            else:
+                branched.append((p * (1.0 - trigger.chance), (c, a, m)))
+                branched.append((p * trigger.chance, fired))
+        outcomes = branched
+    return _merge_outcomes(outcomes)
+
+
+def _merge_outcomes(outcomes: List[Outcome]) -> List[Outcome]:
+    merged: Dict[Tuple[float, float, float], float] = {}
+    for p, terms in outcomes:
+        merged[terms] = merged.get(terms, 0.0) + p
+    return [(p, terms) for terms, p in merged.items()]
+
+
+def held_chances(plan: ScoringPlan, card: Card) -> List[Tuple[float, float]]:
+    """(probability, xmult) of each held chance trigger that matches `card`."""
+    return [(t.chance, t.x) for t in plan.held_triggers if t.chance < 1.0 and t.cards(card)]
+
+
+def _bound(states: Dict[Tuple[float, float], float], max_support: int) -> Dict[Tuple[float, float], float]:
+    """Merges neighbouring (chips, mult) states into at most `max_support` weighted means."""
+    if len(states) <= max_support:
+        return states
+    ordered = sorted(states.items())
+    size = -(-len(ordered) // max_support)
+    bounded = {}
+    for i in range(0, len(ordered), size):
+        group = ordered[i:i + size]
+        mass = sum(p for _, p in group)
+        chips = sum(c * p for (c, _), p in group) / mass
+        mult = sum(m * p for (_, m), p in group) / mass
+        bounded[(chips, mult)] = bounded.get((chips, mult), 0.0) + mass
+    return bounded
+
+
+def score_distribution(
+    plan: ScoringPlan,
+    hand_type: str,
+    played_cards: List[Card],
+    held_cards: List[Card],
+    max_support: int = MAX_SUPPORT
+) -> ScoreDistribution:
+    """
+    Distribution of ScoringPlan.score(hand_type, played_cards, held_cards)
+    over the play's Lucky cards and chance triggers. Plays without either
+    are a point mass on the deterministic total.
+    """
+    outcomes = [card_outcomes(plan, c) for c in played_cards]
+    chances = [held_chances(plan, c) for c in held_cards] if plan.held_triggers else []
+    return _distribution(plan, hand_type, played_cards, held_cards, outcomes, chances, max_support)
+
+
+def _distribution(plan, hand_type, played_cards, held_cards, outcomes, chances, max_support) -> ScoreDistribution:
+    # score_distribution with the per-card outcomes and held chances already computed.
+    if all(len(o) == 1 for o in outcomes) and not any(chances):
+        return ScoreDistribution.point(int(plan.score(hand_type, played_cards, held_cards)['total']))
+
+    chips, mult = plan.levels.get(hand_type, (0.0, 0.0))
+    states = {(chips, mult): 1.0}
+    # 1. Played cards, one branching step per card
+    for card_outcome in outcomes:
+        stepped: Dict[Tuple[float, float], float] = {}
+        for (c, m), p in states.items():
+            for q, (dc, add, x) in card_outcome:
+                key = (c + dc, (m + add) * x)
+                stepped[key] = stepped.get(key, 0.0) + p * q
+        states = _bound(stepped, max_support)
+
+    # 2. Held in hand: deterministic xmult first, as in score(), then chance triggers
+    held_x = 1.0
+    for card in held_cards:
+        held_x *= plan.term(card)[3]
+    states = {(c, m * held_x): p for (c, m), p in states.items()}
+    for card_chances in chances:
+        for chance, x in card_chances:
+            stepped = {}
+            for (c, m), p in states.items():
+                for key, q in (((c, m), 1.0 - chance), ((c, m * x), chance)):
+                    stepped[key] = stepped.get(key, 0.0) + p * q
+            states = _bound(stepped, max_support)
+
+    # 3. Jokers, deterministic per state; then the final floor
+    steps = plan.steps(hand_type)
+    totals: Dict[int, float] = {}
+    for (c, m), p in states.items():
+        for chips_add, mult_add, x in steps:
+            c += chips_add
+            m = (m + mult_add) * x
+        total = round(max(0.0, c)) * round(max(1.0, m))
+        totals[total] = totals.get(total, 0.0) + p
+    return ScoreDistribution(totals)
+
+
+@dataclass
+class ClearChance:
+    probability: float                 # P(total >= needed) of the play
+    hand_type: str
+    cards: List[Card]
+    distribution: ScoreDistribution
+    plays_examined: int
+
+
+def best_clear_play(
+    plan: ScoringPlan,
+    hand: List[Card],
+    needed: float,
+    max_support: int = MAX_SUPPORT
+) -> Optional[ClearChance]:
+    """
+    The play of `hand` with the highest P(total >= needed), ties broken by
+    the mean, or None when no card of the hand is probabilistic. Meant for
+    hands whose best deterministic total falls short of `needed`: plays
+    without a probabilistic card then cannot clear and are skipped, unless
+    a held chance trigger makes every play random. Each examined play gets
+    its exact distribution; card outcomes are computed once per hand.
+    """
+    outcomes = [card_outcomes(plan, c) for c in hand]
+    chances = [held_chances(plan, c) for c in hand] if plan.held_triggers else [[] for _ in hand]
+    random_played = [len(o) > 1 for o in outcomes]
+    every_play = any(chances)
+    if not every_play and not any(random_played):
+        return None
+    best = None
+    best_key = None
+    examined = 0
+    indexes = range(len(hand))
+    for r in range(1, min(MAX_PLAYED, len(hand)) + 1):
+        for idx in itertools.combinations(indexes, r):
+            if not every_play and not any(random_played[i] for i in idx):
+                continue
+            chosen = set(idx)
+            played = [hand[i] for i in idx]
+            held_idx = [i for i in indexes if i not in chosen]
+            hand_type = HandEvaluator.get_hand_type(played)
+            dist = _distribution(plan, hand_type, played, [hand[i] for i in held_idx],
+                                 [outcomes[i] for i in idx], [chances[i] for i in held_idx], max_support)
+            examined += 1
+            key = (dist.clear_probability(needed), dist.mean)
+            if best_key is None or key > best_key:
+                best_key = key
+                best = (hand_type, played, dist)
+    hand_type, played, dist = best
+    return ClearChance(best_key[0], hand_type, played, dist, examined)
@@ -0,0 +1,235 @@
+"""
+Joker effect compiler.
+
+Turns a lineup of jokers (effect type, value and the CORE_SPEC `condition`
+heuristic) into CompiledEffects once per ScoringEngine.compile, so scoring
+a combination never looks at condition strings or joker types:
+
+- joker phase effects apply once after the held cards, optionally only
+  for some hand types ("if played hand contains a Pair"); the plan folds
+  them into per-hand-type step tables.
+- played triggers apply to each played card they match ("played Hearts
+  give +4 Mult"); the plan folds them into that card's terms.
+- held triggers apply to each matching card held in hand ("each King held
+  in hand gives x1.5 Mult"); only xMult is supported there, like Steel.
+  Held +chips / +mult effects ("each Queen held in hand gives +13 Mult")
+  keep their flat joker phase contribution.
+
+Played and held triggers need a concrete rank or suit: "for each Joker
+card" or "if all cards held in hand are Spades or Clubs" stay joker phase
+effects.
+
+copy_joker (Blueprint) effects are resolved here from the lineup: the
+copy becomes the effect of the joker to its right (the leftmost joker when
+the condition says so), following chains of copies. x_mult_scaling
+(Hologram) becomes xMult of 1 + value * counter.
+
+Chance conditions ("1 in 2 chance") are kept on per-card and held
+triggers as `chance`; deterministic scoring leaves them out (the no-trigger
+outcome) and engine.distribution branches on them. Chance effects in the
+joker phase keep their flat contribution, as before.
+
+Conditions that are not recognized leave the effect unconditional, which
+is how the engine treated every condition before.
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import FrozenSet, List, Optional, Sequence
+
+from engine.scoring import Card, Joker, RANKS, SUIT_INDEX, ENH_STONE
+from engine.hand_evaluator import HAND_TYPES
+
+JOKER_PHASE = 'joker'
+PLAYED_PHASE = 'played'
+HELD_PHASE = 'held'
+
+SCORING_TYPES = ('add_chips', 'add_mult', 'x_mult')
+
+# Hand types that "contain" another: a Full House contains a Pair.
+HAND_CONTAINS = {
+    'High Card': frozenset(HAND_TYPES),
+    'Pair': frozenset({'Pair', 'Two Pair', 'Three of a Kind', 'Full House', 'Four of a Kind',
+                       'Five of a Kind', 'Flush House', 'Flush Five'}),
+    'Two Pair': frozenset({'Two Pair', 'Full House', 'Flush House'}),
+    'Three of a Kind': frozenset({'Three of a Kind', 'Full House', 'Four of a Kind',
+                                  'Five of a Kind', 'Flush House', 'Flush Five'}),
+    'Straight': frozenset({'Straight', 'Straight Flush'}),
+    'Flush': frozenset({'Flush', 'Straight Flush', 'Flush House', 'Flush Five'}),
+    'Full House': frozenset({'Full House', 'Flush House'}),
+    'Four of a Kind': frozenset({'Four of a Kind', 'Five of a Kind', 'Flush Five'}),
+    'Straight Flush': frozenset({'Straight Flush'}),
+    'Five of a Kind': frozenset({'Five of a Kind', 'Flush Five'}),
+    'Flush House': frozenset({'Flush House'}),
+    'Flush Five': frozenset({'Flush Five'}),
+}
+
+_HAND_RE = re.compile(
+    r"\bhand (?P<how>contains|is)(?: a| an)? (?P<type>"
+    + "|".join(sorted((re.escape(t.lower()) for t in HAND_TYPES), key=len, reverse=True))
+    + r")\b"
+)
+# The card phrase of a trigger: "played Hearts", "each King held", "played face cards".
+_CARDS_RE = re.compile(r"\b(?:played|each|every)\b(?P<cards>.*?)(?=\bgives?\b|\bwhen\b|\bheld\b|\bin hand\b|$)")
+_HELD_RE = re.compile(r"\bheld in hand\b")
+_CHANCE_RE = re.compile(r"\b(\d+) in (\d+)\b")
+_ALL_RE = re.compile(r"\ball\b")
+_RANK_WORDS = {
+    'ace': 'A', 'king': 'K', 'queen': 'Q', 'jack': 'J',
+    'two': '2', 'three': '3', 'four': '4', 'five': '5', 'six': '6',
+    'seven': '7', 'eight': '8', 'nine': '9', 'ten': '10',
+}
+_FACE_RANKS = ('J', 'Q', 'K')
+_EVEN_RANKS = ('2', '4', '6', '8', '10')
+_ODD_RANKS = ('A', '3', '5', '7', '9')
+_TOKEN_RE = re.compile(r"[a-z]+|\d+")
+
+
+@dataclass(frozen=True)
+class CardFilter:
+    """Matches cards by suit and rank; Stone cards match neither, Wild cards every suit."""
+    suits: int = 0  # suit bitmask, 0 = any suit
+    ranks: Optional[FrozenSet[int]] = None  # rank indexes, None = any rank
+
+    def __call__(self, card: Card) -> bool:
+        if self.suits and not card.suit_mask & self.suits:
+            return False
+        if self.ranks is not None and (card.enh == ENH_STONE or card.rank_index not in self.ranks):
+            return False
+        return True
+
+
+ANY_CARD = CardFilter()
+
+
+@dataclass(frozen=True)
+class Condition:
+    phase: str
+    hand_types: Optional[FrozenSet[str]] = None
+    cards: CardFilter = ANY_CARD
+    chance: float = 1.0
+
+
+@dataclass(frozen=True)
+class CompiledEffect:
+    """One scoring effect of the lineup, in joker order. `source` is the id of the joker that owns it."""
+    source: str
+    phase: str
+    chips: float = 0.0
+    mult: float = 0.0
+    x: float = 1.0
+    hand_types: Optional[FrozenSet[str]] = None  # joker phase: None = every hand type
+    cards: CardFilter = ANY_CARD  # played / held phases
+    chance: float = 1.0  # probability the trigger fires, per matching card
+
+
+def _card_filter(phrase: str) -> Optional[CardFilter]:
+    """The cards a trigger phrase names, or None when it names no rank or suit."""
+    suits = 0
+    ranks = set()
+    for token in _TOKEN_RE.findall(phrase):
+        word = token[:-1] if token.endswith('s') and token[:-1] in ('heart', 'diamond', 'club', 'spade',
+                                                                    'ace', 'king', 'queen', 'jack') else token
+        suit = word.capitalize() + 's'
+        if suit in SUIT_INDEX:
+            suits |= 1 << SUIT_INDEX[suit]
+        elif word in _RANK_WORDS:
+            ranks.add(_RANK_WORDS[word])
+        elif token in RANKS:
+            ranks.add(token)
+        elif word == 'face':
+            ranks.update(_FACE_RANKS)
+        elif word == 'even':
+            ranks.update(_EVEN_RANKS)
+        elif word == 'odd':
+            ranks.update(_ODD_RANKS)
+    if not suits and not ranks:
+        return None
+    return CardFilter(suits, frozenset(RANKS.index(r) for r in ranks) if ranks else None)
+
+
+@lru_cache(maxsize=1024)
+def parse_condition(text: Optional[str]) -> Condition:
+    """Reads a condition heuristic; anything unrecognized is unconditional."""
+    if not text:
+        return Condition(JOKER_PHASE)
+    text = text.lower()
+    chance = 1.0
+    match = _CHANCE_RE.search(text)
+    if match and 0 < int(match.group(1)) <= int(match.group(2)):
+        chance = int(match.group(1)) / int(match.group(2))
+        text = text[:match.start()] + text[match.end():]
+    match = _CARDS_RE.search(text)
+    cards = _card_filter(match.group('cards')) if match and not _ALL_RE.search(text) else None
+    if cards is not None and _HELD_RE.search(text):
+        return Condition(HELD_PHASE, cards=cards, chance=chance)
+    if cards is not None and 'played hand' not in text:
+        return Condition(PLAYED_PHASE, cards=cards, chance=chance)
+    match = _HAND_RE.search(text)
+    if match:
+        hand_type = next(t for t in HAND_TYPES if t.lower() == match.group('type'))
+        types = HAND_CONTAINS[hand_type] if match.group('how') == 'contains' else frozenset({hand_type})
+        return Condition(JOKER_PHASE, hand_types=types, chance=chance)
+    return Condition(JOKER_PHASE, chance=chance)
+
+
+def _copy_target(lineup: Sequence[Joker], i: int) -> Optional[int]:
+    """Index of the joker a copy at `i` copies, following chains; None if it copies nothing."""
+    seen = {i}
+    while True:
+        joker = lineup[i]
+        if joker.condition and 'leftmost' in joker.condition.lower():
+            i = 0
+        else:
+            i += 1
+        if i >= len(lineup) or i in seen:
+            return None
+        if lineup[i].effect_type != 'copy_joker':
+            return i
+        seen.add(i)
+
+
+def compile_effect(joker: Joker, source: Optional[str] = None) -> Optional[CompiledEffect]:
+    """The scoring effect of one (non-copy) joker, or None if it has none."""
+    return _compile_effect(source or joker.id, joker.effect_type, joker.value, joker.condition, joker.counter)
+
+
+@lru_cache(maxsize=4096)
+def _compile_effect(source: str, effect_type: str, value: float, condition: Optional[str],
+                    counter: int) -> Optional[CompiledEffect]:
+    # Lineups repeat across states, so effects are compiled once per distinct joker.
+    if effect_type == 'x_mult_scaling':
+        return CompiledEffect(source, JOKER_PHASE, x=1.0 + value * counter)
+    if effect_type not in SCORING_TYPES:
+        return None
+    parsed = parse_condition(condition)
+    if parsed.phase == HELD_PHASE and effect_type != 'x_mult':
+        parsed = Condition(JOKER_PHASE)  # held +chips / +mult keep their flat contribution
+    elif parsed.phase == JOKER_PHASE and parsed.chance < 1.0:
+        parsed = Condition(JOKER_PHASE, hand_types=parsed.hand_types)
+    value = float(value)
+    return CompiledEffect(
+        source,
+        parsed.phase,
+        chips=value if effect_type == 'add_chips' else 0.0,
+        mult=value if effect_type == 'add_mult' else 0.0,
+        x=value if effect_type == 'x_mult' else 1.0,
+        hand_types=parsed.hand_types,
+        cards=parsed.cards,
+        chance=parsed.chance,
+    )
+
+
+def compile_lineup(jokers: List[Joker]) -> List[CompiledEffect]:
+    """Compiled effects of the jokers in position order, with copies resolved."""
+    lineup = sorted(jokers, key=lambda j: j.position)
+    effects = []
+    for i, joker in enumerate(lineup):
+        if joker.effect_type == 'copy_joker':
+            target = _copy_target(lineup, i)
+            effect = compile_effect(lineup[target], joker.id) if target is not None else None
+        else:
+            effect = compile_effect(joker)
+        if effect is not None:
+            effects.append(effect)
+    return effects
@@ -1,59 +1,148 @@
+import itertools
 from typing import List, Dict, Tuple
-from collections import Counter
-from engine.scoring import Card
+from engine.scoring import Card, RANK_PRIMES
+
+# Best to worst, in Balatro's precedence order.
+HAND_TYPES = (
+    "Flush Five", "Flush House", "Five of a Kind", "Straight Flush",
+    "Four of a Kind", "Full House", "Flush", "Straight",
+    "Three of a Kind", "Two Pair", "Pair", "High Card",
+)
+
+HAND_TYPE_BIT = {t: 1 << i for i, t in enumerate(HAND_TYPES)}
+
+ALL_SUITS_MASK = 0xF
+
+# Rank bitmasks of the ten straights (rank index 0 is '2', 12 is 'A').
+STRAIGHT_MASKS = frozenset(
+    [0b11111 << low for low in range(9)] + [0b1000000001111]  # A-2-3-4-5
+)
+
+
+def _pattern(counts: List[int]) -> str:
+    counts = sorted(counts, reverse=True)
+    if counts[0] == 5: return "Five of a Kind"
+    if counts[0] == 4: return "Four of a Kind"
+    if counts[:2] == [3, 2]: return "Full House"
+    if counts[0] == 3: return "Three of a Kind"
+    if counts[:2] == [2, 2]: return "Two Pair"
+    if counts[0] == 2: return "Pair"
+    return "High Card"
+
+
+def _build_table() -> Dict[int, Tuple[str, str]]:
+    """
+    Maps the prime product of a 0-5 card rank multiset to its hand type
+    as (not flush, flush). The flush entry is only meaningful for 5 cards.
+    """
+    table = {1: ("High Card", "High Card")}
+    for size in range(1, 6):
+        for ranks in itertools.combinations_with_replacement(range(len(RANK_PRIMES)), size):
+            product = 1
+            mask = 0
+            counts = [0] * len(RANK_PRIMES)
+            for r in ranks:
+                product *= RANK_PRIMES[r]
+                mask |= 1 << r
+                counts[r] += 1
+            plain = _pattern(counts)
+            flush = plain
+            if size == 5:
+                is_straight = mask in STRAIGHT_MASKS
+                if plain == "Five of a Kind":
+                    flush = "Flush Five"
+                elif plain == "Full House":
+                    flush = "Flush House"
+                elif is_straight:
+                    plain, flush = "Straight", "Straight Flush"
+                elif plain != "Four of a Kind":
+                    flush = "Flush"
+            table[product] = (plain, flush)
+    return table
+
+
+HAND_TABLE = _build_table()
+
+_reach_memo: Dict[Tuple[int, int, int], int] = {}
+
+
+def reachable_hand_types(product: int, size: int, slots: int, flushable: bool) -> int:
+    """
+    Bitmask (see HAND_TYPE_BIT) of every hand type a ranked multiset with
+    the given prime product and size can become by adding up to `slots`
+    more ranked cards. Flush types are included only when `flushable`.
+    """
+    key = (product, slots, flushable)
+    mask = _reach_memo.get(key)
+    if mask is None:
+        plain, flush = HAND_TABLE[product]
+        mask = HAND_TYPE_BIT[plain]
+        if flushable and size == 5:
+            # The same cards need not be suited: a flushable multiset can still play its plain type.
+            mask |= HAND_TYPE_BIT[flush]
+        if slots and size < 5:
+            for prime in RANK_PRIMES:
+                mask |= reachable_hand_types(product * prime, size + 1, slots - 1, flushable)
+        _reach_memo[key] = mask
+    return mask
+
+
+def _group_types(ranks: List[int]) -> Tuple[int, int, bool]:
+    """Best two rank multiplicities, presence of a straight and rank count of a card group."""
+    counts = [0] * len(RANK_PRIMES)
+    mask = 0
+    for r in ranks:
+        counts[r] += 1
+        mask |= 1 << r
+    counts.sort(reverse=True)
+    has_straight = any(m & mask == m for m in STRAIGHT_MASKS)
+    return counts[0], counts[1], has_straight
+
+
+def achievable_hand_types(cards: List[Card]) -> int:
+    """
+    Bitmask of hand types that some 1-5 card subset of `cards` could
+    possibly form (a superset: ranks and suits are checked, not slots).
+    """
+    mask = HAND_TYPE_BIT["High Card"]
+    ranked = [c for c in cards if c.prime != 1]
+    first, second, has_straight = _group_types([c.rank_index for c in ranked])
+    if first >= 2: mask |= HAND_TYPE_BIT["Pair"]
+    if second >= 2: mask |= HAND_TYPE_BIT["Two Pair"]
+    if first >= 3: mask |= HAND_TYPE_BIT["Three of a Kind"]
+    if first >= 3 and second >= 2: mask |= HAND_TYPE_BIT["Full House"]
+    if first >= 4: mask |= HAND_TYPE_BIT["Four of a Kind"]
+    if first >= 5: mask |= HAND_TYPE_BIT["Five of a Kind"]
+    if has_straight: mask |= HAND_TYPE_BIT["Straight"]
+    for suit in range(4):
+        group = [c.rank_index for c in ranked if c.suit_mask >> suit & 1]
+        if len(group) < 5:
+            continue
+        first, second, has_straight = _group_types(group)
+        mask |= HAND_TYPE_BIT["Flush"]
+        if has_straight: mask |= HAND_TYPE_BIT["Straight Flush"]
+        if first >= 3 and second >= 2: mask |= HAND_TYPE_BIT["Flush House"]
+        if first >= 5: mask |= HAND_TYPE_BIT["Flush Five"]
+    return mask
+
 
 class HandEvaluator:
     @staticmethod
     def get_hand_type(cards: List[Card]) -> str:
-        if not cards:
-            return "High Card"
-            
-        # Get ranks and suits
-        ranks = []
+        """
+        Classifies 0-5 played cards with a single table lookup on the rank
+        signature (product of per-rank primes) plus a suit mask for flushes.
+        Stone cards carry no rank or suit; Wild cards match every suit.
+        """
+        if len(cards) > 5:
+            raise ValueError(f"A played hand has at most 5 cards, got {len(cards)}")
+        product = 1
+        suits = ALL_SUITS_MASK
         for c in cards:
-            r = c.rank
-            # Convert to numeric for sorting/math
-            if r == 'A': val = 14
-            elif r == 'K': val = 13
-            elif r == 'Q': val = 12
-            elif r == 'J': val = 11
-            else: val = int(r)
-            ranks.append(val)
-        
-        ranks.sort()
-        suits = [c.suit for c in cards]
-        rank_counts = Counter(ranks)
-        counts = sorted(rank_counts.values(), reverse=True)
-        
-        # Check Flush
-        is_flush = len(set(suits)) == 1 and len(cards) >= 5
-        
-        # Check Straight
-        is_straight = False
-        if len(cards) >= 5:
-            # Normal straight
-            if len(set(ranks)) == 5 and (max(ranks) - min(ranks) == 4):
-                is_straight = True
-            # Ace-low straight (A, 2, 3, 4, 5)
-            elif set(ranks) == {14, 2, 3, 4, 5}:
-                is_straight = True
-
-        # Determine Hand Type
-        if is_straight and is_flush: return "Straight Flush"
-        if 4 in counts: return "Four of a Kind"
-        if 3 in counts and 2 in counts: return "Full House"
-        if is_flush: return "Flush"
-        if is_straight: return "Straight"
-        if 3 in counts: return "Three of a Kind"
-        if counts.count(2) >= 2: return "Two Pair"
-        if 2 in counts: return "Pair"
-        
-        return "High Card"
+            product *= c.prime
+            suits &= c.suit_mask
+        return HAND_TABLE[product][len(cards) == 5 and suits != 0]
 
     @staticmethod
     def get_all_hands() -> List[str]:
-        return [
-            "Straight Flush", "Four of a Kind", "Full House", 
-            "Flush", "Straight", "Three of a Kind", 
-            "Two Pair", "Pair", "High Card"
-        ]
+        return list(HAND_TYPES)
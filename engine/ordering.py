@@ -0,0 +1,187 @@
+"""
+Joker order advisor: the lineup order that maximizes the expected best-play
+score over the hands the player is likely to hold.
+
+Jokers whose effects do not depend on position are ordered by an exchange
+argument: swapping two adjacent steps never helps once every xMult below 1
+comes first, additive effects (+chips, +mult) next and xMult of 1 or more
+last, and this holds for every play and hand type at once, so the sorted
+order is optimal without looking at any hand. Per-card triggers follow the
+same rule within their phase.
+
+Copy jokers (copy_joker) make position matter: what they copy depends on
+their neighbour or on who is leftmost. Instead of permuting the whole
+lineup, the search enumerates copy targets: for each assignment of targets
+it builds the exchange order with each copy placed just left of its target
+(or its target moved to the front for "leftmost" copies), and only orders
+whose compiled effects differ are scored. Permutations that only reorder
+commuting effects are never generated.
+
+Orders are scored on a shared sample of hands (the current hand plus draws
+from hand + deck) and a fixed set of candidate plays per hand, so every
+order is compared on the same plays.
+"""
+import itertools
+import random
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+
+from engine.scoring import Card, Joker, HandLevel, ScoringEngine
+from engine.simulator import HandSimulator
+from engine.effects import compile_lineup, compile_effect
+
+MAX_ASSIGNMENTS = 4096
+
+
+@dataclass
+class JokerOrder:
+    jokers: List[Joker]          # recommended lineup, left to right
+    expected_score: float        # mean best-play total over the sampled hands
+    current_score: float         # the same for the current lineup
+    method: str                  # 'exchange' or 'search'
+    orders_scored: int
+    elapsed: float
+
+    @property
+    def gain(self) -> float:
+        return self.expected_score - self.current_score
+
+
+def _exchange_class(joker: Joker) -> int:
+    """Sort key of the exchange order: xMult < 1, additive, xMult >= 1, no scoring effect."""
+    effect = compile_effect(joker)
+    if effect is None:
+        return 3
+    if effect.chips or effect.mult:
+        return 1
+    return 0 if effect.x < 1.0 else 2
+
+
+def _placed(order: List[Joker]) -> List[Joker]:
+    """The jokers of `order` with positions renumbered to match it."""
+    return [replace(j, position=i) for i, j in enumerate(order)]
+
+
+def _is_leftmost_copy(joker: Joker) -> bool:
+    return bool(joker.condition) and 'leftmost' in joker.condition.lower()
+
+
+class JokerOrderAdvisor:
+    """
+    Finds the best joker order for a state. `samples` hands are scored per
+    order (the current hand always among them), `candidates` plays per hand
+    under both the current and the exchange order.
+    """
+
+    def __init__(self, simulator: HandSimulator, samples: int = 32, candidates: int = 3, seed: Optional[int] = 0):
+        self.simulator = simulator
+        self.samples = samples
+        self.candidates = candidates
+        self.seed = seed
+
+    def exchange_order(self, jokers: List[Joker]) -> List[Joker]:
+        """Position-independent jokers in exchange order; ties keep their current order."""
+        return sorted(sorted(jokers, key=lambda j: j.position), key=_exchange_class)
+
+    def recommend(
+        self,
+        hand: List[Card],
+        deck: List[Card],
+        jokers: List[Joker],
+        hand_levels: Optional[Dict[str, HandLevel]] = None
+    ) -> JokerOrder:
+        started = time.perf_counter()
+        current = sorted(jokers, key=lambda j: j.position)
+        exchange = self.exchange_order(current)
+        copies = [j for j in current if j.effect_type == 'copy_joker']
+        engine: ScoringEngine = self.simulator.engine
+
+        plays = self._candidate_plays(hand, deck, [current, exchange], hand_levels)
+        scored: Dict[tuple, float] = {}
+
+        def expected(order: List[Joker]) -> float:
+            lineup = _placed(order)
+            signature = tuple((e.phase, e.chips, e.mult, e.x, e.hand_types, e.cards) for e in compile_lineup(lineup))
+            value = scored.get(signature)
+            if value is None:
+                plan = engine.compile(lineup, hand_levels)
+                value = sum(max(plan.score(t, played, held)['total'] for t, played, held in hand_plays)
+                            for hand_plays in plays) / max(1, len(plays))
+                scored[signature] = value
+            return value
+
+        current_score = expected(current)
+        best_order, best_score = exchange, expected(exchange)
+        method = 'exchange'
+        if copies:
+            method = 'search'
+            for order in self._copy_orders(exchange, copies):
+                score = expected(order)
+                if score > best_score:
+                    best_order, best_score = order, score
+        if best_score <= current_score:
+            best_order, best_score = current, current_score
+        return JokerOrder(
+            jokers=_placed(best_order),
+            expected_score=best_score,
+            current_score=current_score,
+            method=method,
+            orders_scored=len(scored),
+            elapsed=time.perf_counter() - started,
+        )
+
+    def _candidate_plays(self, hand, deck, orders, hand_levels) -> List[List[Tuple[str, List[Card], List[Card]]]]:
+        """Per sampled hand: the top plays under each of `orders`, as (hand type, played, held)."""
+        rng = random.Random(self.seed)
+        pool = list(hand) + list(deck)
+        hands = [list(hand)]
+        if len(pool) > len(hand):
+            hands += [rng.sample(pool, len(hand)) for _ in range(self.samples - 1)]
+        plans = [self.simulator.engine.compile(_placed(order), hand_levels) for order in orders]
+        plays = []
+        for cards in hands:
+            seen = set()
+            hand_plays = []
+            for plan in plans:
+                for hand_type, played, _ in self.simulator.top_plays(cards, [], self.candidates, plan=plan):
+                    key = (hand_type, tuple(c.code for c in played))
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    held = list(cards)
+                    for card in played:
+                        held.remove(card)
+                    hand_plays.append((hand_type, played, held))
+            if hand_plays:
+                plays.append(hand_plays)
+        return plays
+
+    def _copy_orders(self, exchange: List[Joker], copies: List[Joker]):
+        """Exchange orders with each copy joker placed to copy one chosen target."""
+        others = [j for j in exchange if j.effect_type != 'copy_joker']
+        targets = [j for j in others if compile_effect(j) is not None] or others
+        if not targets:
+            return
+        if len(targets) ** len(copies) <= MAX_ASSIGNMENTS:
+            assignments = itertools.product(targets, repeat=len(copies))
+        else:
+            # Too many combinations: every copy targets the same joker.
+            assignments = ((target,) * len(copies) for target in targets)
+        for assignment in assignments:
+            order = list(others)
+            # A "leftmost" copy needs its target in front; it applies the copied
+            # effect at its own slot, so it goes where the target's class would.
+            for copy, target in zip(copies, assignment):
+                if _is_leftmost_copy(copy):
+                    order.remove(target)
+                    order.insert(0, target)
+            for copy, target in zip(copies, assignment):
+                if _is_leftmost_copy(copy):
+                    rank = _exchange_class(target)
+                    slot = next((i for i, j in enumerate(order) if i and _exchange_class(j) > rank), len(order))
+                    order.insert(slot, copy)
+            for copy, target in zip(copies, assignment):
+                if not _is_leftmost_copy(copy):
+                    order.insert(order.index(target), copy)
+            yield order
@@ -0,0 +1,241 @@
+"""
+Round planner: searches sequences of play/discard actions for the rest of a
+blind and maximizes the probability of reaching the remaining score.
+
+The search is an expectimax over the player's actions and sampled draws.
+Hands and decks are treated as multisets (the player can reorder cards), so
+positions reached through different action orders share one entry in a
+bounded transposition table. Draws at a position are sampled from a seed
+derived from the position itself, which keeps the table consistent.
+"""
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Tuple, TYPE_CHECKING
+
+from engine.scoring import Card, ScoringPlan
+from engine.simulator import HandSimulator, SearchCancelled
+from engine.cache import LRUCache, cards_key as _codes, plan_key
+
+if TYPE_CHECKING:
+    from engine.decision_engine import GameState
+
+MAX_DISCARD = 5
+
+
+@dataclass
+class PlanStep:
+    action: str              # 'play' or 'discard'
+    cards: List[Card]
+    score: int               # points scored by a play, 0 for a discard
+    win_probability: float   # estimated P(clear) after taking this step
+
+
+@dataclass
+class RoundPlan:
+    steps: List[PlanStep]
+    win_probability: float
+    nodes: int
+    elapsed: float
+    cache_hits: int
+    cache_misses: int
+    cache_evictions: int
+    complete: bool           # False when the budget cut the search short
+
+    @property
+    def first_action(self) -> Optional[PlanStep]:
+        return self.steps[0] if self.steps else None
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def cache_hit_rate(self) -> float:
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else 0.0
+
+
+def _without(cards: List[Card], removed: List[Card]) -> List[Card]:
+    rest = list(cards)
+    for card in removed:
+        rest.remove(card)
+    return rest
+
+
+class RoundPlanner:
+    """
+    play_width / discard_width: actions expanded per position (best plays
+    by score; discards that keep one of those plays). chance_samples: draws
+    sampled per action. Once max_nodes or time_budget is spent, remaining
+    positions get an optimistic static estimate instead of a search.
+    """
+
+    def __init__(
+        self,
+        simulator: HandSimulator,
+        play_width: int = 3,
+        discard_width: int = 3,
+        chance_samples: int = 4,
+        max_entries: int = 100_000,
+        max_nodes: int = 20_000,
+        time_budget: float = 1.0
+    ):
+        self.simulator = simulator
+        self.play_width = play_width
+        self.discard_width = discard_width
+        self.chance_samples = chance_samples
+        self.table = LRUCache(max_entries)  # transposition table
+        self.max_nodes = max_nodes
+        self.time_budget = time_budget
+
+    def plan_round(
+        self,
+        state: 'GameState',
+        plan: ScoringPlan,
+        cancel: Optional[threading.Event] = None
+    ) -> RoundPlan:
+        """
+        Plans the rest of the blind for `state`; the table persists across
+        calls and is keyed by the jokers and hand levels `plan` was compiled
+        from. Raises SearchCancelled once `cancel` is set.
+        """
+        table = self.table
+        hits, misses, evictions = table.hits, table.misses, table.evictions
+        self._nodes = 0
+        self._plan = plan
+        self._plan_key = plan_key(state.jokers, state.hand_levels)
+        self._cancel = cancel
+        self._deadline = time.perf_counter() + self.time_budget
+        self._cutoffs = 0
+        self._line = {}
+
+        started = time.perf_counter()
+        needed = state.required_score - state.current_score
+        value, step = self._search(list(state.hand), list(state.deck),
+                                   state.hands_left, state.discards_left, needed)
+        elapsed = time.perf_counter() - started
+
+        steps = []
+        hand, deck = list(state.hand), list(state.deck)
+        hands_left, discards_left = state.hands_left, state.discards_left
+        # Principal line: follow the best action, assuming the first sampled draw.
+        while step is not None:
+            action, cards, score, step_value = step
+            steps.append(PlanStep(action, cards, score, step_value))
+            if action == 'play':
+                hands_left -= 1
+                needed -= score
+            else:
+                discards_left -= 1
+            if needed <= 0 or hands_left <= 0:
+                break
+            kept = _without(hand, cards)
+            draws = self._draws(kept, deck, hands_left, discards_left, needed, len(cards))
+            if not draws:
+                break
+            hand = kept + draws[0]
+            deck = _without(deck, draws[0])
+            step = self._line.get(self._key(hand, deck, hands_left, discards_left, needed))
+        self._line = {}
+
+        return RoundPlan(
+            steps=steps,
+            win_probability=value,
+            nodes=self._nodes,
+            elapsed=elapsed,
+            cache_hits=table.hits - hits,
+            cache_misses=table.misses - misses,
+            cache_evictions=table.evictions - evictions,
+            complete=self._cutoffs == 0,
+        )
+
+    def _key(self, hand, deck, hands_left, discards_left, needed) -> Tuple:
+        return (self._plan_key, _codes(hand), _codes(deck), hands_left, discards_left, needed)
+
+    def _draws(self, kept, deck, hands_left, discards_left, needed, count) -> List[List[Card]]:
+        """Sampled draws after an action; seeded by the resulting position."""
+        count = min(count, len(deck))
+        if count == 0:
+            return [[]]
+        if count == len(deck):
+            return [list(deck)]
+        rng = random.Random(repr((_codes(kept), _codes(deck), hands_left, discards_left, needed)))
+        return [rng.sample(deck, count) for _ in range(self.chance_samples)]
+
+    def _search(self, hand, deck, hands_left, discards_left, needed) -> Tuple[float, Optional[Tuple]]:
+        """Returns (P(clear), best action) where an action is (kind, cards, score, value)."""
+        if needed <= 0:
+            return 1.0, None
+        if hands_left <= 0 or not hand:
+            return 0.0, None
+        key = self._key(hand, deck, hands_left, discards_left, needed)
+        entry = self.table.get(key)
+        if entry is not None:
+            self._line[key] = entry[1]
+            return entry
+        self._nodes += 1
+
+        plays = self.simulator.top_plays(hand, [], self.play_width, plan=self._plan)
+        _, best_cards, best_result = plays[0]
+        best_total = best_result['total']
+        if best_total >= needed:
+            result = (1.0, ('play', best_cards, best_total, 1.0))
+            self.table.put(key, result)
+            self._line[key] = result[1]
+            return result
+
+        if self._cancel is not None and self._cancel.is_set():
+            raise SearchCancelled()
+        if self._nodes > self.max_nodes or time.perf_counter() > self._deadline:
+            # Out of budget: optimistic estimate from repeating the best play.
+            self._cutoffs += 1
+            estimate = min(1.0, best_total * hands_left / needed) if hands_left > 1 else 0.0
+            return estimate, ('play', best_cards, best_total, estimate)
+
+        cutoffs = self._cutoffs
+        # Fallback when nothing else helps: play the best hand now.
+        best: Tuple[float, Optional[Tuple]] = (0.0, ('play', best_cards, best_total, 0.0))
+        for kind, cards, score in self._actions(hand, plays, hands_left, discards_left):
+            kept = _without(hand, cards)
+            next_hands = hands_left - (kind == 'play')
+            next_discards = discards_left - (kind == 'discard')
+            next_needed = needed - score
+            draws = self._draws(kept, deck, next_hands, next_discards, next_needed, len(cards))
+            value = 0.0
+            for draw in draws:
+                value += self._search(kept + draw, _without(deck, draw),
+                                      next_hands, next_discards, next_needed)[0]
+            value /= len(draws)
+            if value > best[0]:
+                best = (value, (kind, cards, score, value))
+                if value >= 1.0:
+                    break
+
+        # Only exact results are cached; estimates would outlive their budget.
+        if self._cutoffs == cutoffs:
+            self.table.put(key, best)
+        self._line[key] = best[1]
+        return best
+
+    def _actions(self, hand, plays, hands_left, discards_left):
+        """Candidate actions: the best plays, then discards that keep one of them."""
+        actions = []
+        if hands_left > 1:
+            for _, cards, result in plays:
+                actions.append(('play', cards, result['total']))
+        if discards_left > 0:
+            seen = set()
+            for _, cards, _ in plays:
+                rest = _without(hand, cards)
+                # Throw away the lowest-chip cards outside the play.
+                rest.sort(key=lambda c: c.chips)
+                discard = rest[:MAX_DISCARD]
+                signature = _codes(discard)
+                if discard and signature not in seen:
+                    seen.add(signature)
+                    actions.append(('discard', discard, 0))
+                if len(seen) >= self.discard_width:
+                    break
+        return actions
@@ -0,0 +1,127 @@
+"""
+Opt-in per-stage timing and counters for the engine.
+
+Components hold `profiler = None` unless profiling was asked for, and check
+it before doing any bookkeeping, so the disabled cost is one attribute test
+per stage. Stages nest: a stage's time excludes the stages opened inside
+it, so the stage times of a recommendation add up to its total.
+
+Stages used by the engine: parse, classification, scoring, search, shop.
+"""
+import contextlib
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+STAGES = ("parse", "classification", "scoring", "search", "shop")
+
+_NO_STAGE = contextlib.nullcontext()
+
+
+class _Stage:
+    __slots__ = ('profiler', 'name', 'started', 'children')
+
+    def __init__(self, profiler: 'Profiler', name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.children = 0.0
+        self.profiler._stack.append(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        stack = self.profiler._stack
+        stack.pop()
+        if stack:
+            stack[-1].children += elapsed
+        self.profiler.record(self.name, elapsed - self.children)
+        return False
+
+
+class Profiler:
+    """
+    Accumulates stage times and counters. take() returns what was recorded
+    since the previous take() (one recommendation's `timings` block) and
+    folds it into the running totals reported by snapshot() / prometheus().
+    """
+
+    def __init__(self):
+        self._stack: List[_Stage] = []
+        self._times: Dict[str, float] = defaultdict(float)
+        self._counters: Dict[str, int] = defaultdict(int)
+        self.total_times: Dict[str, float] = defaultdict(float)
+        self.total_calls: Dict[str, int] = defaultdict(int)
+        self.total_counters: Dict[str, int] = defaultdict(int)
+        self.recommendations = 0
+
+    def stage(self, name: str) -> _Stage:
+        return _Stage(self, name)
+
+    def record(self, name: str, seconds: float):
+        self._times[name] += seconds
+        self.total_calls[name] += 1
+
+    def count(self, name: str, n: int = 1):
+        self._counters[name] += n
+
+    def take(self) -> Dict:
+        times, counters = self._fold()
+        self.recommendations += 1
+        return {
+            "stages_ms": {name: round(seconds * 1000, 4) for name, seconds in times.items()},
+            "total_ms": round(sum(times.values()) * 1000, 4),
+            "counters": dict(counters),
+        }
+
+    def abandon(self):
+        """Folds an unfinished (e.g. cancelled) recommendation into the totals."""
+        self._fold()
+
+    def _fold(self):
+        times, self._times = self._times, defaultdict(float)
+        counters, self._counters = self._counters, defaultdict(int)
+        for name, seconds in times.items():
+            self.total_times[name] += seconds
+        for name, n in counters.items():
+            self.total_counters[name] += n
+        return times, counters
+
+    def snapshot(self) -> Dict:
+        return {
+            "recommendations": self.recommendations,
+            "stages": {
+                name: {
+                    "calls": self.total_calls[name],
+                    "total_ms": round(seconds * 1000, 3),
+                    "mean_ms": round(seconds * 1000 / self.total_calls[name], 4),
+                }
+                for name, seconds in self.total_times.items()
+            },
+            "counters": dict(self.total_counters),
+        }
+
+    def prometheus(self, prefix: str = "spectator_engine") -> str:
+        lines = [
+            f"# TYPE {prefix}_recommendations_total counter",
+            f"{prefix}_recommendations_total {self.recommendations}",
+            f"# TYPE {prefix}_stage_seconds_total counter",
+        ]
+        for name, seconds in sorted(self.total_times.items()):
+            lines.append(f'{prefix}_stage_seconds_total{{stage="{name}"}} {seconds:.6f}')
+        lines.append(f"# TYPE {prefix}_stage_calls_total counter")
+        for name, calls in sorted(self.total_calls.items()):
+            lines.append(f'{prefix}_stage_calls_total{{stage="{name}"}} {calls}')
+        lines.append(f"# TYPE {prefix}_events_total counter")
+        for name, n in sorted(self.total_counters.items()):
+            lines.append(f'{prefix}_events_total{{event="{name}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+
+def stage(profiler: Optional[Profiler], name: str):
+    """`with stage(self.profiler, 'search'):` -- a shared no-op when profiling is off."""
+    if profiler is None:
+        return _NO_STAGE
+    return profiler.stage(name)
@@ -0,0 +1,295 @@
+"""
+Headless run simulator: plays whole runs (8 antes of Small, Big and Boss
+blinds) with a DecisionEngine policy so policies can be compared on win
+rate and ante reached instead of single decisions.
+
+Each blind reshuffles the full deck from the run's seeded RNG, deals a
+hand and asks the engine for play / discard decisions until the blind is
+cleared or out of hands. Played hands score a draw from the play's exact
+score distribution (engine.distribution), so Lucky cards and chance
+triggers land as they would in game. After each cleared blind the run
+earns the blind reward, $1 per unused hand and interest, then visits a
+seeded shop of jokers and planets and applies the engine's buys.
+
+Boss blind abilities, tarots, vouchers, packs, seals and card
+modifications are not simulated. Required scores follow the base chip
+requirements per ante, x1 / x1.5 / x2 for Small / Big / Boss.
+
+A run is a pure function of (policy, config, seed): the engine's discard
+race uses a fixed seed and no wall-clock budget, and round planning state
+is reset per run, so a run replays identically in any process.
+"""
+import random
+import time
+from dataclasses import dataclass, field, asdict, replace
+from typing import Dict, List, Optional, Tuple
+
+from engine.scoring import Card, Joker, HandLevel, RANKS, SUITS
+from engine.hand_evaluator import HandEvaluator
+from engine.decision_engine import DecisionEngine, GameState
+from engine.discard import DiscardAdvisor
+from engine.distribution import score_distribution
+from engine.shop import JOKER_SLOTS, PLANETS, PLANET_LEVEL_UP, interest
+
+# Base chips required per ante; blinds scale it below.
+ANTE_BASE = {1: 300, 2: 800, 3: 2000, 4: 5000, 5: 11000, 6: 20000, 7: 35000, 8: 50000}
+# (blind type, required score multiplier, cash reward)
+BLINDS = (('Small Blind', 1.0, 3), ('Big Blind', 1.5, 4), ('Boss Blind', 2.0, 5))
+
+# Jokers the simulated shop offers, in the data/jokers.json item shape.
+SHOP_JOKERS = (
+    {'id': 'j_joker', 'name': 'Joker', 'cost': 2,
+     'effect': {'type': 'add_mult', 'value': 4.0, 'condition': None}},
+    {'id': 'j_greedy_joker', 'name': 'Greedy Joker', 'cost': 5,
+     'effect': {'type': 'add_mult', 'value': 3.0, 'condition': 'played Diamonds give +3 Mult'}},
+    {'id': 'j_lusty_joker', 'name': 'Lusty Joker', 'cost': 5,
+     'effect': {'type': 'add_mult', 'value': 3.0, 'condition': 'played Hearts give +3 Mult'}},
+    {'id': 'j_jolly', 'name': 'Jolly Joker', 'cost': 3,
+     'effect': {'type': 'add_mult', 'value': 8.0, 'condition': 'if played hand contains a Pair'}},
+    {'id': 'j_sly', 'name': 'Sly Joker', 'cost': 3,
+     'effect': {'type': 'add_chips', 'value': 50.0, 'condition': 'if played hand contains a Pair'}},
+    {'id': 'j_crafty', 'name': 'Crafty Joker', 'cost': 4,
+     'effect': {'type': 'add_chips', 'value': 80.0, 'condition': 'if played hand contains a Flush'}},
+    {'id': 'j_scary_face', 'name': 'Scary Face', 'cost': 4,
+     'effect': {'type': 'add_chips', 'value': 30.0, 'condition': 'played face cards give +30 Chips'}},
+    {'id': 'j_even_steven', 'name': 'Even Steven', 'cost': 4,
+     'effect': {'type': 'add_mult', 'value': 4.0, 'condition': 'played even cards give +4 Mult'}},
+    {'id': 'j_banner', 'name': 'Banner', 'cost': 5,
+     'effect': {'type': 'add_chips', 'value': 60.0, 'condition': None}},
+    {'id': 'j_duo', 'name': 'The Duo', 'cost': 8,
+     'effect': {'type': 'x_mult', 'value': 2.0, 'condition': 'if played hand contains a Pair'}},
+    {'id': 'j_baron', 'name': 'Baron', 'cost': 8,
+     'effect': {'type': 'x_mult', 'value': 1.5, 'condition': 'each King held in hand gives x1.5 Mult'}},
+    {'id': 'j_bloodstone', 'name': 'Bloodstone', 'cost': 7,
+     'effect': {'type': 'x_mult', 'value': 1.5, 'condition': 'played Hearts have a 1 in 2 chance to give x1.5 Mult'}},
+    {'id': 'j_cavendish', 'name': 'Cavendish', 'cost': 4,
+     'effect': {'type': 'x_mult', 'value': 3.0, 'condition': None}},
+    {'id': 'j_blueprint', 'name': 'Blueprint', 'cost': 10,
+     'effect': {'type': 'copy_joker', 'value': 1.0, 'condition': 'copies the joker to its right'}},
+)
+PLANET_COST = 3
+
+
+def required_score(ante: int, blind_type: str) -> int:
+    base = ANTE_BASE.get(ante) or ANTE_BASE[max(ANTE_BASE)] * 2 ** (ante - max(ANTE_BASE))
+    scale = next(s for name, s, _ in BLINDS if name == blind_type)
+    return int(base * scale)
+
+
+def standard_deck() -> List[Card]:
+    return [Card(rank, suit) for suit in SUITS for rank in RANKS]
+
+
+@dataclass(frozen=True)
+class Policy:
+    """A DecisionEngine configuration to evaluate; `discards` / `shop` off ignore those decisions."""
+    name: str
+    engine_options: Tuple[Tuple[str, object], ...] = ()
+    discards: bool = True
+    shop: bool = True
+
+
+POLICIES = {
+    'engine': Policy('engine'),
+    'planner': Policy('planner', (('plan_rounds', True),)),
+    'no-shop': Policy('no-shop', shop=False),
+    'greedy': Policy('greedy', discards=False, shop=False),
+}
+
+
+@dataclass(frozen=True)
+class RunConfig:
+    antes: int = 8
+    hand_size: int = 8
+    hands: int = 4
+    discards: int = 3
+    start_money: int = 4
+    shop_items: int = 2
+    max_buys: int = 2
+    discard_samples: int = 64    # draws per discard race (DiscardAdvisor.max_samples)
+
+
+@dataclass
+class RunResult:
+    policy: str
+    seed: int
+    won: bool
+    ante: int                    # ante reached (the last one played)
+    blind: str                   # blind lost, or the last blind cleared
+    blinds_cleared: int
+    hands_played: int = 0
+    discards_used: int = 0
+    score_short: int = 0         # points missing on the lost blind
+    money: int = 0
+    jokers: List[str] = field(default_factory=list)
+    decisions: int = 0
+    elapsed: float = 0.0
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class RunSimulator:
+    """Plays runs under one policy; keep one per process and call play(seed) per run."""
+
+    def __init__(self, policy: Policy, config: RunConfig = RunConfig(), discard_seed: int = 0):
+        self.policy = policy
+        self.config = config
+        self.engine = DecisionEngine(**dict(policy.engine_options))
+        # Deterministic decisions: a fixed-seed race bounded by samples, not wall time.
+        self.engine.discard_advisor = DiscardAdvisor(max_samples=config.discard_samples, seed=discard_seed,
+                                                     time_budget=float('inf'))
+        if self.engine.round_planner is not None:
+            self.engine.round_planner.time_budget = float('inf')
+
+    def play(self, seed: int) -> RunResult:
+        started = time.perf_counter()
+        if self.engine.round_planner is not None:
+            # Node-budgeted search results depend on the transposition table.
+            self.engine.round_planner.table.clear()
+            self.engine.recommendation_cache.clear()
+        rng = random.Random(seed)
+        config = self.config
+        result = RunResult(self.policy.name, seed, won=False, ante=1, blind=BLINDS[0][0], blinds_cleared=0)
+        money = config.start_money
+        jokers: List[Joker] = []
+        levels: Dict[str, HandLevel] = {}
+
+        for ante in range(1, config.antes + 1):
+            for blind_type, _, reward in BLINDS:
+                result.ante, result.blind = ante, blind_type
+                needed = required_score(ante, blind_type)
+                scored, hands_left = self._play_blind(rng, ante, blind_type, needed, money, jokers, levels, result)
+                if scored < needed:
+                    result.score_short = needed - scored
+                    return self._finish(result, money, jokers, started)
+                result.blinds_cleared += 1
+                money += reward + hands_left + interest(money)
+                if self.policy.shop:
+                    money = self._visit_shop(rng, ante, blind_type, money, jokers, levels, result)
+        result.won = True
+        return self._finish(result, money, jokers, started)
+
+    def _finish(self, result: RunResult, money: int, jokers: List[Joker], started: float) -> RunResult:
+        result.money = money
+        result.jokers = [j.name for j in jokers]
+        result.elapsed = time.perf_counter() - started
+        return result
+
+    def _play_blind(self, rng, ante, blind_type, needed, money, jokers, levels, result) -> Tuple[int, int]:
+        config = self.config
+        deck = standard_deck()
+        rng.shuffle(deck)
+        hand, deck = deck[:config.hand_size], deck[config.hand_size:]
+        scored = 0
+        hands_left, discards_left = config.hands, config.discards if self.policy.discards else 0
+        while scored < needed and hands_left > 0 and hand:
+            state = GameState(
+                ante=ante, blind_type=blind_type, money=money,
+                jokers=jokers, hand=list(hand), deck=list(deck), hand_levels=levels,
+                hands_left=hands_left, discards_left=discards_left,
+                required_score=needed, current_score=scored,
+            )
+            recommendation = self.engine.recommend(state)
+            result.decisions += 1
+            cards = _pick(hand, recommendation.get('cards', []))
+            if recommendation.get('action') == 'discard' and discards_left > 0 and cards:
+                discards_left -= 1
+                result.discards_used += 1
+            else:
+                if recommendation.get('action') != 'play' or not cards:
+                    _, cards, _ = self.engine.best_hand(state)
+                held = list(hand)
+                for card in cards:
+                    held.remove(card)
+                plan = self.engine.compile_plan(state)
+                dist = score_distribution(plan, HandEvaluator.get_hand_type(cards), cards, held)
+                scored += _sample(dist, rng)
+                hands_left -= 1
+                result.hands_played += 1
+            for card in cards:
+                hand.remove(card)
+            hand += deck[:len(cards)]
+            deck = deck[len(cards):]
+        return scored, hands_left
+
+    def _visit_shop(self, rng, ante, blind_type, money, jokers, levels, result) -> int:
+        items = self._shop_items(rng, {j.id for j in jokers})
+        for _ in range(self.config.max_buys):
+            state = GameState(ante=ante, blind_type=blind_type, money=money, jokers=list(jokers),
+                              hand_levels=dict(levels), shop_items=items)
+            recommendation = self.engine.recommend(state)
+            result.decisions += 1
+            if recommendation.get('action') != 'buy':
+                break
+            item = next((i for i in items if i.get('name') == recommendation.get('item')), None)
+            if item is None or item['cost'] > money:
+                break
+            money -= item['cost']
+            items = [i for i in items if i is not item]
+            if item['type'] == 'Planet':
+                hand_type = PLANETS[item['name']]
+                current = levels.get(hand_type) or self.engine.scoring_engine.hand_base_stats[hand_type]
+                chips, mult = PLANET_LEVEL_UP[hand_type]
+                levels[hand_type] = HandLevel(current.chips + chips, current.mult + mult)
+                continue
+            if len(jokers) >= JOKER_SLOTS:
+                sold = _sold_name(recommendation, item)
+                victim = next((j for j in jokers if j.name == sold), None)
+                if victim is None:
+                    money += item['cost']
+                    break
+                jokers.remove(victim)
+            effect = item['effect']
+            jokers.append(Joker(item['id'], item['name'], effect['type'], effect['value'], len(jokers),
+                                effect.get('condition')))
+            if not any(j.effect_type == 'copy_joker' for j in jokers):
+                jokers[:] = self.engine.order_advisor.exchange_order(jokers)
+            jokers[:] = [replace(j, position=i) for i, j in enumerate(jokers)]
+        return money
+
+    def _shop_items(self, rng, owned) -> List[Dict]:
+        """Seeded offers; jokers already owned (or already offered) are not offered again."""
+        items = []
+        for _ in range(self.config.shop_items):
+            offered = owned | {i.get('id') for i in items}
+            pool = [j for j in SHOP_JOKERS if j['id'] not in offered]
+            if pool and rng.random() < 0.75:
+                item = dict(rng.choice(pool), type='Joker')
+            else:
+                name = rng.choice(sorted(PLANETS))
+                item = {'type': 'Planet', 'name': name, 'cost': PLANET_COST}
+            items.append(item)
+        return items
+
+
+def _pick(hand: List[Card], names: List[str]) -> List[Card]:
+    """The hand cards a recommendation names ("A of Hearts"), each used once."""
+    left = list(hand)
+    picked = []
+    for name in names:
+        card = next((c for c in left if f"{c.rank} of {c.suit}" == name), None)
+        if card is None:
+            return []
+        left.remove(card)
+        picked.append(card)
+    return picked
+
+
+def _sample(dist, rng) -> int:
+    u = rng.random()
+    acc = 0.0
+    for total, p in zip(dist.totals, dist.probs):
+        acc += p
+        if u < acc:
+            return total
+    return dist.totals[-1]
+
+
+def _sold_name(recommendation: Dict, item: Dict) -> Optional[str]:
+    for option in recommendation.get('options', []):
+        if option.get('item') == item.get('name'):
+            for note in option.get('notes', []):
+                if note.startswith('replaces '):
+                    return note[len('replaces '):]
+    return None
@@ -1,30 +1,144 @@
-from typing import List, Optional, Dict
-from dataclasses import dataclass
+from typing import List, Optional, Dict, Tuple, TYPE_CHECKING
+from dataclasses import dataclass, field
+from engine.profiling import Profiler
+
+if TYPE_CHECKING:
+    from engine.effects import CompiledEffect
+
+# Integer encodings shared by the engine hot paths. Index 0 of the optional
+# modifier tables is "none" so a plain card encodes as all zeros.
+RANKS = ('2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A')
+SUITS = ('Hearts', 'Diamonds', 'Clubs', 'Spades')
+ENHANCEMENTS = (None, 'Bonus', 'Mult', 'Wild', 'Glass', 'Steel', 'Stone', 'Gold', 'Lucky')
+EDITIONS = (None, 'Foil', 'Holographic', 'Polychrome', 'Negative')
+SEALS = (None, 'Red', 'Blue', 'Gold', 'Purple')
+
+RANK_INDEX = {r: i for i, r in enumerate(RANKS)}
+SUIT_INDEX = {s: i for i, s in enumerate(SUITS)}
+ENHANCEMENT_INDEX = {e: i for i, e in enumerate(ENHANCEMENTS)}
+EDITION_INDEX = {e: i for i, e in enumerate(EDITIONS)}
+SEAL_INDEX = {s: i for i, s in enumerate(SEALS)}
+
+RANK_CHIPS = (2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10, 11)
+# One prime per rank: the product over a set of cards identifies its rank multiset.
+RANK_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+(ENH_NONE, ENH_BONUS, ENH_MULT, ENH_WILD, ENH_GLASS,
+ ENH_STEEL, ENH_STONE, ENH_GOLD, ENH_LUCKY) = range(len(ENHANCEMENTS))
+(ED_NONE, ED_FOIL, ED_HOLOGRAPHIC, ED_POLYCHROME, ED_NEGATIVE) = range(len(EDITIONS))
+(SEAL_NONE, SEAL_RED, SEAL_BLUE, SEAL_GOLD, SEAL_PURPLE) = range(len(SEALS))
+
+# Bit layout of Card.code: rank(4) | suit(2) | enhancement(4) | edition(3) | seal(3)
+_SUIT_SHIFT = 4
+_ENH_SHIFT = 6
+_ED_SHIFT = 10
+_SEAL_SHIFT = 13
+
 
-@dataclass
 class Card:
-    rank: str  # '2'-'10', 'J', 'Q', 'K', 'A'
-    suit: str  # 'Hearts', 'Diamonds', 'Clubs', 'Spades'
-    enhancement: Optional[str] = None  # 'Bonus', 'Mult', 'Wild', 'Glass', 'Steel', 'Stone', 'Lucky'
-    edition: Optional[str] = None      # 'Foil', 'Holographic', 'Polychrome', 'Negative'
-    seal: Optional[str] = None         # 'Red', 'Blue', 'Gold', 'Purple'
-    
+    """
+    Immutable, interned playing card.
+
+    Constructing the same (rank, suit, enhancement, edition, seal) twice
+    returns the same object, so identity comparison and hashing are cheap.
+    All string fields are decoded once into integer indexes and the base chip
+    value, so hot loops only do attribute lookups.
+    """
+    __slots__ = (
+        'rank', 'suit', 'enhancement', 'edition', 'seal',
+        'rank_index', 'suit_index', 'enh', 'edi', 'seal_code',
+        'chips', 'code', 'prime', 'suit_mask',
+    )
+
+    _interned: Dict[Tuple, 'Card'] = {}
+
+    def __new__(
+        cls,
+        rank: str,  # '2'-'10', 'J', 'Q', 'K', 'A'
+        suit: str,  # 'Hearts', 'Diamonds', 'Clubs', 'Spades'
+        enhancement: Optional[str] = None,  # 'Bonus', 'Mult', 'Wild', 'Glass', 'Steel', 'Stone', 'Gold', 'Lucky'
+        edition: Optional[str] = None,      # 'Foil', 'Holographic', 'Polychrome', 'Negative'
+        seal: Optional[str] = None,         # 'Red', 'Blue', 'Gold', 'Purple'
+    ) -> 'Card':
+        key = (rank, suit, enhancement, edition, seal)
+        card = cls._interned.get(key)
+        if card is not None:
+            return card
+
+        try:
+            rank_index = RANK_INDEX[rank]
+            suit_index = SUIT_INDEX[suit]
+            enh = ENHANCEMENT_INDEX[enhancement]
+            edi = EDITION_INDEX[edition]
+            seal_code = SEAL_INDEX[seal]
+        except KeyError as exc:
+            raise ValueError(f"Unknown card attribute {exc.args[0]!r} in {key}") from None
+
+        card = object.__new__(cls)
+        init = object.__setattr__
+        init(card, 'rank', rank)
+        init(card, 'suit', suit)
+        init(card, 'enhancement', enhancement)
+        init(card, 'edition', edition)
+        init(card, 'seal', seal)
+        init(card, 'rank_index', rank_index)
+        init(card, 'suit_index', suit_index)
+        init(card, 'enh', enh)
+        init(card, 'edi', edi)
+        init(card, 'seal_code', seal_code)
+        init(card, 'chips', 50 if enh == ENH_STONE else RANK_CHIPS[rank_index])
+        # Classification keys: Stone cards have no rank or suit, Wild matches every suit.
+        init(card, 'prime', 1 if enh == ENH_STONE else RANK_PRIMES[rank_index])
+        if enh == ENH_STONE:
+            init(card, 'suit_mask', 0)
+        elif enh == ENH_WILD:
+            init(card, 'suit_mask', (1 << len(SUITS)) - 1)
+        else:
+            init(card, 'suit_mask', 1 << suit_index)
+        init(card, 'code', rank_index
+             | suit_index << _SUIT_SHIFT
+             | enh << _ENH_SHIFT
+             | edi << _ED_SHIFT
+             | seal_code << _SEAL_SHIFT)
+        cls._interned[key] = card
+        return card
+
+    @classmethod
+    def from_code(cls, code: int) -> 'Card':
+        return cls(
+            RANKS[code & 0xF],
+            SUITS[code >> _SUIT_SHIFT & 0x3],
+            ENHANCEMENTS[code >> _ENH_SHIFT & 0xF],
+            EDITIONS[code >> _ED_SHIFT & 0x7],
+            SEALS[code >> _SEAL_SHIFT & 0x7],
+        )
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Card is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Card is immutable")
+
+    def __reduce__(self):
+        # Re-intern on unpickle (e.g. when crossing a process pool boundary).
+        return (Card, (self.rank, self.suit, self.enhancement, self.edition, self.seal))
+
+    def __repr__(self) -> str:
+        return (f"Card(rank={self.rank!r}, suit={self.suit!r}, enhancement={self.enhancement!r}, "
+                f"edition={self.edition!r}, seal={self.seal!r})")
+
     def get_base_chips(self) -> int:
-        if self.enhancement == 'Stone':
-            return 50
-        rank_map = {
-            '2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, '9': 9, '10': 10,
-            'J': 10, 'Q': 10, 'K': 10, 'A': 11
-        }
-        return rank_map.get(self.rank, 0)
+        return self.chips
 
 @dataclass
 class Joker:
     id: str
     name: str
-    effect_type: str  # 'add_mult', 'x_mult', 'add_chips', 'retrigger'
+    effect_type: str  # 'add_mult', 'x_mult', 'add_chips', 'copy_joker', 'x_mult_scaling', 'retrigger'
     value: float
     position: int
+    condition: Optional[str] = None  # CORE_SPEC condition heuristic, see engine.effects
+    counter: int = 0  # scaling jokers: times the effect has grown (Hologram: cards added to deck)
 
 @dataclass
 class HandLevel:
@@ -45,69 +159,220 @@ class ScoringEngine:
             'Four of a Kind': HandLevel(60, 7),
             'Straight Flush': HandLevel(100, 8),
             'Five of a Kind': HandLevel(120, 12),
+            'Flush House': HandLevel(140, 14),
+            'Flush Five': HandLevel(160, 16),
         }
+        self.profiler: Optional[Profiler] = None
+
+    def compile(
+        self,
+        jokers: List[Joker],
+        hand_levels: Optional[Dict[str, HandLevel]] = None
+    ) -> 'ScoringPlan':
+        """
+        Resolves everything about a state that does not depend on which cards
+        are played: hand levels, joker order and joker dispatch (conditions,
+        copies and scaling via engine.effects). The plan can then score any
+        number of combinations of that state.
+        """
+        if self.profiler is not None:
+            with self.profiler.stage('scoring'):
+                return self._compile(jokers, hand_levels)
+        return self._compile(jokers, hand_levels)
+
+    def _compile(self, jokers: List[Joker], hand_levels: Optional[Dict[str, HandLevel]]) -> 'ScoringPlan':
+        # engine.effects builds on the card and joker types of this module.
+        from engine.effects import compile_lineup, JOKER_PHASE, PLAYED_PHASE, HELD_PHASE
+
+        levels = dict(self.hand_base_stats)
+        if hand_levels:
+            levels.update(hand_levels)
+
+        joker_effects = []
+        played = []
+        held = []
+        conditional = False
+        for effect in compile_lineup(jokers):
+            if effect.phase == JOKER_PHASE:
+                joker_effects.append(effect)
+                conditional = conditional or effect.hand_types is not None
+            elif effect.phase == PLAYED_PHASE:
+                played.append(effect)
+            elif effect.phase == HELD_PHASE:
+                held.append(effect)
+
+        # Hand-type conditions get a step table per hand type; other types
+        # (and plans without conditions) use the unconditional steps.
+        type_steps = {}
+        if conditional:
+            type_steps = {
+                hand_type: _fold_steps([e for e in joker_effects
+                                        if e.hand_types is None or hand_type in e.hand_types])
+                for hand_type in levels
+            }
+            joker_effects = [e for e in joker_effects if e.hand_types is None]
+
+        return ScoringPlan(
+            levels={name: (float(level.chips), float(level.mult)) for name, level in levels.items()},
+            joker_steps=_fold_steps(joker_effects),
+            type_steps=type_steps,
+            played_triggers=tuple(played),
+            held_triggers=tuple(held),
+        )
 
     def calculate_score(
         self, 
         hand_type: str, 
         played_cards: List[Card], 
         held_cards: List[Card], 
-        jokers: List[Joker]
+        jokers: List[Joker],
+        hand_levels: Optional[Dict[str, HandLevel]] = None
     ) -> Dict[str, float]:
         """
         Calculates the score following Balatro's exact pipeline.
+        Scoring many combinations of one state should compile() once instead.
         """
-        base = self.hand_base_stats.get(hand_type, HandLevel(0, 0))
-        chips = float(base.chips)
-        mult = float(base.mult)
-
-        # 1. Played Cards
-        for card in played_cards:
-            # Add base chips
-            chips += card.get_base_chips()
-            
-            # Enhancements
-            if card.enhancement == 'Bonus':
-                chips += 30
-            elif card.enhancement == 'Mult':
-                mult += 4
-            elif card.enhancement == 'Glass':
-                mult *= 2
-            
-            # Editions
-            if card.edition == 'Foil':
-                chips += 50
-            elif card.edition == 'Holographic':
-                mult += 10
-            elif card.edition == 'Polychrome':
-                mult *= 1.5
+        if self.profiler is not None:
+            self.profiler.count('scores')
+            # One 'scoring' stage: _compile, not compile, which would open its own.
+            with self.profiler.stage('scoring'):
+                return self._compile(jokers, hand_levels).score(hand_type, played_cards, held_cards)
+        return self.compile(jokers, hand_levels).score(hand_type, played_cards, held_cards)
+
+
+def _fold_steps(effects: List['CompiledEffect']) -> Tuple[Tuple[float, float, float], ...]:
+    """
+    Joker phase effects left to right as (chips, +mult, xmult) steps:
+    consecutive additive effects fold into one step, consecutive xMult
+    effects into the step's multiplier.
+    """
+    steps = []
+    chips_add = mult_add = 0.0
+    x = 1.0
+    for effect in effects:
+        if effect.chips or effect.mult:
+            if x != 1.0:
+                steps.append((chips_add, mult_add, x))
+                chips_add = mult_add = 0.0
+                x = 1.0
+            chips_add += effect.chips
+            mult_add += effect.mult
+        x *= effect.x
+    if chips_add or mult_add or x != 1.0:
+        steps.append((chips_add, mult_add, x))
+    return tuple(steps)
+
+
+def card_terms(card: Card) -> Tuple[int, float, float, float]:
+    """
+    A card's contribution as (chips, +mult, xmult, held xmult). When played
+    it applies chips += chips; mult = (mult + add) * x, which reproduces the
+    enhancement-then-edition order (Holographic after Glass becomes +5 before
+    the x2). When held it applies mult *= held xmult.
+    """
+    chips = card.chips
+    add = 0.0
+    x = 1.0
+    # Enhancements
+    enh = card.enh
+    if enh == ENH_BONUS:
+        chips += 30
+    elif enh == ENH_MULT:
+        add = 4.0
+    elif enh == ENH_GLASS:
+        x = 2.0
+    # Editions
+    edi = card.edi
+    if edi == ED_FOIL:
+        chips += 50
+    elif edi == ED_HOLOGRAPHIC:
+        add += 10.0 / x
+    elif edi == ED_POLYCHROME:
+        x *= 1.5
+    held_x = 1.5 if enh == ENH_STEEL else 1.0
+    return chips, add, x, held_x
+
+
+@dataclass(frozen=True)
+class ScoringPlan:
+    """
+    Scoring pipeline for one joker lineup and set of hand levels, built by
+    ScoringEngine.compile. Scoring a combination is a short reduction over
+    per-card term tuples (see term) and the folded joker steps of its hand
+    type.
+    """
+    levels: Dict[str, Tuple[float, float]]
+    joker_steps: Tuple[Tuple[float, float, float], ...]
+    # Steps per hand type when some joker has a hand-type condition; empty otherwise.
+    type_steps: Dict[str, Tuple[Tuple[float, float, float], ...]] = field(default_factory=dict)
+    played_triggers: Tuple['CompiledEffect', ...] = ()
+    held_triggers: Tuple['CompiledEffect', ...] = ()
+    _terms: Dict[Card, Tuple[int, float, float, float]] = field(default_factory=dict, compare=False, repr=False)
+
+    def steps(self, hand_type: str) -> Tuple[Tuple[float, float, float], ...]:
+        return self.type_steps.get(hand_type, self.joker_steps)
+
+    def term(self, card: Card) -> Tuple[int, float, float, float]:
+        """
+        card_terms(card) with the lineup's per-card triggers folded in,
+        memoized per card. A trigger after the card's own (add, x) applies
+        mult = (mult + add) * x + m, i.e. add += m / x, then x *= its xmult.
+        Chance triggers are left out; engine.distribution branches on them.
+        """
+        terms = self._terms.get(card)
+        if terms is None:
+            chips, add, x, held_x = card_terms(card)
+            for trigger in self.played_triggers:
+                if trigger.chance >= 1.0 and trigger.cards(card):
+                    chips += trigger.chips
+                    add += trigger.mult / x
+                    x *= trigger.x
+            for trigger in self.held_triggers:
+                if trigger.chance >= 1.0 and trigger.cards(card):
+                    held_x *= trigger.x
+            terms = self._terms[card] = (chips, add, x, held_x)
+        return terms
+
+    def card_terms(self, cards: List[Card]) -> List[Tuple[int, float, float, float]]:
+        return [self.term(c) for c in cards]
+
+    def score_terms(
+        self,
+        hand_type: str,
+        played_terms: List[Tuple[int, float, float, float]],
+        held_x: float
+    ) -> Dict[str, float]:
+        chips, mult = self.levels.get(hand_type, (0.0, 0.0))
+
+        # 1. Played Cards (per-card joker triggers are part of the terms)
+        for c, add, x, _ in played_terms:
+            chips += c
+            mult = (mult + add) * x
 
         # 2. Held in Hand
-        for card in held_cards:
-            if card.enhancement == 'Steel':
-                mult *= 1.5
+        mult *= held_x
 
         # 3. Jokers (Left to Right sequence)
-        sorted_jokers = sorted(jokers, key=lambda x: x.position)
-        
-        for joker in sorted_jokers:
-            if joker.effect_type == 'add_chips':
-                chips += joker.value
-            elif joker.effect_type == 'add_mult':
-                mult += joker.value
-            elif joker.effect_type == 'x_mult':
-                mult *= joker.value
+        for chips_add, mult_add, x in self.type_steps.get(hand_type, self.joker_steps):
+            chips += chips_add
+            mult = (mult + mult_add) * x
 
         # Final floor and calculation
-        chips = max(0.0, chips)
-        mult = max(1.0, mult)
-        
+        chips = round(max(0.0, chips))
+        mult = round(max(1.0, mult))
         return {
-            "chips": round(chips),
-            "mult": round(mult),
-            "total": round(chips) * round(mult)
+            "chips": chips,
+            "mult": mult,
+            "total": chips * mult
         }
 
+    def score(self, hand_type: str, played_cards: List[Card], held_cards: List[Card]) -> Dict[str, float]:
+        held_x = 1.0
+        for card in held_cards:
+            held_x *= self.term(card)[3]
+        return self.score_terms(hand_type, [self.term(c) for c in played_cards], held_x)
+
+
 if __name__ == "__main__":
     # Test case: Flush with a basic Joker and one Steel card in hand
     engine = ScoringEngine()
@@ -0,0 +1,151 @@
+"""
+Incremental best-hand search across consecutive states of one game.
+
+Between spectator polls the hand usually changes by a card or two. The
+session keeps the score of every 1-5 card play of the previous hand and,
+for the next hand, copies the scores of plays made only of unchanged cards
+and rescores just the plays that touch a new card. Results are identical to
+HandSimulator.find_best_hand.
+
+A kept score is only valid while everything else it depends on is: the
+compiled plan (jokers and hand levels), the relative order of the played
+cards (xmult is applied left to right) and the held multiplier (cards with
+a held effect, Steel or a held-in-hand joker trigger, entering or leaving
+the hand change it). Any change there rescores the whole hand.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from engine.scoring import Card, ScoringPlan
+from engine.simulator import HandSimulator
+from engine import batch
+from engine.hand_evaluator import HAND_TYPES
+from engine.profiling import Profiler, stage
+
+
+class IncrementalSession:
+    """
+    Stateful find_best_hand for a stream of hands. Needs numpy; without it
+    every call is a plain find_best_hand.
+    """
+
+    def __init__(self, simulator: HandSimulator):
+        self.simulator = simulator
+        self.profiler: Optional[Profiler] = None
+        self.rows_reused = 0
+        self.rows_scored = 0
+        self.full_rescores = 0
+        self.reset()
+
+    def reset(self):
+        self._plan_key = None
+        self._scorer = None
+        self._hand: List[Card] = []
+        self._row_of_mask = None
+        self._arrays = None  # (hand_types, chips, mult, total) per subset row
+
+    def stats(self) -> Dict[str, float]:
+        rows = self.rows_reused + self.rows_scored
+        return {
+            "rows_reused": self.rows_reused,
+            "rows_scored": self.rows_scored,
+            "full_rescores": self.full_rescores,
+            "reuse_rate": self.rows_reused / rows if rows else 0.0,
+        }
+
+    def best_hand(self, hand: List[Card], plan: ScoringPlan, plan_key) -> Tuple[str, List[Card], dict]:
+        """
+        find_best_hand for `hand` under `plan`; `plan_key` identifies the
+        plan (engine.cache.plan_key) so lineup or level changes are noticed.
+        """
+        if batch.np is None:
+            return self.simulator.find_best_hand(hand, [], plan=plan)
+        if not hand:
+            return "", [], {}
+        np = batch.np
+        if plan_key != self._plan_key:
+            self.reset()
+            self._plan_key = plan_key
+            self._scorer = batch.BatchScorer(plan)
+
+        n = len(hand)
+        _, masks, _ = batch.subset_table(n)
+        old_pos = self._match(hand)
+        if old_pos is None:
+            self.full_rescores += 1
+            with stage(self.profiler, 'scoring'):
+                scores = self._scorer.score([hand])
+            arrays = (scores.hand_types[0], scores.chips[0], scores.mult[0], scores.total[0])
+            reused, rescored = 0, len(masks)
+        else:
+            new_bits = 0
+            old_masks = np.zeros(len(masks), dtype=np.int64)
+            for p, old in enumerate(old_pos):
+                if old < 0:
+                    new_bits |= 1 << p
+                else:
+                    old_masks |= (masks >> p & 1) << old
+            touching = (masks & new_bits) != 0
+            kept = np.flatnonzero(~touching)
+            fresh = np.flatnonzero(touching)
+            arrays = tuple(np.empty(len(masks), dtype=a.dtype) for a in self._arrays)
+            old_rows = self._row_of_mask[old_masks[kept]]
+            for new, old in zip(arrays, self._arrays):
+                new[kept] = old[old_rows]
+            if len(fresh):
+                with stage(self.profiler, 'scoring'):
+                    scores = self._scorer.score([hand], rows=fresh)
+                for new, part in zip(arrays, (scores.hand_types, scores.chips, scores.mult, scores.total)):
+                    new[fresh] = part[0]
+            reused, rescored = len(kept), len(fresh)
+        self.rows_reused += reused
+        self.rows_scored += rescored
+        if self.profiler is not None:
+            self.profiler.count('combos_reused', reused)
+            self.profiler.count('combos_evaluated', rescored)
+
+        row_of_mask = np.full(1 << n, -1, dtype=np.int64)
+        row_of_mask[masks] = np.arange(len(masks))
+        self._hand = list(hand)
+        self._row_of_mask = row_of_mask
+        self._arrays = arrays
+
+        hand_types, chips, mult, total = arrays
+        row = int(total.argmax())  # ties go to the earliest row, as in the exhaustive search
+        mask = int(masks[row])
+        combo = [hand[i] for i in range(n) if mask >> i & 1]
+        return HAND_TYPES[hand_types[row]], combo, {
+            "chips": int(chips[row]),
+            "mult": int(mult[row]),
+            "total": int(total[row]),
+        }
+
+    def _match(self, hand: List[Card]) -> Optional[List[int]]:
+        """
+        Position of each card of `hand` in the previous hand (-1 if new), or
+        None when the previous scores cannot be reused.
+        """
+        if self._arrays is None:
+            return None
+        term = self._scorer.plan.term
+        free: Dict[Card, List[int]] = {}
+        for i, card in enumerate(self._hand):
+            free.setdefault(card, []).append(i)
+        old_pos = []
+        last = -1
+        for card in hand:
+            slots = free.get(card)
+            if slots:
+                old = slots.pop(0)
+                if old < last:
+                    return None  # kept cards were reordered
+                last = old
+                old_pos.append(old)
+            elif term(card)[3] != 1.0:
+                return None  # a new held effect changes every play's held multiplier
+            else:
+                old_pos.append(-1)
+        for slots in free.values():
+            for i in slots:
+                if term(self._hand[i])[3] != 1.0:
+                    return None
+        return old_pos
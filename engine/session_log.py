@@ -0,0 +1,477 @@
+"""
+Append-only session log of spectator GameStates and recommendations.
+
+Log file (little endian):
+
+    magic b"BALLOG1\\0"
+    records   u32 payload length | payload, back to back
+
+Every payload starts with a RECORD header (kind, blind, ante, session,
+seq). A state payload follows it with the STATE fields, the hand and deck
+as u16 Card.code arrays, the jokers (JOKER fields plus length-prefixed id,
+name and condition), the hand levels, the consumables and the shop items
+(compact JSON, they are free-form dicts). A recommendation payload is the
+recommendation as compact JSON.
+
+Sidecar index (<log>.idx): magic b"BALIDX1\\0" then one fixed-size INDEX
+entry per record (offset, length and the RECORD header fields). The index
+is derived data; a writer reopening a log whose index is missing or behind
+(a crash between the two writes) rebuilds it, and drops a torn trailing
+record.
+
+SessionLogReader maps both files and reads nothing up front: record i is
+one index unpack plus one slice of the log, decoded only when `.value` is
+accessed. select() narrows by session, ante and blind from the index
+alone. A reader sees the records present when it was opened.
+"""
+import heapq
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from engine.scoring import Card, Joker, HandLevel
+from engine.hand_evaluator import HAND_TYPES
+from engine.decision_engine import GameState
+
+LOG_MAGIC = b"BALLOG1\0"
+INDEX_MAGIC = b"BALIDX1\0"
+LENGTH = struct.Struct("<I")
+# kind, blind, ante, session, seq
+RECORD = struct.Struct("<BBHII")
+# money, hands left, discards left, required score, current score,
+# then the counts of hand cards, deck cards, jokers, hand levels, consumables
+STATE = struct.Struct("<iBBQQBBBBB")
+# effect type, value, position, counter
+JOKER = struct.Struct("<BdhI")
+# hand type, chips, mult
+LEVEL = struct.Struct("<Bdd")
+# record offset, payload length, kind, blind, ante, session, seq
+INDEX = struct.Struct("<QIBBHII")
+
+STATE_RECORD = 0
+RECOMMENDATION_RECORD = 1
+KINDS = ('state', 'recommendation')
+BLIND_TYPES = ('Small Blind', 'Big Blind', 'Boss Blind')
+EFFECT_TYPES = ('add_mult', 'x_mult', 'add_chips', 'copy_joker', 'x_mult_scaling', 'retrigger')
+OTHER = 0xFF       # enum value of a string outside its table; the string follows inline
+NO_STRING = 0xFFFF
+# Largest values of the unsigned fields above.
+U8, U16, U32, U64 = 0xFF, 0xFFFF, 0xFFFFFFFF, 0xFFFFFFFFFFFFFFFF
+
+_STR = struct.Struct("<H")
+_JSON = struct.Struct("<I")
+_BLIND_INDEX = {name: i for i, name in enumerate(BLIND_TYPES)}
+_EFFECT_INDEX = {name: i for i, name in enumerate(EFFECT_TYPES)}
+_HAND_INDEX = {name: i for i, name in enumerate(HAND_TYPES)}
+
+
+def _check(name: str, value: int, limit: int):
+    if not isinstance(value, int) or not 0 <= value <= limit:
+        raise ValueError(f"{name}={value!r} does not fit the session log (0..{limit})")
+
+
+def _put_str(parts: List[bytes], text: Optional[str]):
+    if text is None:
+        parts.append(_STR.pack(NO_STRING))
+        return
+    data = text.encode('utf-8')
+    _check('string length', len(data), NO_STRING - 1)
+    parts.append(_STR.pack(len(data)))
+    parts.append(data)
+
+
+def _put_json(parts: List[bytes], value):
+    data = json.dumps(value, separators=(',', ':')).encode('utf-8') if value else b""
+    parts.append(_JSON.pack(len(data)))
+    parts.append(data)
+
+
+class _Cursor:
+    """Sequential reads from a payload buffer."""
+    __slots__ = ('buf', 'pos')
+
+    def __init__(self, buf, pos: int = 0):
+        self.buf = buf
+        self.pos = pos
+
+    def unpack(self, fmt: struct.Struct) -> tuple:
+        values = fmt.unpack_from(self.buf, self.pos)
+        self.pos += fmt.size
+        return values
+
+    def str(self) -> Optional[str]:
+        length, = self.unpack(_STR)
+        if length == NO_STRING:
+            return None
+        text = self.buf[self.pos:self.pos + length].decode('utf-8')
+        self.pos += length
+        return text
+
+    def json(self, default):
+        length, = self.unpack(_JSON)
+        if not length:
+            return default
+        value = json.loads(self.buf[self.pos:self.pos + length])
+        self.pos += length
+        return value
+
+    def codes(self, count: int) -> List[Card]:
+        codes = struct.unpack_from(f"<{count}H", self.buf, self.pos)
+        self.pos += 2 * count
+        return [_card(code) for code in codes]
+
+
+_CARDS: Dict[int, Card] = {}
+
+
+def _card(code: int) -> Card:
+    card = _CARDS.get(code)
+    if card is None:
+        card = _CARDS[code] = Card.from_code(code)
+    return card
+
+
+def _blind(blind_type: str) -> Tuple[int, Optional[str]]:
+    index = _BLIND_INDEX.get(blind_type)
+    return (OTHER, blind_type) if index is None else (index, None)
+
+
+def _check_header(ante: int, session: int, seq: int):
+    _check('ante', ante, U16)
+    _check('session', session, U32)
+    _check('seq', seq, U32)
+
+
+def encode_state(state: GameState, session: int = 0, seq: int = 0) -> bytes:
+    """Raises ValueError for a state whose fields do not fit the record formats."""
+    _check_header(state.ante, session, seq)
+    _check('hands_left', state.hands_left, U8)
+    _check('discards_left', state.discards_left, U8)
+    _check('required_score', state.required_score, U64)
+    _check('current_score', state.current_score, U64)
+    for name in ('hand', 'deck', 'jokers', 'hand_levels', 'consumables'):
+        _check(f"len({name})", len(getattr(state, name)), U8)
+    try:
+        return _encode_state(state, session, seq)
+    except struct.error as exc:
+        # money, joker fields: the remaining signed / float formats
+        raise ValueError(f"state does not fit the session log: {exc}") from None
+
+
+def _encode_state(state: GameState, session: int, seq: int) -> bytes:
+    blind, blind_name = _blind(state.blind_type)
+    parts = [
+        RECORD.pack(STATE_RECORD, blind, state.ante, session, seq),
+        STATE.pack(state.money, state.hands_left, state.discards_left, state.required_score,
+                   state.current_score, len(state.hand), len(state.deck), len(state.jokers),
+                   len(state.hand_levels), len(state.consumables)),
+    ]
+    if blind_name is not None:
+        _put_str(parts, blind_name)
+    parts.append(struct.pack(f"<{len(state.hand)}H", *(c.code for c in state.hand)))
+    parts.append(struct.pack(f"<{len(state.deck)}H", *(c.code for c in state.deck)))
+    for joker in state.jokers:
+        effect = _EFFECT_INDEX.get(joker.effect_type, OTHER)
+        parts.append(JOKER.pack(effect, joker.value, joker.position, joker.counter))
+        _put_str(parts, joker.id)
+        _put_str(parts, joker.name)
+        _put_str(parts, joker.condition)
+        if effect == OTHER:
+            _put_str(parts, joker.effect_type)
+    for hand_type, level in state.hand_levels.items():
+        index = _HAND_INDEX.get(hand_type, OTHER)
+        parts.append(LEVEL.pack(index, level.chips, level.mult))
+        if index == OTHER:
+            _put_str(parts, hand_type)
+    for consumable in state.consumables:
+        _put_str(parts, consumable)
+    _put_json(parts, state.shop_items)
+    return b"".join(parts)
+
+
+def decode_state(payload) -> GameState:
+    cursor = _Cursor(payload, RECORD.size)
+    _, blind, ante, _, _ = RECORD.unpack_from(payload)
+    (money, hands_left, discards_left, required, current,
+     n_hand, n_deck, n_jokers, n_levels, n_consumables) = cursor.unpack(STATE)
+    blind_type = cursor.str() if blind == OTHER else BLIND_TYPES[blind]
+    hand = cursor.codes(n_hand)
+    deck = cursor.codes(n_deck)
+    jokers = []
+    for _ in range(n_jokers):
+        effect, value, position, counter = cursor.unpack(JOKER)
+        id, name, condition = cursor.str(), cursor.str(), cursor.str()
+        effect_type = cursor.str() if effect == OTHER else EFFECT_TYPES[effect]
+        jokers.append(Joker(id, name, effect_type, value, position, condition, counter))
+    hand_levels = {}
+    for _ in range(n_levels):
+        index, chips, mult = cursor.unpack(LEVEL)
+        hand_type = cursor.str() if index == OTHER else HAND_TYPES[index]
+        hand_levels[hand_type] = HandLevel(_number(chips), _number(mult))
+    consumables = [cursor.str() for _ in range(n_consumables)]
+    return GameState(
+        ante=ante, blind_type=blind_type, money=money,
+        jokers=jokers, consumables=consumables, hand=hand, deck=deck, hand_levels=hand_levels,
+        hands_left=hands_left, discards_left=discards_left,
+        required_score=required, current_score=current,
+        shop_items=cursor.json([]),
+    )
+
+
+def _number(value: float) -> Union[int, float]:
+    return int(value) if value.is_integer() else value
+
+
+def encode_recommendation(recommendation: Dict, session: int = 0, seq: int = 0, ante: int = 1,
+                          blind_type: str = BLIND_TYPES[0]) -> bytes:
+    # The blind's name is not kept for blinds outside BLIND_TYPES; the state record has it.
+    _check_header(ante, session, seq)
+    blind, _ = _blind(blind_type)
+    return (RECORD.pack(RECOMMENDATION_RECORD, blind, ante, session, seq)
+            + json.dumps(recommendation, separators=(',', ':')).encode('utf-8'))
+
+
+class LogRecord:
+    """One log record: header fields from the index, `value` decoded on first use."""
+    __slots__ = ('number', 'kind', 'blind_type', 'ante', 'session', 'seq', '_payload', '_value')
+
+    def __init__(self, number: int, kind: int, blind: int, ante: int, session: int, seq: int, payload):
+        self.number = number
+        self.kind = KINDS[kind]
+        self.blind_type = BLIND_TYPES[blind] if blind != OTHER else None
+        self.ante = ante
+        self.session = session
+        self.seq = seq
+        self._payload = payload
+        self._value = None
+
+    @property
+    def value(self) -> Union[GameState, Dict]:
+        """The GameState or recommendation dict."""
+        if self._value is None:
+            if self.kind == 'state':
+                self._value = decode_state(self._payload)
+            else:
+                self._value = json.loads(self._payload[RECORD.size:])
+        return self._value
+
+    def __repr__(self) -> str:
+        return (f"LogRecord(#{self.number} {self.kind} session={self.session} seq={self.seq} "
+                f"ante={self.ante} blind={self.blind_type!r})")
+
+
+def _scan(log_path: Path) -> Tuple[List[bytes], int]:
+    """Index entries for every complete record of a log, and the end of the last one."""
+    entries = []
+    with open(log_path, 'rb') as f:
+        data = f.read()
+    if data[:len(LOG_MAGIC)] != LOG_MAGIC:
+        raise ValueError(f"{log_path} is not a session log")
+    pos = len(LOG_MAGIC)
+    while pos + LENGTH.size + RECORD.size <= len(data):
+        length, = LENGTH.unpack_from(data, pos)
+        if pos + LENGTH.size + length > len(data):
+            break
+        kind, blind, ante, session, seq = RECORD.unpack_from(data, pos + LENGTH.size)
+        entries.append(INDEX.pack(pos, length, kind, blind, ante, session, seq))
+        pos += LENGTH.size + length
+    return entries, pos
+
+
+def index_path(log_path: Union[str, Path]) -> Path:
+    log_path = Path(log_path)
+    return log_path.with_name(log_path.name + '.idx')
+
+
+def rebuild_index(log_path: Union[str, Path]) -> int:
+    """Rewrites the sidecar index from the log; returns the number of records."""
+    entries, _ = _scan(Path(log_path))
+    path = index_path(log_path)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(INDEX_MAGIC)
+        f.write(b"".join(entries))
+    os.replace(tmp, path)
+    return len(entries)
+
+
+class SessionLogWriter:
+    """
+    Appends records to a log and its index. Writes are buffered; flush()
+    or close() makes them visible to new readers. Record numbers count
+    from 0 over the whole log, including records of earlier writers.
+    """
+
+    def __init__(self, path: Union[str, Path], buffer_size: int = 1 << 16):
+        self.path = Path(path)
+        self._reconcile()
+        self._log = open(self.path, 'ab', buffering=buffer_size)
+        self._index = open(index_path(self.path), 'ab', buffering=buffer_size)
+        self._offset = self._log.tell()
+        self.records = (os.path.getsize(index_path(self.path)) - len(INDEX_MAGIC)) // INDEX.size
+
+    def _reconcile(self):
+        idx = index_path(self.path)
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            self.path.write_bytes(LOG_MAGIC)
+            idx.write_bytes(INDEX_MAGIC)
+            return
+        if not self._index_matches(idx):
+            _, end = _scan(self.path)
+            if end < self.path.stat().st_size:
+                with open(self.path, 'r+b') as f:
+                    f.truncate(end)  # drop a torn trailing record
+            rebuild_index(self.path)
+
+    def _index_matches(self, idx: Path) -> bool:
+        """True when the index ends exactly at the end of the log's last record."""
+        if not idx.exists():
+            return False
+        entries, partial = divmod(idx.stat().st_size - len(INDEX_MAGIC), INDEX.size)
+        if entries < 0 or partial:
+            return False
+        if not entries:
+            return self.path.stat().st_size == len(LOG_MAGIC)
+        with open(idx, 'rb') as f:
+            f.seek(-INDEX.size, os.SEEK_END)
+            offset, length, *_ = INDEX.unpack(f.read(INDEX.size))
+        return offset + LENGTH.size + length == self.path.stat().st_size
+
+    def _append(self, payload: bytes) -> int:
+        kind, blind, ante, session, seq = RECORD.unpack_from(payload)
+        self._log.write(LENGTH.pack(len(payload)))
+        self._log.write(payload)
+        self._index.write(INDEX.pack(self._offset, len(payload), kind, blind, ante, session, seq))
+        self._offset += LENGTH.size + len(payload)
+        self.records += 1
+        return self.records - 1
+
+    def append_state(self, state: GameState, session: int = 0, seq: int = 0) -> int:
+        return self._append(encode_state(state, session, seq))
+
+    def append_recommendation(self, recommendation: Dict, session: int = 0, seq: int = 0,
+                              ante: int = 1, blind_type: str = BLIND_TYPES[0]) -> int:
+        return self._append(encode_recommendation(recommendation, session, seq, ante, blind_type))
+
+    def append(self, state: GameState, recommendation: Optional[Dict], session: int = 0, seq: int = 0) -> int:
+        """
+        A state and (if given) its recommendation; returns the state's record
+        number. Both are encoded before either is written, so a ValueError
+        leaves the log unchanged.
+        """
+        payloads = [encode_state(state, session, seq)]
+        if recommendation is not None:
+            payloads.append(encode_recommendation(recommendation, session, seq, state.ante, state.blind_type))
+        number = self._append(payloads[0])
+        for payload in payloads[1:]:
+            self._append(payload)
+        return number
+
+    def flush(self):
+        # Log first: an index entry must never point past the end of the log.
+        self._log.flush()
+        self._index.flush()
+
+    def close(self):
+        self.flush()
+        self._log.close()
+        self._index.close()
+
+    def __enter__(self) -> 'SessionLogWriter':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SessionLogReader:
+    """Memory-mapped, read-only view of a log and its index."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._log = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(index_path(self.path), 'rb') as f:
+            self._idx = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._log[:len(LOG_MAGIC)] != LOG_MAGIC or self._idx[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a session log with an index")
+        count = (len(self._idx) - len(INDEX_MAGIC)) // INDEX.size
+        # An index flushed ahead of the log only exposes complete records.
+        while count:
+            offset, length, *_ = self._entry(count - 1)
+            if offset + LENGTH.size + length <= len(self._log):
+                break
+            count -= 1
+        self._count = count
+        self._groups: Optional[Dict[Tuple[int, int, int], List[int]]] = None
+
+    def close(self):
+        self._log.close()
+        self._idx.close()
+
+    def __enter__(self) -> 'SessionLogReader':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _entry(self, number: int) -> tuple:
+        return INDEX.unpack_from(self._idx, len(INDEX_MAGIC) + number * INDEX.size)
+
+    def __getitem__(self, number: int) -> LogRecord:
+        if number < 0:
+            number += self._count
+        if not 0 <= number < self._count:
+            raise IndexError(number)
+        offset, length, kind, blind, ante, session, seq = self._entry(number)
+        start = offset + LENGTH.size
+        # A bytes copy of one record: records never pin the map open.
+        return LogRecord(number, kind, blind, ante, session, seq, self._log[start:start + length])
+
+    def records(self, start: int = 0, stop: Optional[int] = None) -> Iterator[LogRecord]:
+        """Records start..stop-1 in log order; seeking to `start` is one index lookup."""
+        stop = self._count if stop is None else min(stop, self._count)
+        for number in range(max(0, start), stop):
+            yield self[number]
+
+    def __iter__(self) -> Iterator[LogRecord]:
+        return self.records()
+
+    def _grouped(self) -> Dict[Tuple[int, int, int], List[int]]:
+        # (session, ante, blind) -> record numbers, from the index alone; built on first select().
+        if self._groups is None:
+            groups: Dict[Tuple[int, int, int], List[int]] = {}
+            with memoryview(self._idx) as view:
+                entries = view[len(INDEX_MAGIC):len(INDEX_MAGIC) + self._count * INDEX.size]
+                for number, (_, _, _, blind, ante, session, _) in enumerate(INDEX.iter_unpack(entries)):
+                    groups.setdefault((session, ante, blind), []).append(number)
+                entries.release()
+            self._groups = groups
+        return self._groups
+
+    def sessions(self) -> List[int]:
+        return sorted({session for session, _, _ in self._grouped()})
+
+    def select(
+        self,
+        session: Optional[int] = None,
+        ante: Optional[int] = None,
+        blind_type: Optional[str] = None,
+        kind: Optional[str] = None
+    ) -> Iterator[LogRecord]:
+        """Records matching every given field, in log order."""
+        blind = None if blind_type is None else _blind(blind_type)[0]
+        lists = [numbers for (s, a, b), numbers in self._grouped().items()
+                 if (session is None or s == session) and (ante is None or a == ante)
+                 and (blind is None or b == blind)]
+        for number in heapq.merge(*lists):
+            record = self[number]
+            if kind is None or record.kind == kind:
+                yield record
@@ -0,0 +1,197 @@
+"""
+Shop evaluator: how much would each affordable item raise the best-play
+score, and is that worth the interest the money would have earned?
+
+All items of a shop (and of any reroll scenario evaluated against the same
+state) are scored on one shared sample of hands drawn from the player's
+cards, so differences between items are not drowned by draw luck. Each
+candidate lineup or hand level set is compiled once through the engine's
+plan cache and scored over the whole sample in one batch.
+
+Item shapes (dicts in GameState.shop_items):
+    {"type": "Joker", "name": ..., "cost": 6, "effect": {"type", "value", "condition"}}
+    {"type": "Planet", "name": "Mercury", "cost": 3}            # or "hand_type": "Pair"
+Other item types (Tarot, Spectral, vouchers, packs) have no score model
+and are ranked as neutral.
+"""
+import random
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from engine.scoring import Card, Joker, HandLevel, RANKS, SUITS
+from engine.ordering import JokerOrderAdvisor
+from engine.cache import LRUCache, cards_key, plan_key
+from engine import batch
+
+if TYPE_CHECKING:
+    from engine.decision_engine import DecisionEngine, GameState
+
+JOKER_SLOTS = 5
+INTEREST_PER = 5      # $1 of interest per $5 held...
+INTEREST_CAP = 5      # ...up to $5 per round
+
+# Chips and mult a Planet card adds to its hand's level.
+PLANET_LEVEL_UP = {
+    'High Card': (10, 1), 'Pair': (15, 1), 'Two Pair': (20, 1), 'Three of a Kind': (20, 2),
+    'Straight': (30, 3), 'Flush': (15, 2), 'Full House': (25, 2), 'Four of a Kind': (30, 3),
+    'Straight Flush': (40, 4), 'Five of a Kind': (35, 3), 'Flush House': (40, 4), 'Flush Five': (50, 3),
+}
+PLANETS = {
+    'Pluto': 'High Card', 'Mercury': 'Pair', 'Uranus': 'Two Pair', 'Venus': 'Three of a Kind',
+    'Saturn': 'Straight', 'Jupiter': 'Flush', 'Earth': 'Full House', 'Mars': 'Four of a Kind',
+    'Neptune': 'Straight Flush', 'Planet X': 'Five of a Kind', 'Ceres': 'Flush House', 'Eris': 'Flush Five',
+}
+
+
+def interest(money: int) -> int:
+    return min(INTEREST_CAP, max(0, money) // INTEREST_PER)
+
+
+@dataclass
+class ShopOption:
+    item: Dict
+    cost: int
+    mean_gain: float       # mean increase of the best-play score over the sampled hands
+    gain_ratio: float      # mean_gain relative to the current mean best-play score
+    interest_lost: int     # $ per round of interest given up by paying `cost`
+    value: float           # gain_ratio - interest_weight * interest_lost
+    notes: List[str] = field(default_factory=list)
+
+
+class ShopEvaluator:
+    """
+    Ranks shop items by marginal score gain net of lost interest. `samples`
+    hands are drawn per state and reused across every item and reroll
+    scenario evaluated for it; `interest_weight` is the gain ratio one
+    dollar of interest per round is worth, and scaling jokers are valued
+    `scaling_horizon` growth steps ahead.
+    """
+
+    def __init__(
+        self,
+        engine: 'DecisionEngine',
+        samples: int = 64,
+        interest_weight: float = 0.05,
+        scaling_horizon: int = 4,
+        seed: Optional[int] = 0
+    ):
+        self.engine = engine
+        self.samples = samples
+        self.interest_weight = interest_weight
+        self.scaling_horizon = scaling_horizon
+        self.seed = seed
+        self.order = JokerOrderAdvisor(engine.simulator)
+        # (cards, hand size, plan key) -> (sampled hands, baseline totals)
+        self._samples = LRUCache(16)
+        # (sample key, plan key) -> totals of a candidate lineup / level set
+        self._totals = LRUCache(256)
+
+    def evaluate(self, state: 'GameState', items: Optional[List[Dict]] = None) -> List[ShopOption]:
+        """
+        Options for the affordable items of `items` (default: the state's
+        shop), best value first. Call again with other item lists to price
+        reroll outcomes; the hand sample and compiled plans are reused.
+        """
+        items = state.shop_items if items is None else items
+        sample = self._baseline(state)
+        baseline = sample[2]
+        base_mean = sum(baseline) / len(baseline) if baseline else 0.0
+        options = []
+        for item in items:
+            cost = int(item.get('cost', 0))
+            if cost > state.money:
+                continue
+            notes = []
+            gain = self._gain(state, item, sample, notes)
+            lost = interest(state.money) - interest(state.money - cost)
+            ratio = gain / base_mean if base_mean > 0 else 0.0
+            options.append(ShopOption(
+                item=item,
+                cost=cost,
+                mean_gain=gain,
+                gain_ratio=ratio,
+                interest_lost=lost,
+                value=ratio - self.interest_weight * lost,
+                notes=notes,
+            ))
+        options.sort(key=lambda option: -option.value)
+        return options
+
+    def _baseline(self, state: 'GameState') -> Tuple[tuple, List[List[Card]], List[int]]:
+        pool = list(state.hand) + list(state.deck)
+        if not pool:
+            pool = [Card(r, s) for s in SUITS for r in RANKS]
+        size = min(len(state.hand) or 8, len(pool))
+        key = (cards_key(pool), size, plan_key(state.jokers, state.hand_levels))
+        found = self._samples.get(key)
+        if found is None:
+            rng = random.Random(self.seed)
+            hands = [rng.sample(pool, size) for _ in range(self.samples)]
+            found = (key, hands, self._score((key, hands, None), state.jokers, state.hand_levels))
+            self._samples.put(key, found)
+        return found
+
+    def _score(self, sample, jokers: List[Joker], hand_levels: Dict[str, HandLevel]) -> List[int]:
+        """Best-play totals of the shared hands under a lineup, memoized per plan."""
+        sample_key, hands, _ = sample
+        key = (sample_key, plan_key(jokers, hand_levels))
+        totals = self._totals.get(key)
+        if totals is None:
+            plan = self.engine.plan_for(jokers, hand_levels)
+            if batch.np is not None:
+                totals = batch.BatchScorer(plan).best_totals(hands)
+            else:
+                find = self.engine.simulator.find_best_hand
+                totals = [find(hand, [], plan=plan)[2].get('total', 0) for hand in hands]
+            self._totals.put(key, totals)
+        return totals
+
+    def _gain(self, state: 'GameState', item: Dict, sample, notes: List[str]) -> float:
+        kind = str(item.get('type', '')).lower()
+        if kind == 'joker':
+            return self._joker_gain(state, item, sample, notes)
+        if kind == 'planet':
+            hand_type = item.get('hand_type') or PLANETS.get(item.get('name', ''))
+            if hand_type not in PLANET_LEVEL_UP:
+                notes.append("unknown planet")
+                return 0.0
+            levels = dict(state.hand_levels)
+            current = levels.get(hand_type) or self.engine.scoring_engine.hand_base_stats[hand_type]
+            chips, mult = PLANET_LEVEL_UP[hand_type]
+            levels[hand_type] = HandLevel(current.chips + chips, current.mult + mult)
+            notes.append(f"levels up {hand_type}")
+            return _mean_gain(self._score(sample, state.jokers, levels), sample[2])
+        notes.append("no score model for this item type")
+        return 0.0
+
+    def _joker_gain(self, state: 'GameState', item: Dict, sample, notes: List[str]) -> float:
+        effect = item.get('effect') or {}
+        if not effect.get('type'):
+            notes.append("no effect data")
+            return 0.0
+        counter = int(item.get('counter', 0))
+        if effect['type'] == 'x_mult_scaling':
+            counter += self.scaling_horizon
+            notes.append(f"scaling valued {self.scaling_horizon} steps ahead")
+        new = Joker(item.get('id', item.get('name', 'shop_joker')), item.get('name', ''), effect['type'],
+                    float(effect.get('value', 0.0)), len(state.jokers), effect.get('condition'), counter)
+        current = sorted(state.jokers, key=lambda j: j.position)
+        lineups = [(None, current + [new])]
+        if len(current) >= JOKER_SLOTS:
+            # Full slots: buying means selling one; keep the best replacement.
+            lineups = [(sold, [j for j in current if j is not sold] + [new]) for sold in current]
+        best, best_sold = None, None
+        for sold, lineup in lineups:
+            if not any(j.effect_type == 'copy_joker' for j in lineup):
+                lineup = self.order.exchange_order(lineup)
+            lineup = [replace(j, position=i) for i, j in enumerate(lineup)]
+            gain = _mean_gain(self._score(sample, lineup, state.hand_levels), sample[2])
+            if best is None or gain > best:
+                best, best_sold = gain, sold
+        if best_sold is not None:
+            notes.append(f"replaces {best_sold.name}")
+        return best
+
+
+def _mean_gain(totals: List[int], baseline: List[int]) -> float:
+    return sum(t - b for t, b in zip(totals, baseline)) / len(baseline) if baseline else 0.0
@@ -1,47 +1,311 @@
 import itertools
-from typing import List, Tuple
-from engine.scoring import ScoringEngine, Card, Joker
+import math
+from typing import List, Tuple, Dict, Optional
+from engine.scoring import ScoringEngine, ScoringPlan, Card, Joker
+from engine import batch
+from engine.batch import BatchScorer
+from engine.profiling import Profiler, stage
+from engine.hand_evaluator import (
+    HandEvaluator, HAND_TABLE, HAND_TYPES, HAND_TYPE_BIT, ALL_SUITS_MASK,
+    reachable_hand_types, achievable_hand_types,
+)
+
+MAX_PLAYED = 5
+
+
+class SearchCancelled(Exception):
+    """Raised by long searches when their cancel event is set."""
+
+
+def _mask_scorer(plan: ScoringPlan, terms: List[Tuple]):
+    """
+    Scores the combination given by a bitmask of positions in the hand;
+    unset bits are held. Only cards with a held effect are visited for the
+    held multiplier, in position order.
+    """
+    n = len(terms)
+    held_effects = [(1 << i, terms[i][3]) for i in range(n) if terms[i][3] != 1.0]
+    score_terms = plan.score_terms
+
+    def score_mask(hand_type: str, mask: int) -> dict:
+        held_x = 1.0
+        for bit, x in held_effects:
+            if not mask & bit:
+                held_x *= x
+        return score_terms(hand_type, [terms[i] for i in range(n) if mask >> i & 1], held_x)
+
+    return score_mask
+
+
+def _combo_count(n: int) -> int:
+    return sum(math.comb(n, r) for r in range(1, min(n, MAX_PLAYED) + 1))
+
 
 class HandSimulator:
     def __init__(self, engine: ScoringEngine):
         self.engine = engine
+        self.profiler: Optional[Profiler] = None
 
     def find_best_hand(
-        self, 
-        hand: List[Card], 
-        jokers: List[Joker], 
-        hand_type_finder_callback
+        self,
+        hand: List[Card],
+        jokers: List[Joker],
+        hand_type_finder_callback=None,
+        plan: Optional[ScoringPlan] = None
+    ) -> Tuple[str, List[Card], dict]:
+        """
+        Finds the 1-5 card combination that results in the highest score.
+        Pass a plan from ScoringEngine.compile to reuse it across calls.
+
+        Branch-and-bound over card subsets: every partial combo gets an upper
+        bound from the hand types it can still become and the best cards left
+        to add, and whole subtrees are skipped once they cannot beat the best
+        score found so far. Ties resolve exactly like find_best_hand_exhaustive
+        (fewest cards first, then earliest positions in `hand`).
+        """
+        if hand_type_finder_callback not in (None, HandEvaluator.get_hand_type):
+            # Bounds rely on the built-in classifier; honour custom ones exhaustively.
+            return self.find_best_hand_exhaustive(hand, jokers, hand_type_finder_callback, plan)
+        if not hand:
+            return "", [], {}
+        if plan is None:
+            plan = self.engine.compile(jokers)
+
+        prof = self.profiler
+        n = len(hand)
+        with stage(prof, 'scoring'):
+            terms = plan.card_terms(hand)
+        score_mask = _mask_scorer(plan, terms)
+        if prof is not None:
+            scored = [0]
+            score_combo = score_mask
+
+            def score_mask(hand_type: str, mask: int) -> dict:
+                scored[0] += 1
+                return score_combo(hand_type, mask)
+
+        # Joker contributions, loosened so that their order (and, with
+        # hand-type conditions, the hand type) cannot matter.
+        j_chips = 0.0
+        j_add = 0.0
+        j_x = 1.0
+        for steps in set(plan.type_steps.values()) | {plan.joker_steps}:
+            s_chips = s_add = 0.0
+            s_x = 1.0
+            for chips_add, mult_add, x in steps:
+                s_chips += max(0.0, chips_add)
+                s_add += max(0.0, mult_add)
+                s_x *= max(1.0, x)
+            j_chips = max(j_chips, s_chips)
+            j_add = max(j_add, s_add)
+            j_x = max(j_x, s_x)
+
+        levels = plan.levels
+        type_chips = {t: levels[t][0] if t in levels else 0 for t in HAND_TYPES}
+        type_mult = {t: levels[t][1] if t in levels else 0 for t in HAND_TYPES}
+        base_for_mask: Dict[int, Tuple[int, int]] = {}
+
+        def best_base(mask: int) -> Tuple[int, int]:
+            base = base_for_mask.get(mask)
+            if base is None:
+                types = [t for t in HAND_TYPES if mask & HAND_TYPE_BIT[t]]
+                base = (max(type_chips[t] for t in types), max(type_mult[t] for t in types))
+                base_for_mask[mask] = base
+            return base
+
+        # Visit high ranks first so strong pairs/sets set a high bar early.
+        order = sorted(range(n), key=lambda i: -hand[i].rank_index)
+        o_cards = [hand[i] for i in order]
+        o_chips = [terms[i][0] for i in order]
+        o_add = [terms[i][1] for i in order]
+        # Multipliers below 1 (an x0.5 trigger) would let +mult added after
+        # them outgrow the bound, so bounds only ever use max(x, 1).
+        o_x = [max(1.0, terms[i][2]) for i in order]
+        o_held = [max(1.0, terms[i][3]) for i in order]
+        o_bit = [1 << i for i in order]
+
+        # Hand types some subset of the whole hand can form at all.
+        with stage(prof, 'classification'):
+            achievable = achievable_hand_types(hand)
+
+        # Per suffix start p: the s largest chip / +mult terms, the number of
+        # cards compatible with each suit, and the product of the best of
+        # played-vs-held multipliers.
+        top_chips = []
+        top_add = []
+        any_x = [1.0] * (n + 1)
+        held_x = [1.0] * (n + 1)
+        suit_left = [(0, 0, 0, 0)] * (n + 1)
+        for p in range(n - 1, -1, -1):
+            any_x[p] = any_x[p + 1] * max(o_x[p], o_held[p])
+            held_x[p] = held_x[p + 1] * o_held[p]
+            suit_mask = o_cards[p].suit_mask
+            suit_left[p] = tuple(k + (suit_mask >> s & 1) for s, k in enumerate(suit_left[p + 1]))
+        for p in range(n + 1):
+            chips_sorted = sorted(o_chips[p:], reverse=True)
+            add_sorted = sorted(o_add[p:], reverse=True)
+            top_chips.append([sum(chips_sorted[:s]) for s in range(MAX_PLAYED + 1)])
+            top_add.append([sum(add_sorted[:s]) for s in range(MAX_PLAYED + 1)])
+
+        best_score = -1
+        best_key: Tuple = ()
+        best_mask = 0
+        best_hand_type = ""
+        best_result = {}
+
+        def upper(base: Tuple[int, int], chips: float, add: float, x: float) -> float:
+            c = max(0.0, base[0] + chips + j_chips)
+            m = max(1.0, (base[1] + add + j_add) * x * j_x)
+            return (c + 0.5) * (m + 0.5)
+
+        def visit(pos, count, ranked, product, suits, chips, add, x, held_before, mask):
+            nonlocal best_score, best_key, best_mask, best_hand_type, best_result
+            for j in range(pos, n):
+                card = o_cards[j]
+                c_count = count + 1
+                c_product = product * card.prime
+                c_ranked = ranked + (card.prime != 1)
+                c_suits = suits & card.suit_mask
+                c_chips = chips + o_chips[j]
+                c_add = add + o_add[j]
+                c_x = x * o_x[j]
+                c_mask = mask | o_bit[j]
+
+                # Leaf: the combo itself, with everything after j held.
+                hand_type = HAND_TABLE[c_product][c_count == MAX_PLAYED and c_suits != 0]
+                bound = upper((type_chips[hand_type], type_mult[hand_type]),
+                              c_chips, c_add, c_x * held_before * held_x[j + 1])
+                if bound >= best_score:
+                    result = score_mask(hand_type, c_mask)
+                    total = result['total']
+                    if total >= best_score:
+                        key = (c_count, [i for i in range(n) if c_mask >> i & 1])
+                        if total > best_score or key < best_key:
+                            best_score = total
+                            best_key = key
+                            best_mask = c_mask
+                            best_hand_type = hand_type
+                            best_result = result
+
+                # Subtree: extensions of the combo with cards after j.
+                slots = MAX_PLAYED - c_count
+                if slots and j + 1 < n:
+                    # A flush needs 5 cards sharing one of the combo's suits.
+                    flushable = False
+                    if c_suits and c_ranked == c_count:
+                        left = suit_left[j + 1]
+                        for s in range(4):
+                            if c_suits >> s & 1 and c_count + left[s] >= MAX_PLAYED:
+                                flushable = True
+                                break
+                    reach = reachable_hand_types(c_product, c_ranked, slots, flushable) & achievable
+                    bound = upper(best_base(reach),
+                                  c_chips + top_chips[j + 1][slots],
+                                  c_add + top_add[j + 1][slots],
+                                  c_x * held_before * any_x[j + 1])
+                    if bound >= best_score:
+                        visit(j + 1, c_count, c_ranked, c_product, c_suits,
+                              c_chips, c_add, c_x, held_before, c_mask)
+
+                # Skipping this card from here on means it is held.
+                held_before *= o_held[j]
+
+        with stage(prof, 'search'):
+            visit(0, 0, 0, 1, ALL_SUITS_MASK, 0, 0, 1.0, 1.0, 0)
+        if prof is not None:
+            prof.count('combos_evaluated', scored[0])
+            prof.count('combos_pruned', _combo_count(n) - scored[0])
+
+        best_combo = [hand[i] for i in range(n) if best_mask >> i & 1]
+        return best_hand_type, best_combo, best_result
+
+    def find_best_hand_exhaustive(
+        self,
+        hand: List[Card],
+        jokers: List[Joker],
+        hand_type_finder_callback=None,
+        plan: Optional[ScoringPlan] = None
     ) -> Tuple[str, List[Card], dict]:
         """
-        Finds the 5-card combination that results in the highest score.
-        Note: This is computationally expensive if done naively for all 5-card combos 
-        of a large hand, but Balatro hands are small (max ~12).
+        Reference search: scores every 1-5 card combination. Held cards are
+        tracked by position so duplicate cards in hand are handled correctly.
         """
+        if hand_type_finder_callback is None:
+            hand_type_finder_callback = HandEvaluator.get_hand_type
+        if plan is None:
+            plan = self.engine.compile(jokers)
+        if self.profiler is not None:
+            self.profiler.count('combos_evaluated', _combo_count(len(hand)))
+        score_mask = _mask_scorer(plan, plan.card_terms(hand))
         best_score = -1
         best_combo = []
         best_hand_type = ""
         best_result = {}
 
+        positions = range(len(hand))
         # Balatro allows playing 1 to 5 cards.
-        for r in range(1, 6):
-            for combo in itertools.combinations(hand, r):
-                combo_list = list(combo)
+        for r in range(1, MAX_PLAYED + 1):
+            for idx in itertools.combinations(positions, r):
+                combo_list = [hand[i] for i in idx]
                 # Identify the hand type (e.g., Flush, Straight, etc.)
                 hand_type = hand_type_finder_callback(combo_list)
-                
+
                 # Cards not in the combo are "held in hand"
-                held_cards = [c for c in hand if c not in combo_list]
-                
-                result = self.engine.calculate_score(hand_type, combo_list, held_cards, jokers)
-                
+                mask = 0
+                for i in idx:
+                    mask |= 1 << i
+
+                result = score_mask(hand_type, mask)
+
                 if result['total'] > best_score:
                     best_score = result['total']
                     best_combo = combo_list
                     best_hand_type = hand_type
                     best_result = result
-        
+
         return best_hand_type, best_combo, best_result
 
+    def find_best_hand_batch(
+        self,
+        hand: List[Card],
+        jokers: List[Joker],
+        plan: Optional[ScoringPlan] = None
+    ) -> Tuple[str, List[Card], dict]:
+        """
+        Vectorized find_best_hand (needs numpy): scores every play in one
+        pass. Same result as find_best_hand_exhaustive.
+        """
+        if not hand:
+            return "", [], {}
+        if plan is None:
+            plan = self.engine.compile(jokers)
+        return BatchScorer(plan).best_plays([hand])[0]
+
+    def top_plays(
+        self,
+        hand: List[Card],
+        jokers: List[Joker],
+        k: int,
+        plan: Optional[ScoringPlan] = None
+    ) -> List[Tuple[str, List[Card], dict]]:
+        """The k highest scoring plays, best first; ties keep exhaustive order."""
+        if plan is None:
+            plan = self.engine.compile(jokers)
+        if batch.np is not None:
+            return BatchScorer(plan).top_plays(hand, k)
+        score_mask = _mask_scorer(plan, plan.card_terms(hand))
+        plays = []
+        for r in range(1, MAX_PLAYED + 1):
+            for idx in itertools.combinations(range(len(hand)), r):
+                combo = [hand[i] for i in idx]
+                hand_type = HandEvaluator.get_hand_type(combo)
+                mask = 0
+                for i in idx:
+                    mask |= 1 << i
+                plays.append((hand_type, combo, score_mask(hand_type, mask)))
+        plays.sort(key=lambda play: -play[2]['total'])
+        return plays[:k]
+
 # Example Hand Type Finder (Mock)
 def mock_hand_finder(cards: List[Card]) -> str:
     # This would normally have logic to detect Flush, Straight, etc.
@@ -1,25 +1,70 @@
+import argparse
+import asyncio
 import json
 import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
 from engine.decision_engine import DecisionEngine, GameState
-from engine.scoring import Card, Joker
+from engine.scoring import Card, Joker, HandLevel, EDITION_INDEX
+from engine.simulator import SearchCancelled
+from engine.profiling import Profiler, stage
+from engine.session_log import SessionLogWriter
 
 def parse_card(card_str: str) -> Card:
-    # Format: "Rank of Suit" or "Rank of Suit [Enhancement]"
-    parts = card_str.split(' of ')
-    rank = parts[0]
-    suit_parts = parts[1].split(' ')
-    suit = suit_parts[0]
-    enhancement = None
-    if len(suit_parts) > 1:
-        enhancement = suit_parts[1].strip('[]')
-    return Card(rank=rank, suit=suit, enhancement=enhancement)
+    # Format: "Rank of Suit" or "Rank of Suit [Enhancement] [Edition] [Color Seal]"
+    parts = card_str.strip().split(' of ')
+    rank = parts[0].strip()
+    suit, _, tags = parts[1].strip().partition(' ')
+    enhancement = edition = seal = None
+    for tag in re.findall(r'\[([^\]]+)\]', tags):
+        tag = tag.strip()
+        if tag.endswith(' Seal'):
+            seal = tag[:-len(' Seal')]
+        elif tag in EDITION_INDEX:
+            edition = tag
+        else:
+            enhancement = tag
+    return Card(rank=rank, suit=suit, enhancement=enhancement, edition=edition, seal=seal)
+
+def state_from_dict(raw_data: dict, profiler: Optional[Profiler] = None) -> GameState:
+    # Convert raw data (the state_example.json shape) to GameState
+    with stage(profiler, 'parse'):
+        return _state_from_dict(raw_data)
+
+def _state_from_dict(raw_data: dict) -> GameState:
+    state = GameState(
+        ante=raw_data.get('ante', 1),
+        blind_type=raw_data.get('blind_type', "Small Blind"),
+        money=raw_data.get('money', 0),
+        required_score=raw_data.get('required_score', 300),
+        current_score=raw_data.get('current_score', 0),
+        hands_left=raw_data.get('hands_left', 4),
+        discards_left=raw_data.get('discards_left', 3)
+    )
+    state.hand = [parse_card(c) for c in raw_data.get('hand', [])]
+    state.deck = [parse_card(c) for c in raw_data.get('deck', [])]
+    state.jokers = [Joker(j['id'], j['name'], j['type'], j['value'], i,
+                          condition=j.get('condition'), counter=j.get('counter', 0))
+                   for i, j in enumerate(raw_data.get('jokers', []))]
+    state.hand_levels = {name: HandLevel(lvl['chips'], lvl['mult'])
+                         for name, lvl in raw_data.get('hand_levels', {}).items()}
+    state.consumables = list(raw_data.get('consumables', []))
+    state.shop_items = list(raw_data.get('shop_items', []))
+    return state
 
 def main():
     print("=== Balatro Spectator CLI ===")
     print("Feed me the game state, and I'll tell you what to do.")
     
-    engine = DecisionEngine()
-    
+    with DecisionEngine() as engine:
+        interactive_loop(engine)
+
+def interactive_loop(engine: DecisionEngine):
     while True:
         print("\nOptions: [1] Load State from JSON [2] Manual Input (Quick) [q] Quit")
         choice = input("> ").lower()
@@ -32,17 +77,7 @@ def main():
             path = input("Enter path to state.json: ")
             if os.path.exists(path):
                 with open(path, 'r') as f:
-                    raw_data = json.load(f)
-                    # Convert raw data to GameState (simplified conversion)
-                    state = GameState(
-                        ante=raw_data.get('ante', 1),
-                        money=raw_data.get('money', 0),
-                        required_score=raw_data.get('required_score', 300),
-                        current_score=raw_data.get('current_score', 0)
-                    )
-                    state.hand = [parse_card(c) for c in raw_data.get('hand', [])]
-                    state.jokers = [Joker(j['id'], j['name'], j['type'], j['value'], i) 
-                                   for i, j in enumerate(raw_data.get('jokers', []))]
+                    state = state_from_dict(json.load(f))
             else:
                 print("File not found.")
                 continue
@@ -63,9 +98,282 @@ def main():
             print(f"ACTION: {recommendation['action'].upper()}")
             if 'hand_type' in recommendation:
                 print(f"HAND: {recommendation['hand_type']}")
+            if 'cards' in recommendation:
                 print(f"CARDS: {', '.join(recommendation['cards'])}")
             print(f"REASON: {recommendation['reason']}")
             print("-----------------------")
 
+class LatestState:
+    """
+    Single-slot mailbox: a newer state overwrites an unread one, so bursts
+    coalesce and only the newest state is ever evaluated.
+    """
+
+    def __init__(self):
+        self.item = None
+        self.event = asyncio.Event()
+        self.coalesced = 0
+
+    def put(self, item):
+        if self.event.is_set():
+            self.coalesced += 1
+        self.item = item
+        self.event.set()
+
+    async def take(self):
+        await self.event.wait()
+        self.event.clear()
+        item, self.item = self.item, None
+        return item
+
+
+class StreamSpectator:
+    """
+    Reads newline-delimited state JSON and writes one JSON line per
+    evaluated state. A state that arrives while an older one is still being
+    searched cancels that search. Each output echoes the input's optional
+    "seq" field so a replay harness can match latencies. With a session
+    log, every emitted state and its recommendation are also appended to it.
+    """
+
+    def __init__(self, engine: DecisionEngine, out=sys.stdout, log: Optional[SessionLogWriter] = None,
+                 session: int = 0):
+        self.engine = engine
+        self.out = out
+        self.log = log
+        self.session = session
+        self.slot = LatestState()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.received = 0
+        self.emitted = 0
+        self.cancelled = 0
+        self.errors = 0
+        self.log_errors = 0
+        self.idle = asyncio.Event()
+
+    def feed(self, line: str):
+        line = line.strip()
+        if line:
+            self.received += 1
+            self.slot.put((line, time.perf_counter()))
+
+    def _evaluate(self, line: str, cancel: threading.Event) -> Tuple[dict, GameState]:
+        raw_data = json.loads(line)
+        state = state_from_dict(raw_data, self.engine.profiler)
+        recommendation = self.engine.recommend(state, cancel)
+        return {"seq": raw_data.get("seq"), "recommendation": recommendation}, state
+
+    def _emit(self, payload: dict):
+        self.out.write(json.dumps(payload) + "\n")
+        self.out.flush()
+        self.emitted += 1
+
+    async def run_evaluator(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self.idle.set()
+            line, received_at = await self.slot.take()
+            self.idle.clear()
+            cancel = threading.Event()
+            search = loop.run_in_executor(self.executor, self._evaluate, line, cancel)
+            newer = asyncio.ensure_future(self.slot.event.wait())
+            await asyncio.wait({search, newer}, return_when=asyncio.FIRST_COMPLETED)
+            if not search.done():
+                # A newer state is waiting: this answer would be stale.
+                cancel.set()
+                self.cancelled += 1
+            newer.cancel()
+            state = None
+            try:
+                payload, state = await search
+            except SearchCancelled:
+                continue
+            except (ValueError, KeyError, IndexError, TypeError, AttributeError) as exc:
+                # Malformed state: answer it and keep serving the stream.
+                self.errors += 1
+                payload = {"error": f"{type(exc).__name__}: {exc}"}
+            except Exception as exc:
+                self.errors += 1
+                print(f"evaluator error: {type(exc).__name__}: {exc}", file=sys.stderr)
+                payload = {"error": f"{type(exc).__name__}: {exc}"}
+            if cancel.is_set():
+                continue
+            payload["latency_ms"] = round((time.perf_counter() - received_at) * 1000, 3)
+            self._emit(payload)
+            if self.log is not None and state is not None:
+                seq = payload["seq"] if isinstance(payload["seq"], int) else self.emitted
+                try:
+                    self.log.append(state, payload["recommendation"], self.session, seq)
+                except (ValueError, OSError) as exc:
+                    # Logging is best effort; the stream keeps answering.
+                    self.log_errors += 1
+                    print(f"session log: {type(exc).__name__}: {exc}", file=sys.stderr)
+
+    async def drain(self, evaluator: asyncio.Task):
+        # Input ended: let the last pending state finish, then stop.
+        while self.slot.event.is_set() or not self.idle.is_set():
+            await asyncio.sleep(0.001)
+        evaluator.cancel()
+
+    async def read_stdin(self):
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=1 << 22)
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        async for line in reader:
+            self.feed(line.decode("utf-8"))
+
+    async def follow_file(self, path: str, poll: float = 0.05):
+        # tail -f: start at the end, pick up appended lines, reopen on truncation.
+        with open(path, "r") as f:
+            f.seek(0, os.SEEK_END)
+            partial = ""
+            while True:
+                chunk = f.readline()
+                if not chunk:
+                    if os.path.getsize(path) < f.tell():
+                        f.seek(0)
+                    await asyncio.sleep(poll)
+                    continue
+                partial += chunk
+                if partial.endswith("\n"):
+                    self.feed(partial)
+                    partial = ""
+
+    async def serve_socket(self, path: str):
+        async def client(reader, writer):
+            async for line in reader:
+                self.feed(line.decode("utf-8"))
+            writer.close()
+
+        if os.path.exists(path):
+            os.unlink(path)
+        server = await asyncio.start_unix_server(client, path=path, limit=1 << 22)
+        async with server:
+            await server.serve_forever()
+
+    async def run(self, source: str, target: str = None):
+        evaluator = asyncio.ensure_future(self.run_evaluator())
+        if source == "stdin":
+            await self.read_stdin()
+        elif source == "follow":
+            await self.follow_file(target)
+        else:
+            await self.serve_socket(target)
+        await self.drain(evaluator)
+        try:
+            await evaluator
+        except asyncio.CancelledError:
+            pass
+        self.executor.shutdown()
+        stats = {
+            "received": self.received,
+            "emitted": self.emitted,
+            "coalesced": self.slot.coalesced,
+            "cancelled": self.cancelled,
+            "errors": self.errors,
+        }
+        if self.log is not None:
+            stats["log_errors"] = self.log_errors
+        if self.engine.profiler is not None:
+            stats["profile"] = self.engine.profile_snapshot()
+        print(json.dumps({"stats": stats}), file=sys.stderr)
+
+def stream_main(args):
+    engine = DecisionEngine(plan_rounds=args.plan_rounds, profile=args.profile)
+    log = SessionLogWriter(args.log) if args.log else None
+    spectator = StreamSpectator(engine, log=log, session=args.log_session)
+    if args.follow:
+        source, target = "follow", args.follow
+    elif args.socket:
+        source, target = "socket", args.socket
+    else:
+        source, target = "stdin", None
+    try:
+        asyncio.run(spectator.run(source, target))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.close()
+        if log is not None:
+            log.close()
+
+def batch_main(args):
+    """
+    Offline analysis: one recommendation line per input state line, in
+    input order, via DecisionEngine.recommend_many. Lines that are not
+    valid states get an {"error": ...} line in their place.
+    """
+    engine = DecisionEngine(plan_rounds=args.plan_rounds, seed=args.seed)
+    source = sys.stdin if args.batch == '-' else open(args.batch, 'r', encoding='utf-8')
+    out = sys.stdout if args.out in (None, '-') else open(args.out, 'w', encoding='utf-8')
+    # Input lines in order: (seq, None) for a parsed state, (seq, error) otherwise.
+    slots = deque()
+    counts = {"states": 0, "errors": 0}
+
+    def parsed_states():
+        for line in source:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                raw_data = json.loads(line)
+                state = state_from_dict(raw_data)
+            except (ValueError, KeyError, IndexError, TypeError, AttributeError) as exc:
+                slots.append((None, {"error": f"{type(exc).__name__}: {exc}"}))
+                continue
+            slots.append((raw_data.get("seq") if isinstance(raw_data, dict) else None, None))
+            yield state
+
+    def emit(seq, recommendation):
+        out.write(json.dumps({"seq": seq, "recommendation": recommendation}) + "\n")
+        counts["errors" if "error" in recommendation else "states"] += 1
+
+    started = time.perf_counter()
+    try:
+        for recommendation in engine.recommend_many(parsed_states(), workers=args.workers, window=args.window,
+                                                     chunk_size=args.chunk_size):
+            while slots[0][1] is not None:
+                emit(*slots.popleft())
+            emit(slots.popleft()[0], recommendation)
+        while slots:
+            emit(*slots.popleft())
+    finally:
+        engine.close()
+        if out is not sys.stdout:
+            out.close()
+        if source is not sys.stdin:
+            source.close()
+    elapsed = time.perf_counter() - started
+    total = counts["states"] + counts["errors"]
+    sys.stderr.write(json.dumps({"stats": dict(counts, elapsed_s=round(elapsed, 3),
+                                               states_per_s=round(total / elapsed, 1) if elapsed else None)}) + "\n")
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Balatro Spectator")
+    parser.add_argument("--stream", action="store_true",
+                        help="non-interactive: read newline-delimited state JSON, write one JSON recommendation per state")
+    parser.add_argument("--follow", metavar="PATH", help="with --stream: follow a file that a game feed appends to")
+    parser.add_argument("--socket", metavar="PATH", help="with --stream: listen on a local unix socket")
+    parser.add_argument("--log", metavar="PATH",
+                        help="with --stream: append states and recommendations to a session log (engine/session_log.py)")
+    parser.add_argument("--log-session", type=int, default=0, help="with --log: session id of this stream")
+    parser.add_argument("--batch", metavar="PATH",
+                        help="offline: recommend every state of a JSONL file ('-' for stdin), in order")
+    parser.add_argument("--out", metavar="PATH", help="with --batch: output JSONL (default stdout)")
+    parser.add_argument("--workers", type=int, default=0, help="with --batch: worker processes")
+    parser.add_argument("--window", type=int, default=1024,
+                        help="with --batch: states read ahead, deduplicated and grouped at a time")
+    parser.add_argument("--chunk-size", type=int, default=64,
+                        help="with --batch --workers: most states of one lineup per worker task")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="with --batch: seed of the discard search, for reproducible output")
+    parser.add_argument("--plan-rounds", action="store_true", help="use the multi-turn round planner")
+    parser.add_argument("--profile", action="store_true",
+                        help="with --stream: add per-stage timings to each recommendation and totals to the stats")
+    args = parser.parse_args()
+    if args.batch:
+        batch_main(args)
+    elif args.stream or args.follow or args.socket:
+        stream_main(args)
+    else:
+        main()
@@ -0,0 +1,262 @@
+"""
+Reproducible benchmark suite for the scoring and search engine.
+
+    python scripts/bench_engine.py --out bench.json
+    python scripts/bench_engine.py --compare bench.json --threshold 0.15
+    python scripts/bench_engine.py --quick --sizes 5,8 --jokers 0,5
+
+Inputs come from seeded generators, so two runs with the same --seed time
+the same hands, jokers and states. Every case reports microseconds per
+operation as the median and the best of --repeat rounds. --compare loads a
+stored result file and flags cases whose median got slower than the
+baseline by more than --threshold (relative); the exit status is 1 when
+any case regressed.
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from engine import batch  # noqa: E402
+from engine.decision_engine import DecisionEngine, GameState  # noqa: E402
+from engine.hand_evaluator import HandEvaluator  # noqa: E402
+from engine.scoring import (  # noqa: E402
+    Card, Joker, HandLevel, ScoringEngine, RANKS, SUITS, ENHANCEMENTS, EDITIONS, SEALS,
+)
+from engine.simulator import HandSimulator  # noqa: E402
+
+JOKER_KINDS = (
+    ("add_mult", (2, 4, 8, 12)),
+    ("add_chips", (20, 50, 100)),
+    ("x_mult", (1.5, 2.0, 3.0)),
+)
+
+
+# -- seeded generators ----------------------------------------------------
+
+def random_card(rng, modifiers=0.25):
+    """A card; with probability `modifiers` each of enhancement/edition/seal is set."""
+    return Card(
+        rng.choice(RANKS),
+        rng.choice(SUITS),
+        rng.choice(ENHANCEMENTS[1:]) if rng.random() < modifiers else None,
+        rng.choice(EDITIONS[1:]) if rng.random() < modifiers / 2 else None,
+        rng.choice(SEALS[1:]) if rng.random() < modifiers / 2 else None,
+    )
+
+
+def random_hand(rng, size):
+    return [random_card(rng) for _ in range(size)]
+
+
+def random_jokers(rng, count):
+    jokers = []
+    for position in range(count):
+        effect, values = rng.choice(JOKER_KINDS)
+        jokers.append(Joker(f"j_bench_{position}", f"Bench Joker {position}", effect, rng.choice(values), position))
+    return jokers
+
+
+def random_state(rng, hand_size=8, joker_count=2):
+    """A mid-blind state: hand and deck drawn from one shuffled 52-card deck."""
+    deck = [Card(r, s) for s in SUITS for r in RANKS]
+    rng.shuffle(deck)
+    hand, rest = deck[:hand_size], deck[hand_size:]
+    levels = {}
+    if rng.random() < 0.5:
+        levels["Pair"] = HandLevel(10 + 15 * rng.randint(1, 3), 2 + rng.randint(1, 3))
+    return GameState(
+        ante=rng.randint(1, 8),
+        money=rng.randint(0, 30),
+        jokers=random_jokers(rng, joker_count),
+        hand=hand,
+        deck=rest,
+        hand_levels=levels,
+        hands_left=rng.randint(1, 4),
+        discards_left=rng.randint(0, 3),
+        required_score=rng.choice([300, 800, 2000, 5000]),
+        current_score=rng.randint(0, 200),
+    )
+
+
+# -- timing ---------------------------------------------------------------
+
+def time_rounds(run, ops, repeat, before_round=None):
+    """
+    Calls run() once untimed (memo tables, caches) and then `repeat` times;
+    returns per-op microseconds (median, best).
+    """
+    if before_round is not None:
+        before_round()
+    run()
+    per_op = []
+    for _ in range(repeat):
+        if before_round is not None:
+            before_round()
+        started = time.perf_counter()
+        run()
+        per_op.append((time.perf_counter() - started) / ops * 1e6)
+    return statistics.median(per_op), min(per_op)
+
+
+def record(results, name, ops, timing):
+    median, best = timing
+    results[name] = {"ops": ops, "us_per_op": round(median, 3), "best_us_per_op": round(best, 3)}
+    print(f"{name:40s} {median:12.2f} us/op  (best {best:.2f}, {ops} ops)", flush=True)
+
+
+# -- cases ----------------------------------------------------------------
+
+def bench_get_hand_type(results, rng, args):
+    hands = [random_hand(rng, rng.randint(1, 5)) for _ in range(args.samples)]
+    classify = HandEvaluator.get_hand_type
+
+    def run():
+        for hand in hands:
+            classify(hand)
+
+    record(results, "get_hand_type", len(hands), time_rounds(run, len(hands), args.repeat))
+
+
+def bench_calculate_score(results, rng, args):
+    engine = ScoringEngine()
+    cases = []
+    for _ in range(args.samples // 10):
+        played = random_hand(rng, rng.randint(1, 5))
+        cases.append((HandEvaluator.get_hand_type(played), played,
+                      random_hand(rng, rng.randint(0, 8)), random_jokers(rng, rng.randint(0, 5))))
+
+    def run():
+        for hand_type, played, held, jokers in cases:
+            engine.calculate_score(hand_type, played, held, jokers)
+
+    record(results, "calculate_score", len(cases), time_rounds(run, len(cases), args.repeat))
+
+
+def bench_find_best_hand(results, rng, args):
+    engine = ScoringEngine()
+    simulator = HandSimulator(engine)
+    for size in args.sizes:
+        for joker_count in args.jokers:
+            hands = [random_hand(rng, size) for _ in range(args.search_samples)]
+            jokers = random_jokers(rng, joker_count)
+            plan = engine.compile(jokers)
+
+            def run():
+                for hand in hands:
+                    simulator.find_best_hand(hand, jokers, plan=plan)
+
+            record(results, f"find_best_hand[n={size},jokers={joker_count}]",
+                   len(hands), time_rounds(run, len(hands), args.repeat))
+
+
+def bench_recommend(results, rng, args):
+    states = [random_state(rng, rng.choice((8, 8, 10)), rng.randint(0, 5)) for _ in range(args.states)]
+    engine = DecisionEngine()
+    engine.discard_advisor.seed = args.seed
+
+    def cold():
+        engine.recommendation_cache.clear()
+        engine.best_hand_cache.clear()
+        engine.plan_cache.clear()
+        engine.session.reset()
+
+    def run():
+        for state in states:
+            engine.recommend(state)
+
+    record(results, "recommend[cold]", len(states), time_rounds(run, len(states), args.repeat, cold))
+    record(results, "recommend[cached]", len(states), time_rounds(run, len(states), args.repeat))
+
+
+# -- compare --------------------------------------------------------------
+
+def compare(results, baseline, threshold):
+    """Prints a comparison table; returns the names of regressed cases."""
+    regressions = []
+    print(f"\n{'case':40s} {'baseline':>12s} {'current':>12s} {'change':>8s}")
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:40s} {'-':>12s} {current['us_per_op']:12.2f}      new")
+            continue
+        change = current["us_per_op"] / base["us_per_op"] - 1 if base["us_per_op"] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:40s} {base['us_per_op']:12.2f} {current['us_per_op']:12.2f} {change:+8.1%}{flag}")
+    return regressions
+
+
+def int_list(text):
+    return [int(part) for part in text.split(",") if part]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5, help="timed rounds per case")
+    parser.add_argument("--samples", type=int, default=20000, help="hands for the classifier case")
+    parser.add_argument("--search-samples", type=int, default=50, help="hands per find_best_hand case")
+    parser.add_argument("--states", type=int, default=20, help="states for the recommend cases")
+    parser.add_argument("--sizes", type=int_list, default=list(range(5, 16)), help="hand sizes, e.g. 5,8,15")
+    parser.add_argument("--jokers", type=int_list, default=[0, 1, 2, 5, 10], help="joker counts, e.g. 0,5,10")
+    parser.add_argument("--only", default="", help="run only cases whose group name contains this")
+    parser.add_argument("--quick", action="store_true", help="fewer samples and rounds, for a smoke run")
+    parser.add_argument("--out", help="write results as JSON to this path")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="relative slowdown counted as a regression")
+    args = parser.parse_args()
+    if args.quick:
+        args.repeat = min(args.repeat, 2)
+        args.samples = min(args.samples, 2000)
+        args.search_samples = min(args.search_samples, 10)
+        args.states = min(args.states, 5)
+
+    results = {}
+    groups = (
+        ("get_hand_type", bench_get_hand_type),
+        ("calculate_score", bench_calculate_score),
+        ("find_best_hand", bench_find_best_hand),
+        ("recommend", bench_recommend),
+    )
+    for group, bench in groups:
+        if args.only in group:
+            # Each group gets its own stream so that selecting groups does not shift inputs.
+            bench(results, random.Random(f"{args.seed}:{group}"), args)
+
+    report = {
+        "meta": {
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "numpy": batch.np.__version__ if batch.np is not None else None,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}")
+            sys.exit(1)
+        print("\nno regressions")
+
+
+if __name__ == "__main__":
+    main()
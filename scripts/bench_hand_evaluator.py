@@ -0,0 +1,116 @@
+"""
+Micro-benchmark and equivalence check for HandEvaluator.get_hand_type.
+
+    python scripts/bench_hand_evaluator.py              # benchmark only
+    python scripts/bench_hand_evaluator.py --exhaustive # + all 1-5 card subsets of a deck
+
+--exhaustive compares against the legacy classifier, which predates
+enhancements; tests/test_hand_evaluator.py covers Wild, Stone and
+duplicate cards and the Five of a Kind / Flush House / Flush Five types.
+"""
+import argparse
+import itertools
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from engine.hand_evaluator import HandEvaluator  # noqa: E402
+from engine.scoring import Card, RANKS, SUITS  # noqa: E402
+
+
+def legacy_get_hand_type(cards):
+    # The Counter/sort based classifier this module replaced, kept as the reference.
+    if not cards:
+        return "High Card"
+    ranks = []
+    for c in cards:
+        r = c.rank
+        if r == 'A': val = 14
+        elif r == 'K': val = 13
+        elif r == 'Q': val = 12
+        elif r == 'J': val = 11
+        else: val = int(r)
+        ranks.append(val)
+    ranks.sort()
+    suits = [c.suit for c in cards]
+    rank_counts = Counter(ranks)
+    counts = sorted(rank_counts.values(), reverse=True)
+    is_flush = len(set(suits)) == 1 and len(cards) >= 5
+    is_straight = False
+    if len(cards) >= 5:
+        if len(set(ranks)) == 5 and (max(ranks) - min(ranks) == 4):
+            is_straight = True
+        elif set(ranks) == {14, 2, 3, 4, 5}:
+            is_straight = True
+    if is_straight and is_flush: return "Straight Flush"
+    if 4 in counts: return "Four of a Kind"
+    if 3 in counts and 2 in counts: return "Full House"
+    if is_flush: return "Flush"
+    if is_straight: return "Straight"
+    if 3 in counts: return "Three of a Kind"
+    if counts.count(2) >= 2: return "Two Pair"
+    if 2 in counts: return "Pair"
+    return "High Card"
+
+
+def standard_deck():
+    return [Card(rank, suit) for suit in SUITS for rank in RANKS]
+
+
+def check_exhaustive(deck):
+    new = HandEvaluator.get_hand_type
+    checked = 0
+    tally = Counter()
+    started = time.perf_counter()
+    for size in range(1, 6):
+        for combo in itertools.combinations(deck, size):
+            expected = legacy_get_hand_type(combo)
+            got = new(combo)
+            if got != expected:
+                raise AssertionError(f"{combo}: expected {expected}, got {got}")
+            checked += 1
+            if size == 5:
+                tally[got] += 1
+    elapsed = time.perf_counter() - started
+    print(f"equivalence: {checked} subsets identical ({elapsed:.1f}s)")
+    for hand_type, count in tally.most_common():
+        print(f"  {hand_type:<16} {count}")
+
+
+def bench(fn, hands, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for hand in hands:
+            fn(hand)
+        best = min(best, time.perf_counter() - started)
+    return best / len(hands) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--exhaustive", action="store_true", help="compare against the legacy classifier on every 1-5 card subset")
+    parser.add_argument("--samples", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    deck = standard_deck()
+    rng = random.Random(args.seed)
+    hands = [rng.sample(deck, rng.randint(1, 5)) for _ in range(args.samples)]
+
+    legacy_ns = bench(legacy_get_hand_type, hands, args.repeat)
+    table_ns = bench(HandEvaluator.get_hand_type, hands, args.repeat)
+    print(f"legacy: {legacy_ns:8.0f} ns/hand")
+    print(f"table:  {table_ns:8.0f} ns/hand  ({legacy_ns / table_ns:.1f}x)")
+
+    if args.exhaustive:
+        check_exhaustive(deck)
+
+
+if __name__ == "__main__":
+    main()
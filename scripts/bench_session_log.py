@@ -0,0 +1,175 @@
+"""
+Compare the binary session log (engine/session_log.py) with JSONL for
+recording spectator states and recommendations.
+
+    python scripts/bench_session_log.py --states 20000
+    python scripts/bench_session_log.py --states 5000 --sessions 8 --json
+
+States come from replay_stream.generate_states, spread over --sessions
+sessions and antes 1-8; recommendations are the engine's answers with
+discard searches turned off (same shape, fast to produce). Both formats
+get the same records. Reported per format: write throughput, file size
+(pretty JSON per state for reference), a full decoding scan, and reading
+one (session, ante, blind) slice, which the log answers from its index
+and JSONL answers by scanning the file.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+from engine.decision_engine import DecisionEngine  # noqa: E402
+from engine.session_log import SessionLogReader, SessionLogWriter, index_path, BLIND_TYPES  # noqa: E402
+from main import state_from_dict  # noqa: E402
+from replay_stream import generate_states  # noqa: E402
+
+
+def make_records(count, sessions, seed):
+    engine = DecisionEngine()
+    records = []
+    for i, raw in enumerate(generate_states(count, seed)):
+        session = i % sessions
+        raw = dict(raw, ante=1 + (i // sessions) * 8 // max(1, count // sessions),
+                   blind_type=BLIND_TYPES[(i // sessions) % 3])
+        state = state_from_dict(raw)
+        recommendation = engine.recommend(replace(state, discards_left=0))
+        records.append((session, i, raw, state, recommendation))
+    return records
+
+
+def write_jsonl(path, records):
+    started = time.perf_counter()
+    with open(path, "w", encoding="utf-8") as f:
+        for session, seq, raw, _, recommendation in records:
+            f.write(json.dumps({"session": session, "seq": seq, "state": raw}) + "\n")
+            f.write(json.dumps({"session": session, "seq": seq, "recommendation": recommendation}) + "\n")
+    return time.perf_counter() - started
+
+
+def write_log(path, records):
+    started = time.perf_counter()
+    with SessionLogWriter(path) as writer:
+        for session, seq, _, state, recommendation in records:
+            writer.append(state, recommendation, session, seq)
+    return time.perf_counter() - started
+
+
+def scan_jsonl(path):
+    started = time.perf_counter()
+    count = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            row = json.loads(line)
+            if "state" in row:
+                state_from_dict(row["state"])
+            count += 1
+    return count, time.perf_counter() - started
+
+
+def scan_log(path):
+    started = time.perf_counter()
+    count = 0
+    with SessionLogReader(path) as reader:
+        for record in reader:
+            record.value
+            count += 1
+    return count, time.perf_counter() - started
+
+
+def slice_jsonl(path, session, ante, blind_type):
+    started = time.perf_counter()
+    found = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            row = json.loads(line)
+            state = row.get("state")
+            if row["session"] == session and state is not None \
+                    and state["ante"] == ante and state["blind_type"] == blind_type:
+                state_from_dict(state)
+                found += 1
+    return found, time.perf_counter() - started
+
+
+def slice_log(path, session, ante, blind_type):
+    started = time.perf_counter()
+    found = 0
+    with SessionLogReader(path) as reader:
+        for record in reader.select(session, ante, blind_type, kind="state"):
+            record.value
+            found += 1
+    return found, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--states", type=int, default=20000)
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    records = make_records(args.states, args.sessions, args.seed)
+    pretty_bytes = sum(len(json.dumps(raw, indent=2)) + len(json.dumps(rec, indent=2))
+                       for _, _, raw, _, rec in records)
+    with tempfile.TemporaryDirectory(prefix="session_log_") as tmp:
+        jsonl_path = Path(tmp) / "session.jsonl"
+        log_path = Path(tmp) / "session.log"
+        jsonl_write = write_jsonl(jsonl_path, records)
+        log_write = write_log(log_path, records)
+        jsonl_size = os.path.getsize(jsonl_path)
+        log_size = os.path.getsize(log_path)
+        index_size = os.path.getsize(index_path(log_path))
+        total, jsonl_scan = scan_jsonl(jsonl_path)
+        _, log_scan = scan_log(log_path)
+        _, seq, raw, _, _ = records[len(records) // 2]
+        target = (seq % args.sessions, raw["ante"], raw["blind_type"])
+        jsonl_found, jsonl_slice = slice_jsonl(jsonl_path, *target)
+        log_found, log_slice = slice_log(log_path, *target)
+
+    report = {
+        "states": len(records),
+        "records": total,
+        "pretty_json_bytes": pretty_bytes,
+        "jsonl": {
+            "bytes": jsonl_size,
+            "write_records_per_s": round(total / jsonl_write),
+            "write_mb_per_s": round(jsonl_size / jsonl_write / 1e6, 2),
+            "scan_s": round(jsonl_scan, 3),
+            "slice_ms": round(jsonl_slice * 1000, 2),
+            "slice_states": jsonl_found,
+        },
+        "log": {
+            "bytes": log_size,
+            "index_bytes": index_size,
+            "write_records_per_s": round(total / log_write),
+            "write_mb_per_s": round((log_size + index_size) / log_write / 1e6, 2),
+            "scan_s": round(log_scan, 3),
+            "slice_ms": round(log_slice * 1000, 2),
+            "slice_states": log_found,
+        },
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    jsonl, log = report["jsonl"], report["log"]
+    print(f"{report['states']} states + recommendations ({total} records), slice {target}")
+    print(f"{'':8s} {'bytes':>12s} {'B/record':>9s} {'write rec/s':>12s} {'scan s':>8s} {'slice ms':>9s}")
+    print(f"{'pretty':8s} {pretty_bytes:12d} {pretty_bytes / total:9.1f}")
+    print(f"{'jsonl':8s} {jsonl['bytes']:12d} {jsonl['bytes'] / total:9.1f} {jsonl['write_records_per_s']:12d} "
+          f"{jsonl['scan_s']:8.3f} {jsonl['slice_ms']:9.2f}")
+    print(f"{'log':8s} {log['bytes'] + log['index_bytes']:12d} {(log['bytes'] + log['index_bytes']) / total:9.1f} "
+          f"{log['write_records_per_s']:12d} {log['scan_s']:8.3f} {log['slice_ms']:9.2f}")
+    print(f"log is {(log['bytes'] + log['index_bytes']) / jsonl['bytes']:.1%} of JSONL "
+          f"(index {log['index_bytes']} bytes); writes {log['write_records_per_s'] / jsonl['write_records_per_s']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Equivalence check and benchmark for the wiki_sync template parser.
+
+    python scripts/bench_wiki_parser.py
+    python scripts/bench_wiki_parser.py --fuzz 200000 --repeat 10
+    python scripts/bench_wiki_parser.py --capture Joker Blueprint "The Wall"
+
+Runs the single-pass parser (TemplateIndex / split_top_level) and the
+character-by-character implementation it replaced over the wikitext
+fixtures in scripts/fixtures/wiki, generated pages from fake_wiki_api and
+random brace/pipe soup, checks that every lookup and split is identical,
+then times the per-page work wiki_sync does: the infobox lookup, the
+Languages lookup and splitting both templates' parameters.
+
+--capture downloads the current wikitext of the given wiki pages into the
+fixtures directory (one <title>.wiki per page), saves the raw prop=revisions
+and prop=info API responses for them under fixtures/wiki/api/ and exits;
+see scripts/fixtures/wiki/README.md for which fixtures are captured. The
+tests replay saved responses through wiki_sync with ReplayClient.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPTS))
+
+import wiki_sync  # noqa: E402
+from fake_wiki_api import page_wikitext  # noqa: E402
+
+FIXTURES = SCRIPTS / "fixtures" / "wiki"
+RESPONSES = FIXTURES / "api"
+TEMPLATE_SETS = [kind_cfg["templates"] for kind_cfg in wiki_sync.KINDS] + [["Languages"], ["Unterminated template"]]
+
+
+def legacy_find_template(wikitext, template_names):
+    # The character-by-character parser wiki_sync used before, kept as the reference.
+    if not wikitext:
+        return None, None
+    names = {name.lower(): name for name in template_names}
+    i = 0
+    length = len(wikitext)
+    while i < length - 1:
+        if wikitext[i : i + 2] == "{{":
+            j = i + 2
+            while j < length and wikitext[j].isspace():
+                j += 1
+            name_start = j
+            while j < length and wikitext[j] not in "|}":
+                j += 1
+            name = wikitext[name_start:j].strip()
+            match = names.get(name.lower())
+            if match:
+                depth = 0
+                k = i
+                end = None
+                while k < length - 1:
+                    chunk = wikitext[k : k + 2]
+                    if chunk == "{{":
+                        depth += 1
+                        k += 2
+                        continue
+                    if chunk == "}}":
+                        depth -= 1
+                        k += 2
+                        if depth == 0:
+                            end = k
+                            break
+                        continue
+                    k += 1
+                if end is not None:
+                    content_start = j
+                    if content_start < length and wikitext[content_start] == "|":
+                        content_start += 1
+                    content = wikitext[content_start : end - 2]
+                    return match, content
+            i = j
+        i += 1
+    return None, None
+
+
+def legacy_split_top_level(text):
+    parts = []
+    buf = []
+    curly = 0
+    square = 0
+    i = 0
+    length = len(text)
+    while i < length:
+        chunk = text[i : i + 2]
+        if chunk == "{{":
+            curly += 1
+            buf.append(chunk)
+            i += 2
+            continue
+        if chunk == "}}":
+            curly = max(0, curly - 1)
+            buf.append(chunk)
+            i += 2
+            continue
+        if chunk == "[[":
+            square += 1
+            buf.append(chunk)
+            i += 2
+            continue
+        if chunk == "]]":
+            square = max(0, square - 1)
+            buf.append(chunk)
+            i += 2
+            continue
+        if text[i] == "|" and curly == 0 and square == 0:
+            parts.append("".join(buf))
+            buf = []
+            i += 1
+            continue
+        buf.append(text[i])
+        i += 1
+    parts.append("".join(buf))
+    return parts
+
+
+def load_corpus(generated):
+    pages = [path.read_text(encoding="utf-8") for path in sorted(FIXTURES.glob("*.wiki"))]
+    pages.extend(page["content"] for page in captured_pages())
+    for index in range(generated):
+        kind_cfg = wiki_sync.KINDS[index % len(wiki_sync.KINDS)]
+        pages.append(page_wikitext(kind_cfg["kind"], kind_cfg["templates"][0], index, index % 9 != 4))
+    return pages
+
+
+class RecordingClient(wiki_sync.ApiClient):
+    """ApiClient that keeps every request's params and decoded response."""
+
+    def __init__(self, api_url):
+        super().__init__(api_url)
+        self.exchanges = []
+
+    def get(self, params):
+        data = super().get(params)
+        with self.lock:
+            self.exchanges.append({"params": params, "response": data})
+        return data
+
+
+class ReplayClient(wiki_sync.ApiClient):
+    """ApiClient that answers from recorded exchanges instead of the network."""
+
+    def __init__(self, exchanges):
+        super().__init__("http://replay.invalid/api.php")
+        self.exchanges = exchanges
+
+    def get(self, params):
+        for exchange in self.exchanges:
+            if exchange["params"] == params:
+                with self.lock:
+                    self.requests += 1
+                return exchange["response"]
+        raise KeyError(f"no captured response for {params!r}")
+
+
+def load_responses():
+    """Captured exchanges by prop ("revisions", "info"); empty when none were captured."""
+    return {path.stem: json.loads(path.read_text(encoding="utf-8")) for path in sorted(RESPONSES.glob("*.json"))}
+
+
+def captured_pages():
+    """Page records of the captured prop=revisions responses."""
+    pages = []
+    for exchange in load_responses().get("revisions", []):
+        for page in exchange["response"].get("query", {}).get("pages", {}).values():
+            record = wiki_sync.page_record(page)
+            if record is not None:
+                pages.append(record)
+    return pages
+
+
+def capture(titles, api_url):
+    """
+    Writes the live wikitext of `titles` to FIXTURES and the API responses
+    behind it to RESPONSES; returns the titles written.
+    """
+    client = RecordingClient(api_url)
+    try:
+        pages = wiki_sync.fetch_pages(titles, client, workers=1)
+        wiki_sync.fetch_info(titles, client, workers=1)
+    finally:
+        client.close()
+    RESPONSES.mkdir(exist_ok=True)
+    for prop in ("revisions", "info"):
+        exchanges = [exchange for exchange in client.exchanges if exchange["params"]["prop"] == prop]
+        (RESPONSES / f"{prop}.json").write_text(json.dumps(exchanges, indent=1, ensure_ascii=False) + "\n",
+                                                encoding="utf-8")
+    written = []
+    for title, page in pages.items():
+        if page is None:
+            print(f"missing page: {title}")
+            continue
+        name = title.lower().replace(" ", "_").replace("/", "_")
+        (FIXTURES / f"{name}.wiki").write_text(page["content"], encoding="utf-8")
+        written.append(title)
+    return written
+
+
+def fuzz_text(rng, length):
+    pieces = ["{{", "}}", "{", "}", "[[", "]]", "[", "]", "|", " ", "\n", "=", "a", "Joker info", "Languages", "\t"]
+    return "".join(rng.choice(pieces) for _ in range(length))
+
+
+def check(pages, fuzz, seed):
+    rng = random.Random(seed)
+    texts = list(pages) + [fuzz_text(rng, rng.randint(0, 60)) for _ in range(fuzz)]
+    mismatches = 0
+    for text in texts:
+        index = wiki_sync.TemplateIndex(text)
+        for names in TEMPLATE_SETS + [["a"], ["Joker info", "a"]]:
+            expected = legacy_find_template(text, names)
+            if index.find(names) != expected or wiki_sync.find_template(text, names) != expected:
+                mismatches += 1
+                print(f"find_template mismatch for {names!r} in {text[:80]!r}")
+            if expected[1] is not None and wiki_sync.split_top_level(expected[1]) != legacy_split_top_level(expected[1]):
+                mismatches += 1
+                print(f"split_top_level mismatch in {expected[1][:80]!r}")
+        if wiki_sync.split_top_level(text) != legacy_split_top_level(text):
+            mismatches += 1
+            print(f"split_top_level mismatch in {text[:80]!r}")
+    return len(texts), mismatches
+
+
+def parse_legacy(text, templates):
+    name, content = legacy_find_template(text, templates)
+    if name:
+        legacy_split_top_level(content)
+        _, languages = legacy_find_template(text, ["Languages"])
+        if languages is not None:
+            legacy_split_top_level(languages)
+
+
+def parse_single_pass(text, templates):
+    index = wiki_sync.TemplateIndex(text)
+    name, content = index.find(templates)
+    if name:
+        wiki_sync.split_top_level(content)
+        _, languages = index.find(["Languages"])
+        if languages is not None:
+            wiki_sync.split_top_level(languages)
+
+
+def bench(parse, pages, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text in pages:
+            for templates in TEMPLATE_SETS[:3]:
+                parse(text, templates)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--generated", type=int, default=400, help="generated pages added to the fixtures")
+    parser.add_argument("--fuzz", type=int, default=50000, help="random brace/pipe strings for the equivalence check")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--capture", nargs="+", metavar="TITLE", help="save these live wiki pages and their API responses as fixtures")
+    parser.add_argument("--api-url", default=wiki_sync.API_URL)
+    args = parser.parse_args()
+
+    if args.capture:
+        written = capture(args.capture, args.api_url)
+        print(f"captured {len(written)} pages into {FIXTURES}")
+        return
+
+    pages = load_corpus(args.generated)
+    checked, mismatches = check(pages, args.fuzz, args.seed)
+    print(f"equivalence: {checked} texts, {mismatches} mismatches")
+
+    total_bytes = sum(len(text.encode("utf-8")) for text in pages)
+    legacy = bench(parse_legacy, pages, args.repeat)
+    single = bench(parse_single_pass, pages, args.repeat)
+    print(f"corpus: {len(pages)} pages, {total_bytes / 1024:.0f} KiB")
+    print(f"legacy:      {legacy * 1000:8.2f} ms  ({total_bytes * 3 / legacy / 2**20:6.1f} MiB/s)")
+    print(f"single-pass: {single * 1000:8.2f} ms  ({total_bytes * 3 / single / 2**20:6.1f} MiB/s, {legacy / single:.1f}x)")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Build the compact game-data catalog (engine/catalog.py) and compare it with
+loading the raw JSON.
+
+    python scripts/build_catalog.py                      # data/ -> data/catalog.bin
+    python scripts/build_catalog.py --report
+    python scripts/build_catalog.py --report --fake-wiki 400
+
+--report times the build, then measures in fresh interpreters the time and
+resident memory to (a) json-load data/jokers.json and every
+data/wiki/parsed/*.json and index them by id, name and internal id, and
+(b) open the catalog; both then look up the same sample of ids and names.
+--fake-wiki N first syncs scripts/fake_wiki_api.py's generated wiki with N
+pages per kind into a temporary data directory, for trees without a real
+wiki sync.
+"""
+import argparse
+import json
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+from engine.catalog import Catalog, build_catalog  # noqa: E402
+
+
+def rss_kib():
+    """Current resident set size in KiB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() // 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def load_raw(data_root):
+    """What the engine would do without a catalog: parse everything, build dict indexes."""
+    by_id, by_name, by_internal = {}, {}, {}
+    paths = [data_root / "jokers.json"] + sorted((data_root / "wiki" / "parsed").glob("*.json"))
+    for path in paths:
+        if not path.exists():
+            continue
+        for record in json.loads(path.read_text(encoding="utf-8")):
+            record_id = record.get("id") or record.get("internal_id") or f"{path.stem}:{record.get('pageid')}"
+            by_id.setdefault(record_id, record)
+            by_name.setdefault((record.get("name") or record.get("title")).casefold(), []).append(record)
+            if record.get("internal_id"):
+                by_internal.setdefault(record["internal_id"], record)
+    return by_id, by_name, by_internal
+
+
+def measure(mode, path, keys):
+    """Runs in a fresh interpreter: load by `mode`, look up `keys`, report time and RSS growth."""
+    before = rss_kib()
+    started = time.perf_counter()
+    if mode == "raw":
+        by_id, by_name, _ = load_raw(Path(path))
+        loaded = time.perf_counter()
+        found = sum(1 for key in keys["ids"] if key in by_id)
+        found += sum(1 for key in keys["names"] if key.casefold() in by_name)
+    else:
+        catalog = Catalog(path)
+        loaded = time.perf_counter()
+        found = sum(1 for key in keys["ids"] if catalog.get(key) is not None)
+        found += sum(1 for key in keys["names"] if catalog.by_name(key))
+    done = time.perf_counter()
+    return {
+        "load_ms": round((loaded - started) * 1000, 3),
+        "lookups": len(keys["ids"]) + len(keys["names"]),
+        "found": found,
+        "lookup_us": round((done - loaded) * 1e6 / max(1, len(keys["ids"]) + len(keys["names"])), 3),
+        "rss_kib": rss_kib() - before,
+    }
+
+
+def run_measure(mode, path, keys):
+    proc = subprocess.run(
+        [sys.executable, __file__, "--measure", mode, str(path)],
+        input=json.dumps(keys), capture_output=True, text=True, check=True,
+    )
+    return json.loads(proc.stdout)
+
+
+def fake_wiki_data(pages_per_kind, base):
+    import fake_wiki_api
+
+    data_root = base / "data"
+    wiki = fake_wiki_api.FakeWiki(pages_per_kind)
+    server = fake_wiki_api.FakeWikiServer(wiki, 0, 0.0).start()
+    try:
+        fake_wiki_api.run_sync(server, wiki, 4, 1000.0, data_root)
+    finally:
+        server.stop()
+    shutil.copy(REPO_ROOT / "data" / "jokers.json", data_root / "jokers.json")
+    return data_root
+
+
+def report(data_root, out_path, build_stats, build_ms, samples, seed):
+    with Catalog(out_path) as catalog:
+        entries = list(catalog)
+    rng = random.Random(seed)
+    picked = [rng.choice(entries) for _ in range(samples)] if entries else []
+    keys = {"ids": [entry.id for entry in picked], "names": [entry.name for entry in picked]}
+    raw_bytes = sum(path.stat().st_size for path in
+                    [data_root / "jokers.json"] + list((data_root / "wiki" / "parsed").glob("*.json"))
+                    if path.exists())
+    raw = run_measure("raw", data_root, keys)
+    compact = run_measure("catalog", out_path, keys)
+    print(f"catalog: {build_stats['entries']} entries, {build_stats['bytes']} bytes "
+          f"(raw JSON {raw_bytes} bytes), built in {build_ms:.1f} ms")
+    print(f"{'':10s} {'load ms':>10s} {'lookup us':>10s} {'RSS KiB':>10s}")
+    for name, result in (("raw json", raw), ("catalog", compact)):
+        print(f"{name:10s} {result['load_ms']:10.3f} {result['lookup_us']:10.3f} {result['rss_kib']:10d}")
+    return {"build": dict(build_stats, build_ms=round(build_ms, 3), raw_bytes=raw_bytes),
+            "raw": raw, "catalog": compact}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", type=Path, default=REPO_ROOT / "data")
+    parser.add_argument("--out", type=Path, help="catalog path (default: <data-dir>/catalog.bin)")
+    parser.add_argument("--report", action="store_true", help="compare build/load time and memory with raw JSON")
+    parser.add_argument("--fake-wiki", type=int, metavar="N", help="build from a generated wiki with N pages per kind")
+    parser.add_argument("--samples", type=int, default=1000, help="lookups per --report measurement")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print the --report result as JSON")
+    parser.add_argument("--measure", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        mode, path = args.measure
+        print(json.dumps(measure(mode, path, json.loads(sys.stdin.read()))))
+        return
+
+    temp_dir = None
+    data_root = args.data_dir.resolve()
+    if args.fake_wiki:
+        temp_dir = Path(tempfile.mkdtemp(prefix="catalog_"))
+        data_root = fake_wiki_data(args.fake_wiki, temp_dir)
+    out_path = args.out or data_root / "catalog.bin"
+    try:
+        started = time.perf_counter()
+        stats = build_catalog(data_root, out_path)
+        build_ms = (time.perf_counter() - started) * 1000
+        if not args.report:
+            print(f"wrote {out_path}: {stats['entries']} entries, {stats['bytes']} bytes, "
+                  f"{stats['duplicates']} duplicate ids skipped, {build_ms:.1f} ms")
+            return
+        result = report(data_root, out_path, stats, build_ms, args.samples, args.seed)
+        if args.json:
+            print(json.dumps(result, indent=2))
+    finally:
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    main()
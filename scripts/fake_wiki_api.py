@@ -0,0 +1,395 @@
+"""
+Fake MediaWiki API serving a generated wiki, for testing wiki_sync offline.
+
+    python scripts/fake_wiki_api.py --port 8080          # serve until Ctrl-C
+    python scripts/fake_wiki_api.py --check              # sync against it and verify
+    python scripts/fake_wiki_api.py --check --latency 20 --compare-unbatched
+    python scripts/fake_wiki_api.py --check --incremental
+    python scripts/fake_wiki_api.py --check --reparse
+
+The corpus has a category per wiki_sync kind with --pages-per-kind pages.
+Each page carries the kind's infobox template (with nested templates and
+piped links inside parameters) and a Languages template; a few pages lack
+the infobox, and every category also lists a redirect. Supported queries:
+list=categorymembers (with cmcontinue), prop=revisions (up to 50 titles,
+redirects, normalized) and prop=info.
+--latency adds a per-request delay to mimic a remote server.
+"""
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import wiki_sync  # noqa: E402
+
+MAX_TITLES = 50
+CATEGORY_PAGE_SIZE = 20
+
+
+def kind_label(kind):
+    return kind.replace("_", " ").title()
+
+
+def page_wikitext(kind, template, index, with_infobox=True):
+    name = f"{kind_label(kind)} {index}"
+    infobox = (
+        f"{{{{{template}\n"
+        f"|name={name}\n"
+        f"|effect={{{{Mult|+{index}}}}} Mult, see [[Scoring|how scoring works]]\n"
+        f"|rarity={('Common', 'Uncommon', 'Rare')[index % 3]}\n"
+        f"|cost=${3 + index % 7}\n"
+        f"|image={kind}_{index}.png\n"
+        f"}}}}\n"
+    )
+    body = (
+        f"'''{name}''' is a {kind[:-1]} used in tests.\n\n"
+        f"== Behaviour ==\nGives {{{{Chips|{index * 10}}}}} when [[Played Cards|played]].\n\n"
+        f"{{{{Languages\n|internal=fake_{kind}_{index}\n|en={name}\n|fr={name} (fr)\n}}}}\n"
+    )
+    return (infobox if with_infobox else "") + body
+
+
+class FakeWiki:
+    """The generated corpus: titles, page ids, revisions and category membership."""
+
+    def __init__(self, pages_per_kind=40):
+        self.pages = {}          # title -> {"pageid", "revid", "timestamp", "content"}
+        self.categories = {}     # category -> [titles]
+        self.redirects = {}      # title -> target title
+        self.expected = {}       # kind -> {title: internal id} for pages with an infobox
+        self.lock = threading.Lock()
+        next_id = 1000
+        for kind_cfg in wiki_sync.KINDS:
+            kind = kind_cfg["kind"]
+            template = kind_cfg["templates"][0]
+            category = kind_cfg["categories"][0]
+            members = []
+            self.expected[kind] = {}
+            for index in range(pages_per_kind):
+                title = f"{kind_label(kind)} {index}"
+                with_infobox = index % 17 != 5
+                next_id += 1
+                self.pages[title] = {
+                    "pageid": next_id,
+                    "revid": next_id * 10,
+                    "timestamp": "2024-01-01T00:00:00Z",
+                    "content": page_wikitext(kind, template, index, with_infobox),
+                }
+                members.append(title)
+                if with_infobox:
+                    self.expected[kind][title] = f"fake_{kind}_{index}"
+            # A redirect listed in the category resolves to a real page.
+            redirect = f"{kind_label(kind)} alias"
+            self.redirects[redirect] = members[0]
+            members.append(redirect)
+            self.categories[category] = members
+            for title in kind_cfg.get("extra_titles", []):
+                next_id += 1
+                self.pages[title] = {
+                    "pageid": next_id,
+                    "revid": next_id * 10,
+                    "timestamp": "2024-01-01T00:00:00Z",
+                    "content": page_wikitext(kind, template, next_id),
+                }
+                self.expected[kind][title] = f"fake_{kind}_{next_id}"
+
+    def edit(self, title, content=None):
+        """Bumps a page's revision (and optionally replaces its text)."""
+        with self.lock:
+            page = self.pages[title]
+            page["revid"] += 1
+            if content is not None:
+                page["content"] = content
+
+    # -- API ----------------------------------------------------------------
+
+    def query(self, params):
+        if params.get("action") != "query":
+            return {"error": {"code": "badvalue", "info": "only action=query is supported"}}
+        if params.get("list") == "categorymembers":
+            return self._category_members(params)
+        if params.get("prop") in ("revisions", "info"):
+            return self._pages(params)
+        return {"error": {"code": "badvalue", "info": "unsupported query"}}
+
+    def _category_members(self, params):
+        members = self.categories.get(params.get("cmtitle"), [])
+        start = int(params.get("cmcontinue", 0))
+        limit = min(int(params.get("cmlimit", 10)), CATEGORY_PAGE_SIZE)
+        chunk = members[start : start + limit]
+        data = {"query": {"categorymembers": [{"ns": 0, "title": title} for title in chunk]}}
+        if start + limit < len(members):
+            data["continue"] = {"cmcontinue": str(start + limit), "continue": "-||"}
+        return data
+
+    def _pages(self, params):
+        titles = params.get("titles", "").split("|")
+        if len(titles) > MAX_TITLES:
+            return {"error": {"code": "toomanyvalues", "info": f"Too many values supplied for parameter \"titles\". The limit is {MAX_TITLES}."}}
+        normalized = []
+        redirects = []
+        pages = {}
+        missing = -1
+        for title in titles:
+            target = title
+            if "_" in target:
+                normalized.append({"from": target, "to": target.replace("_", " ")})
+                target = target.replace("_", " ")
+            if params.get("redirects") and target in self.redirects:
+                redirects.append({"from": target, "to": self.redirects[target]})
+                target = self.redirects[target]
+            with self.lock:
+                page = dict(self.pages[target]) if target in self.pages else None
+            if page is None:
+                pages[str(missing)] = {"ns": 0, "title": target, "missing": ""}
+                missing -= 1
+                continue
+            entry = {"pageid": page["pageid"], "ns": 0, "title": target}
+            if params["prop"] == "info":
+                entry["lastrevid"] = page["revid"]
+                entry["length"] = len(page["content"])
+            else:
+                entry["revisions"] = [{
+                    "revid": page["revid"],
+                    "timestamp": page["timestamp"],
+                    "slots": {"main": {"contentmodel": "wikitext", "*": page["content"]}},
+                }]
+            pages[str(page["pageid"])] = entry
+        query = {"pages": pages}
+        if normalized:
+            query["normalized"] = normalized
+        if redirects:
+            query["redirects"] = redirects
+        return {"batchcomplete": "", "query": query}
+
+
+class FakeWikiServer:
+    """Serves a FakeWiki over keep-alive HTTP on a background thread."""
+
+    def __init__(self, wiki, port=0, latency=0.0):
+        self.wiki = wiki
+        self.latency = latency
+        self.requests = 0
+        self.connections = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                server.connections += 1
+
+            def do_GET(self):
+                url = urllib.parse.urlsplit(self.path)
+                params = dict(urllib.parse.parse_qsl(url.query))
+                server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                body = json.dumps(server.wiki.query(params)).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def api_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/api.php"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def verify(wiki, data_root):
+    """Compares a synced data directory with the corpus; returns a list of problems."""
+    problems = []
+    for kind, expected in wiki.expected.items():
+        records = json.loads((data_root / "wiki" / "parsed" / f"{kind}.json").read_text(encoding="utf-8"))
+        got = {record["title"]: record.get("internal_id") for record in records}
+        if got != expected:
+            problems.append(f"{kind}: {len(set(got.items()) ^ set(expected.items()))} mismatched records")
+        for record in records:
+            page = wiki.pages[record["title"]]
+            if record["revid"] != page["revid"] or record["pageid"] != page["pageid"]:
+                problems.append(f"{kind}: stale ids for {record['title']}")
+            if record["params"].get("name") != record["title"] and record["title"] in wiki.redirects.values():
+                problems.append(f"{kind}: wrong params for {record['title']}")
+    return problems
+
+
+def run_sync(server, wiki, workers, rate, data_root=None, incremental=False):
+    own_dir = data_root is None
+    if own_dir:
+        data_root = Path(tempfile.mkdtemp(prefix="wiki_sync_")) / "data"
+    requests_before = server.requests
+    client = wiki_sync.ApiClient(server.api_url, rate=rate)
+    started = time.perf_counter()
+    try:
+        meta = wiki_sync.sync(client, data_root, workers, incremental)
+    finally:
+        client.close()
+    elapsed = time.perf_counter() - started
+    problems = verify(wiki, data_root)
+    if own_dir:
+        shutil.rmtree(data_root.parent)
+    return {
+        "pages": len(meta["pages"]),
+        "downloaded": meta["sync"]["fetched"],
+        "reused": meta["sync"]["reused"],
+        "pruned": meta["sync"]["pruned"],
+        "requests": server.requests - requests_before,
+        "elapsed_s": round(elapsed, 3),
+        "pages_per_s": round(len(meta["pages"]) / elapsed, 1),
+        "problems": problems,
+    }
+
+
+def check_incremental(server, wiki, workers, rate):
+    """
+    Full sync, no-op incremental sync, then edits (changed, new, removed
+    pages) and another incremental sync, whose output must equal a fresh
+    full sync.
+    """
+    base = Path(tempfile.mkdtemp(prefix="wiki_sync_"))
+    data_root = base / "data"
+    report = {"full": run_sync(server, wiki, workers, rate, data_root)}
+    report["noop"] = run_sync(server, wiki, workers, rate, data_root, incremental=True)
+
+    kind_cfg = wiki_sync.KINDS[0]
+    category = kind_cfg["categories"][0]
+    members = wiki.categories[category]
+    wiki.edit(members[1])
+    wiki.edit(members[2], wiki.pages[members[2]]["content"].replace("|rarity=", "|rarity=Legendary"))
+    removed = members.pop(3)
+    wiki.expected[kind_cfg["kind"]].pop(removed, None)
+    new_title = f"{kind_label(kind_cfg['kind'])} new"
+    wiki.pages[new_title] = {
+        "pageid": 999999,
+        "revid": 9999990,
+        "timestamp": "2024-02-01T00:00:00Z",
+        "content": page_wikitext(kind_cfg["kind"], kind_cfg["templates"][0], 999),
+    }
+    wiki.expected[kind_cfg["kind"]][new_title] = f"fake_{kind_cfg['kind']}_999"
+    members.append(new_title)
+    report["changed"] = run_sync(server, wiki, workers, rate, data_root, incremental=True)
+
+    fresh = base / "fresh" / "data"
+    run_sync(server, wiki, workers, rate, fresh)
+    for kind_cfg in wiki_sync.KINDS:
+        name = f"{kind_cfg['kind']}.json"
+        if (data_root / "wiki" / "parsed" / name).read_text() != (fresh / "wiki" / "parsed" / name).read_text():
+            report["changed"]["problems"].append(f"{kind_cfg['kind']}: differs from a full sync")
+    raw_files = sorted(p.relative_to(data_root) for p in (data_root / "wiki" / "raw").rglob("*.wiki"))
+    fresh_files = sorted(p.relative_to(fresh) for p in (fresh / "wiki" / "raw").rglob("*.wiki"))
+    if raw_files != fresh_files:
+        report["changed"]["problems"].append("raw cache differs from a full sync")
+    shutil.rmtree(base)
+    return report
+
+
+def check_reparse(server, wiki, workers, rate):
+    """
+    Full sync, then an offline reparse of its raw cache with the server
+    stopped answering: parsed files must come out byte-identical.
+    """
+    base = Path(tempfile.mkdtemp(prefix="wiki_sync_"))
+    data_root = base / "data"
+    run_sync(server, wiki, workers, rate, data_root)
+    parsed_root = data_root / "wiki" / "parsed"
+    synced = {path.name: path.read_bytes() for path in parsed_root.glob("*.json")}
+    synced_meta = json.loads((data_root / "wiki" / "meta.json").read_text())
+
+    requests_before = server.requests
+    started = time.perf_counter()
+    meta = wiki_sync.reparse(data_root, workers)
+    elapsed = time.perf_counter() - started
+    problems = verify(wiki, data_root)
+    for name, content in synced.items():
+        if (parsed_root / name).read_bytes() != content:
+            problems.append(f"{name}: differs from the synced file")
+    for key in ("counts", "pages", "missing_pages", "missing_templates"):
+        if meta[key] != synced_meta[key]:
+            problems.append(f"meta.json: {key} differs from the sync")
+    if server.requests != requests_before:
+        problems.append("reparse made network requests")
+    shutil.rmtree(base)
+    return {
+        "reparse": {
+            "pages": meta["reparse"]["pages"],
+            "elapsed_s": round(elapsed, 3),
+            "pages_per_s": round(meta["reparse"]["pages"] / elapsed, 1),
+            "problems": problems,
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--pages-per-kind", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.0, help="ms added to every request")
+    parser.add_argument("--check", action="store_true", help="sync against the fake wiki and verify the output")
+    parser.add_argument("--compare-unbatched", action="store_true",
+                        help="with --check: also time one title per request on one connection")
+    parser.add_argument("--incremental", action="store_true",
+                        help="with --check: also check no-op and changed incremental syncs")
+    parser.add_argument("--reparse", action="store_true",
+                        help="with --check: also check that an offline reparse reproduces the sync")
+    parser.add_argument("--workers", type=int, default=wiki_sync.WORKERS)
+    parser.add_argument("--rate", type=float, default=1000.0, help="client requests per second for --check")
+    args = parser.parse_args()
+
+    wiki = FakeWiki(args.pages_per_kind)
+    server = FakeWikiServer(wiki, 0 if args.check else args.port, args.latency / 1000).start()
+    if not args.check:
+        print(f"Fake wiki API on {server.api_url}", flush=True)
+        try:
+            server.thread.join()
+        except KeyboardInterrupt:
+            pass
+        server.stop()
+        return
+
+    report = {"batched": run_sync(server, wiki, args.workers, args.rate)}
+    if args.compare_unbatched:
+        batch_size = wiki_sync.MAX_TITLES_PER_QUERY
+        wiki_sync.MAX_TITLES_PER_QUERY = 1
+        try:
+            report["unbatched"] = run_sync(server, wiki, 1, args.rate)
+        finally:
+            wiki_sync.MAX_TITLES_PER_QUERY = batch_size
+    if args.incremental:
+        report.update(check_incremental(server, wiki, args.workers, args.rate))
+    if args.reparse:
+        report.update(check_reparse(server, wiki, args.workers, args.rate))
+    report["connections"] = server.connections
+    server.stop()
+    print(json.dumps(report, indent=2))
+    if any(result["problems"] for result in report.values() if isinstance(result, dict)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
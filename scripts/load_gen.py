@@ -0,0 +1,95 @@
+"""
+Load generator for server.py: measures recommendations/second and latency.
+
+    python server.py --port 8765 &
+    python scripts/load_gen.py --port 8765 --clients 16 --duration 10 --states 500
+
+Each client thread holds one keep-alive connection and posts states drawn
+from a pool of --states synthetic states (smaller pools mean more repeats,
+i.e. more cache hits on the server).
+"""
+import argparse
+import http.client
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+from replay_stream import generate_states, percentile  # noqa: E402
+
+
+def run_client(host, port, bodies, deadline, seed, latencies, errors):
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    while time.perf_counter() < deadline:
+        body = rng.choice(bodies)
+        started = time.perf_counter()
+        try:
+            conn.request("POST", "/recommend", body, {"Content-Type": "application/json"})
+            response = conn.getresponse()
+            payload = json.loads(response.read())
+        except (OSError, http.client.HTTPException):
+            errors.append(1)
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+            continue
+        if response.status != 200 or "error" in payload:
+            errors.append(1)
+        else:
+            latencies.append((time.perf_counter() - started) * 1000)
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--states", type=int, default=500, help="distinct states in the pool")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    bodies = [json.dumps(state) for state in generate_states(args.states, args.seed)]
+    latencies, errors = [], []
+    deadline = time.perf_counter() + args.duration
+    threads = [
+        threading.Thread(target=run_client,
+                         args=(args.host, args.port, bodies, deadline, args.seed + i, latencies, errors))
+        for i in range(args.clients)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    report = {
+        "clients": args.clients,
+        "distinct_states": len(bodies),
+        "requests": len(latencies),
+        "errors": len(errors),
+        "elapsed_s": round(elapsed, 3),
+        "recommendations_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "mean_ms": round(statistics.fmean(latencies), 3) if latencies else None,
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['requests']} recommendations in {report['elapsed_s']} s "
+              f"({report['recommendations_per_s']}/s, {args.clients} clients, {report['errors']} errors)")
+        print(f"latency p50 {report['p50_ms']} ms, p99 {report['p99_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
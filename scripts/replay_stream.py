@@ -0,0 +1,149 @@
+"""
+Replay a recorded state stream into `main.py --stream` and report latency.
+
+    python scripts/replay_stream.py recording.jsonl --rate 20
+    python scripts/replay_stream.py --generate 200 --rate 50 --seed 3
+
+Each recorded line is a state in the state_example.json shape. Lines are
+tagged with a "seq" and written at --rate states/second (0 = as fast as
+possible); the spectator echoes "seq" back, so end-to-end latency is the
+time from writing a state to reading its recommendation. Coalesced or
+cancelled states have no recommendation and are reported separately.
+"""
+import argparse
+import json
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from engine.scoring import RANKS, SUITS  # noqa: E402
+
+
+def generate_states(count, seed):
+    """Synthetic spectator feed: a blind played out with draws and discards."""
+    rng = random.Random(seed)
+    states = []
+    while len(states) < count:
+        deck = [f"{r} of {s}" for s in SUITS for r in RANKS]
+        rng.shuffle(deck)
+        hand, deck = deck[:8], deck[8:]
+        required = rng.choice([300, 450, 600, 800, 1200])
+        score = 0
+        for _ in range(rng.randint(3, 7)):
+            states.append({
+                "ante": 1,
+                "money": rng.randint(0, 20),
+                "required_score": required,
+                "current_score": score,
+                "hands_left": rng.randint(1, 4),
+                "discards_left": rng.randint(0, 3),
+                "hand": list(hand),
+                "deck": list(deck),
+                "jokers": [{"id": "j_joker", "name": "Joker", "type": "add_mult", "value": 4}],
+            })
+            swap = rng.randint(1, 5)
+            hand = hand[swap:] + deck[:swap]
+            deck = deck[swap:]
+            score += rng.randint(40, 300)
+    return states[:count]
+
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recording", nargs="?", help="JSONL file of recorded states")
+    parser.add_argument("--generate", type=int, default=0, help="replay N synthetic states instead of a recording")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--rate", type=float, default=20.0, help="states per second, 0 for no pacing")
+    parser.add_argument("--warmup", type=float, default=1.0, help="seconds to let the spectator start")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    if args.recording:
+        with open(args.recording, "r", encoding="utf-8") as f:
+            states = [json.loads(line) for line in f if line.strip()]
+    elif args.generate:
+        states = generate_states(args.generate, args.seed)
+    else:
+        parser.error("give a recording or --generate N")
+
+    proc = subprocess.Popen(
+        [sys.executable, str(REPO_ROOT / "main.py"), "--stream"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        text=True, bufsize=1, cwd=str(REPO_ROOT),
+    )
+    sent_at = {}
+    latencies = []
+    engine_latencies = []
+
+    def read_output():
+        for line in proc.stdout:
+            received = time.perf_counter()
+            payload = json.loads(line)
+            seq = payload.get("seq")
+            if seq in sent_at:
+                latencies.append((received - sent_at[seq]) * 1000)
+                engine_latencies.append(payload.get("latency_ms", 0.0))
+
+    reader = threading.Thread(target=read_output, daemon=True)
+    reader.start()
+    time.sleep(args.warmup)
+
+    interval = 1.0 / args.rate if args.rate > 0 else 0.0
+    started = time.perf_counter()
+    for seq, state in enumerate(states):
+        if interval:
+            delay = started + seq * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        state = dict(state, seq=seq)
+        sent_at[seq] = time.perf_counter()
+        proc.stdin.write(json.dumps(state) + "\n")
+        proc.stdin.flush()
+    proc.stdin.close()
+    proc.wait()
+    reader.join()
+    elapsed = time.perf_counter() - started
+    stats_line = [line for line in proc.stderr.read().splitlines() if line.startswith('{"stats"')]
+    spectator_stats = json.loads(stats_line[-1])["stats"] if stats_line else {}
+
+    report = {
+        "states": len(states),
+        "rate": args.rate,
+        "answered": len(latencies),
+        "dropped": len(states) - len(latencies),
+        "elapsed_s": round(elapsed, 3),
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "max_ms": round(max(latencies), 3) if latencies else None,
+        "mean_ms": round(statistics.fmean(latencies), 3) if latencies else None,
+        "engine_p50_ms": round(percentile(engine_latencies, 0.50), 3),
+        "spectator": spectator_stats,
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"states {report['states']} at {args.rate}/s: answered {report['answered']}, "
+              f"dropped {report['dropped']} (coalesced/cancelled)")
+        print(f"end-to-end latency p50 {report['p50_ms']} ms, p99 {report['p99_ms']} ms, max {report['max_ms']} ms")
+        print(f"spectator: {spectator_stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Play thousands of headless runs (engine/run_simulator.py) per policy across
+a process pool and stream per-run results and aggregate statistics to disk.
+
+    python scripts/simulate_runs.py --runs 2000 --policy engine --policy greedy
+    python scripts/simulate_runs.py --runs 500 --policy engine --policy planner --workers 8 --out ab.jsonl
+
+Run i of every policy uses the same seed, derived from --seed and i, so a
+run replays identically in any worker and policies are compared on paired
+runs (same decks and shops). Each finished run is appended to --out as one
+JSON line as soon as it completes; <out>.summary.json is rewritten every
+--summary-every runs and at the end with per-policy win rate (95% CI),
+ante reached histogram, mean blinds cleared and runs/minute, plus the
+paired difference between the first two policies.
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from engine.run_simulator import POLICIES, RunConfig, RunSimulator  # noqa: E402
+
+_simulators = {}
+_config = None
+
+
+def run_seed(base, index):
+    """Per-run seed: stable across processes, Python versions and PYTHONHASHSEED."""
+    digest = hashlib.blake2b(f"{base}:{index}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") >> 1
+
+
+def _init_worker(config):
+    global _config
+    _config = config
+    _simulators.clear()
+
+
+def _play(task):
+    policy, index, seed = task
+    simulator = _simulators.get(policy)
+    if simulator is None:
+        simulator = _simulators[policy] = RunSimulator(POLICIES[policy], _config)
+    row = simulator.play(seed).to_dict()
+    row["run"] = index
+    return row
+
+
+class Aggregate:
+    """Running per-policy statistics; paired differences fold as both runs of a seed arrive."""
+
+    def __init__(self, policies, antes):
+        self.policies = policies
+        self.antes = antes
+        self.started = time.perf_counter()
+        self.stats = {p: {"runs": 0, "wins": 0, "blinds": 0, "hands": 0, "discards": 0, "cpu_s": 0.0,
+                          "ante_reached": [0] * (antes + 1)} for p in policies}
+        self.pending = {}
+        self.paired = {"runs": 0, "blinds_diff": 0.0, "blinds_diff_sq": 0.0, "a_only_wins": 0, "b_only_wins": 0}
+
+    def add(self, row):
+        stats = self.stats[row["policy"]]
+        stats["runs"] += 1
+        stats["wins"] += row["won"]
+        stats["blinds"] += row["blinds_cleared"]
+        stats["hands"] += row["hands_played"]
+        stats["discards"] += row["discards_used"]
+        stats["cpu_s"] += row["elapsed"]
+        stats["ante_reached"][min(row["ante"], self.antes)] += 1
+        if len(self.policies) < 2 or row["policy"] not in self.policies[:2]:
+            return
+        other = self.pending.pop(row["run"], None)
+        if other is None:
+            self.pending[row["run"]] = row
+            return
+        a, b = (row, other) if row["policy"] == self.policies[0] else (other, row)
+        diff = a["blinds_cleared"] - b["blinds_cleared"]
+        self.paired["runs"] += 1
+        self.paired["blinds_diff"] += diff
+        self.paired["blinds_diff_sq"] += diff * diff
+        self.paired["a_only_wins"] += a["won"] and not b["won"]
+        self.paired["b_only_wins"] += b["won"] and not a["won"]
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        total = sum(s["runs"] for s in self.stats.values())
+        policies = {}
+        for name, s in self.stats.items():
+            n = s["runs"]
+            rate = s["wins"] / n if n else 0.0
+            half = 1.96 * math.sqrt(rate * (1 - rate) / n) if n else 0.0
+            policies[name] = {
+                "runs": n,
+                "win_rate": round(rate, 4),
+                "win_rate_ci95": [round(max(0.0, rate - half), 4), round(min(1.0, rate + half), 4)],
+                "mean_ante": round(sum(a * c for a, c in enumerate(s["ante_reached"])) / n, 3) if n else None,
+                "mean_blinds_cleared": round(s["blinds"] / n, 3) if n else None,
+                "ante_reached": {str(a): c for a, c in enumerate(s["ante_reached"]) if c},
+                "hands_per_run": round(s["hands"] / n, 2) if n else None,
+                "discards_per_run": round(s["discards"] / n, 2) if n else None,
+                "cpu_s_per_run": round(s["cpu_s"] / n, 3) if n else None,
+            }
+        result = {
+            "runs": total,
+            "elapsed_s": round(elapsed, 1),
+            "runs_per_minute": round(total * 60 / elapsed, 1) if elapsed > 0 else None,
+            "policies": policies,
+        }
+        n = self.paired["runs"]
+        if n:
+            mean = self.paired["blinds_diff"] / n
+            var = max(0.0, self.paired["blinds_diff_sq"] / n - mean * mean) * n / max(1, n - 1)
+            result["paired"] = {
+                "a": self.policies[0],
+                "b": self.policies[1],
+                "runs": n,
+                "blinds_cleared_diff": round(mean, 3),
+                "blinds_cleared_diff_se": round(math.sqrt(var / n), 3),
+                "a_only_wins": self.paired["a_only_wins"],
+                "b_only_wins": self.paired["b_only_wins"],
+            }
+        return result
+
+
+def write_summary(path, summary):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def print_summary(summary):
+    print(f"{summary['runs']} runs in {summary['elapsed_s']} s ({summary['runs_per_minute']} runs/min)")
+    print(f"{'policy':10s} {'runs':>6s} {'win rate':>9s} {'95% CI':>16s} {'ante':>6s} {'blinds':>7s} {'s/run':>7s}")
+    for name, p in summary["policies"].items():
+        low, high = p["win_rate_ci95"]
+        print(f"{name:10s} {p['runs']:6d} {p['win_rate']:9.3f} {f'[{low:.3f}, {high:.3f}]':>16s} "
+              f"{p['mean_ante'] or 0:6.2f} {p['mean_blinds_cleared'] or 0:7.2f} {p['cpu_s_per_run'] or 0:7.2f}")
+    paired = summary.get("paired")
+    if paired:
+        print(f"paired {paired['a']} - {paired['b']} over {paired['runs']} seeds: blinds cleared "
+              f"{paired['blinds_cleared_diff']:+.3f} +/- {paired['blinds_cleared_diff_se']:.3f}, "
+              f"wins only {paired['a']} {paired['a_only_wins']}, only {paired['b']} {paired['b_only_wins']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=1000, help="runs per policy")
+    parser.add_argument("--policy", action="append", choices=sorted(POLICIES),
+                        help="policy to evaluate; repeat to compare (default: engine)")
+    parser.add_argument("--seed", type=int, default=1, help="base seed; run i uses a seed derived from it")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunksize", type=int, default=1, help="runs per task sent to a worker")
+    parser.add_argument("--out", type=Path, default=Path("runs.jsonl"), help="per-run JSONL output")
+    parser.add_argument("--summary-every", type=int, default=100, help="rewrite the summary every N runs")
+    parser.add_argument("--antes", type=int, default=RunConfig.antes)
+    parser.add_argument("--discard-samples", type=int, default=RunConfig.discard_samples,
+                        help="draws per discard race; lower is faster and noisier")
+    parser.add_argument("--json", action="store_true", help="print the final summary as JSON")
+    args = parser.parse_args()
+
+    policies = list(dict.fromkeys(args.policy or ["engine"]))
+    config = RunConfig(antes=args.antes, discard_samples=args.discard_samples)
+    # Interleave policies per seed so paired statistics fill in as the runs stream.
+    tasks = [(policy, i, run_seed(args.seed, i)) for i in range(args.runs) for policy in policies]
+    summary_path = args.out.with_name(args.out.name + ".summary.json")
+    aggregate = Aggregate(policies, args.antes)
+
+    with open(args.out, "w", encoding="utf-8") as out:
+        if args.workers <= 1:
+            _init_worker(config)
+            rows = map(_play, tasks)
+            pool = None
+        else:
+            pool = ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(config,))
+            rows = pool.map(_play, tasks, chunksize=args.chunksize)
+        try:
+            for done, row in enumerate(rows, 1):
+                out.write(json.dumps(row) + "\n")
+                out.flush()
+                aggregate.add(row)
+                if done % args.summary_every == 0:
+                    write_summary(summary_path, aggregate.summary())
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+    summary = aggregate.summary()
+    write_summary(summary_path, summary)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_summary(summary)
+        print(f"runs: {args.out}, summary: {summary_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
+import argparse
+import http.client
 import json
+import re
+import threading
 import time
 import urllib.parse
-import urllib.request
-import urllib.error
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -10,8 +13,14 @@ BASE_URL = "https://balatrowiki.org"
 API_URL = f"{BASE_URL}/api.php"
 USER_AGENT = "balatro-spectator/0.1 (local scraper)"
 
-REQUEST_DELAY = 0.15
 MAX_RETRIES = 3
+# The MediaWiki API accepts up to 50 titles per query for normal clients.
+MAX_TITLES_PER_QUERY = 50
+WORKERS = 4
+REQUESTS_PER_SECOND = 5.0
+REQUEST_BURST = 2
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+REPARSE_CHUNK = 16  # raw pages per process-pool task
 
 KINDS = [
     {
@@ -72,26 +81,139 @@ KINDS = [
 ]
 
 
-def api_get(params):
-    query = urllib.parse.urlencode(params)
-    url = f"{API_URL}?{query}"
-    for attempt in range(MAX_RETRIES):
-        req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
-        try:
-            with urllib.request.urlopen(req) as resp:
-                return json.loads(resp.read().decode("utf-8"))
-        except urllib.error.HTTPError as exc:
-            if exc.code in (429, 500, 502, 503, 504):
+class TokenBucket:
+    """Shared rate limit: `rate` requests per second with bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class ApiClient:
+    """
+    MediaWiki API client: one keep-alive connection per thread, every
+    request (from any thread) paced by one shared token bucket. map() runs
+    requests on a thread pool owned by the client, so the same threads and
+    their connections serve every phase of a sync until close().
+    """
+
+    def __init__(self, api_url=API_URL, rate=REQUESTS_PER_SECOND, burst=REQUEST_BURST):
+        url = urllib.parse.urlsplit(api_url)
+        self.scheme = url.scheme
+        self.host = url.netloc
+        self.path = url.path or "/"
+        self.bucket = TokenBucket(rate, burst)
+        self.local = threading.local()
+        self.connections = []
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.pool = None
+        self.pool_size = 0
+
+    def _connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            if self.scheme == "https":
+                conn = http.client.HTTPSConnection(self.host, timeout=30)
+            else:
+                conn = http.client.HTTPConnection(self.host, timeout=30)
+            self.local.conn = conn
+            with self.lock:
+                self.connections.append(conn)
+        return conn
+
+    def _reset(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is not None:
+            conn.close()
+        self.local.conn = None
+
+    def get(self, params):
+        url = f"{self.path}?{urllib.parse.urlencode(params)}"
+        headers = {"User-Agent": USER_AGENT, "Connection": "keep-alive"}
+        for attempt in range(MAX_RETRIES):
+            self.bucket.acquire()
+            with self.lock:
+                self.requests += 1
+            try:
+                conn = self._connection()
+                conn.request("GET", url, headers=headers)
+                resp = conn.getresponse()
+                body = resp.read()
+            except (OSError, http.client.HTTPException):
+                # Dropped keep-alive connection or network error: reconnect.
+                self._reset()
                 time.sleep(1.0 + attempt)
                 continue
-            raise
-        except urllib.error.URLError:
-            time.sleep(1.0 + attempt)
-            continue
-    raise RuntimeError(f"Failed API request after {MAX_RETRIES} retries: {url}")
-
-
-def get_category_members(category_title):
+            if resp.status in RETRY_STATUSES:
+                retry_after = resp.getheader("Retry-After")
+                time.sleep(float(retry_after) if retry_after and retry_after.isdigit() else 1.0 + attempt)
+                continue
+            if resp.status != 200:
+                raise RuntimeError(f"API request failed with HTTP {resp.status}: {url}")
+            data = json.loads(body.decode("utf-8"))
+            if "error" in data:
+                error = data["error"]
+                raise RuntimeError(f"API error {error.get('code')}: {error.get('info')}")
+            return data
+        raise RuntimeError(f"Failed API request after {MAX_RETRIES} retries: {url}")
+
+    def map(self, fn, items, workers=WORKERS):
+        """fn(item) for each item, in order, on the client's pool of `workers` threads."""
+        items = list(items)
+        if workers <= 1 or len(items) <= 1:
+            return [fn(item) for item in items]
+        with self.lock:
+            if self.pool is None or self.pool_size < workers:
+                if self.pool is not None:
+                    self.pool.shutdown()
+                self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="wiki-sync")
+                self.pool_size = workers
+            pool = self.pool
+        return list(pool.map(fn, items))
+
+    def close(self):
+        with self.lock:
+            pool, self.pool, self.pool_size = self.pool, None, 0
+        if pool is not None:
+            pool.shutdown()
+        with self.lock:
+            connections, self.connections = self.connections, []
+        for conn in connections:
+            conn.close()
+        self.local = threading.local()
+
+
+_default_client = None
+
+
+def default_client():
+    global _default_client
+    if _default_client is None:
+        _default_client = ApiClient()
+    return _default_client
+
+
+def api_get(params, client=None):
+    return (client or default_client()).get(params)
+
+
+def get_category_members(category_title, client=None):
     members = []
     cont = None
     while True:
@@ -104,31 +226,18 @@ def get_category_members(category_title):
         }
         if cont:
             params["cmcontinue"] = cont
-        data = api_get(params)
+        data = api_get(params, client)
         for entry in data.get("query", {}).get("categorymembers", []):
             if entry.get("ns") == 0:
                 members.append(entry["title"])
         cont = data.get("continue", {}).get("cmcontinue")
         if not cont:
             break
-        time.sleep(REQUEST_DELAY)
     return members
 
 
-def fetch_page(title):
-    params = {
-        "action": "query",
-        "format": "json",
-        "prop": "revisions",
-        "rvprop": "content|ids|timestamp",
-        "rvslots": "main",
-        "redirects": "1",
-        "titles": title,
-    }
-    data = api_get(params)
-    pages = data.get("query", {}).get("pages", {})
-    page = next(iter(pages.values()), None)
-    if not page or "missing" in page:
+def page_record(page):
+    if not page or "missing" in page or "invalid" in page:
         return None
     revisions = page.get("revisions")
     if not revisions:
@@ -145,88 +254,181 @@ def fetch_page(title):
     }
 
 
+def resolve_titles(query, titles):
+    """Maps each requested title to the page title after normalization and redirects."""
+    normalized = {entry["from"]: entry["to"] for entry in query.get("normalized", [])}
+    redirects = {entry["from"]: entry["to"] for entry in query.get("redirects", [])}
+    resolved = {}
+    for title in titles:
+        target = normalized.get(title, title)
+        seen = set()
+        while target in redirects and target not in seen:
+            seen.add(target)
+            target = redirects[target]
+        resolved[title] = target
+    return resolved
+
+
+def query_batch(titles, params, client=None):
+    """
+    One multi-title query (up to MAX_TITLES_PER_QUERY titles, following
+    redirects); returns title -> page object, None when absent.
+    """
+    params = {
+        "action": "query",
+        "format": "json",
+        "redirects": "1",
+        **params,
+        "titles": "|".join(titles),
+    }
+    by_title = {}
+    query = {}
+    cont = {}
+    while True:
+        # Large batches may come back in parts; follow "continue" until done.
+        data = api_get({**params, **cont}, client)
+        part = data.get("query", {})
+        for key in ("normalized", "redirects"):
+            query.setdefault(key, []).extend(part.get(key, []))
+        for page in part.get("pages", {}).values():
+            title = page.get("title")
+            if title not in by_title or "revisions" in page:
+                by_title[title] = page
+        cont = data.get("continue", {})
+        if not cont:
+            break
+    resolved = resolve_titles(query, titles)
+    return {title: by_title.get(resolved[title]) for title in titles}
+
+
+def fetch_batch(titles, client=None):
+    """One prop=revisions query; title -> page record or None."""
+    pages = query_batch(titles, {"prop": "revisions", "rvprop": "content|ids|timestamp", "rvslots": "main"}, client)
+    return {title: page_record(page) for title, page in pages.items()}
+
+
+def fetch_info_batch(titles, client=None):
+    """One prop=info query; title -> {"pageid", "title", "revid"} or None when missing."""
+    pages = query_batch(titles, {"prop": "info"}, client)
+    info = {}
+    for title, page in pages.items():
+        if not page or "missing" in page or "invalid" in page:
+            info[title] = None
+        else:
+            info[title] = {"pageid": page.get("pageid"), "title": page.get("title"), "revid": page.get("lastrevid")}
+    return info
+
+
+def map_batches(fetch, titles, client=None, workers=WORKERS):
+    """Runs fetch() over batches of MAX_TITLES_PER_QUERY titles on the client's thread pool and merges the results."""
+    client = client or default_client()
+    titles = list(titles)
+    batches = [titles[i : i + MAX_TITLES_PER_QUERY] for i in range(0, len(titles), MAX_TITLES_PER_QUERY)]
+    merged = {}
+    for result in client.map(lambda titles_batch: fetch(titles_batch, client), batches, workers):
+        merged.update(result)
+    return merged
+
+
+def fetch_pages(titles, client=None, workers=WORKERS):
+    """Fetches many pages in batches over a small thread pool; title -> page (None when missing)."""
+    return map_batches(fetch_batch, titles, client, workers)
+
+
+def fetch_info(titles, client=None, workers=WORKERS):
+    """Current page ids and latest revision ids, batched like fetch_pages."""
+    return map_batches(fetch_info_batch, titles, client, workers)
+
+
+def fetch_page(title, client=None):
+    return fetch_batch([title], client)[title]
+
+
+# Regex jumps between the only tokens the parser cares about; everything
+# else is skipped without looking at it character by character.
+TEMPLATE_NAME_RE = re.compile(r"\s*([^|}]*)")
+BRACES_RE = re.compile(r"\{\{|\}\}")
+SPLIT_RE = re.compile(r"\{\{|\}\}|\[\[|\]\]|\|")
+
+
+class TemplateIndex:
+    """
+    Every template opening of a page, found in one sweep; find() then
+    answers any number of template-name lookups without rescanning.
+
+    The sweep visits openings exactly as the original character-by-
+    character scan did (after an opening it resumes just past the name), so
+    find() returns what that scan returned, nested and malformed templates
+    included.
+    """
+
+    def __init__(self, wikitext):
+        self.wikitext = wikitext or ""
+        self.openings = []  # (start, name_end, lowercased name)
+        text = self.wikitext
+        i = text.find("{{")
+        while i != -1:
+            m = TEMPLATE_NAME_RE.match(text, i + 2)
+            j = m.end()
+            self.openings.append((i, j, m.group(1).strip().lower()))
+            i = text.find("{{", j + 1)
+
+    def _end(self, start):
+        depth = 0
+        for m in BRACES_RE.finditer(self.wikitext, start):
+            if m.group() == "{{":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return m.end()
+        return None
+
+    def find(self, template_names):
+        """(canonical name, content after the name) of the first matching template, else (None, None)."""
+        names = {name.lower(): name for name in template_names}
+        text = self.wikitext
+        for start, name_end, name in self.openings:
+            match = names.get(name)
+            if not match:
+                continue
+            end = self._end(start)
+            if end is None:
+                continue
+            content_start = name_end
+            if content_start < len(text) and text[content_start] == "|":
+                content_start += 1
+            return match, text[content_start : end - 2]
+        return None, None
+
+
 def find_template(wikitext, template_names):
     if not wikitext:
         return None, None
-    names = {name.lower(): name for name in template_names}
-    i = 0
-    length = len(wikitext)
-    while i < length - 1:
-        if wikitext[i : i + 2] == "{{":
-            j = i + 2
-            while j < length and wikitext[j].isspace():
-                j += 1
-            name_start = j
-            while j < length and wikitext[j] not in "|}":
-                j += 1
-            name = wikitext[name_start:j].strip()
-            match = names.get(name.lower())
-            if match:
-                depth = 0
-                k = i
-                end = None
-                while k < length - 1:
-                    chunk = wikitext[k : k + 2]
-                    if chunk == "{{":
-                        depth += 1
-                        k += 2
-                        continue
-                    if chunk == "}}":
-                        depth -= 1
-                        k += 2
-                        if depth == 0:
-                            end = k
-                            break
-                        continue
-                    k += 1
-                if end is not None:
-                    content_start = j
-                    if content_start < length and wikitext[content_start] == "|":
-                        content_start += 1
-                    content = wikitext[content_start : end - 2]
-                    return match, content
-            i = j
-        i += 1
-    return None, None
+    return TemplateIndex(wikitext).find(template_names)
 
 
 def split_top_level(text):
+    """Splits on | outside {{...}} and [[...]]."""
     parts = []
-    buf = []
+    last = 0
     curly = 0
     square = 0
-    i = 0
-    length = len(text)
-    while i < length:
-        chunk = text[i : i + 2]
-        if chunk == "{{":
+    for m in SPLIT_RE.finditer(text):
+        token = m.group()
+        if token == "|":
+            if curly == 0 and square == 0:
+                parts.append(text[last : m.start()])
+                last = m.end()
+        elif token == "{{":
             curly += 1
-            buf.append(chunk)
-            i += 2
-            continue
-        if chunk == "}}":
+        elif token == "}}":
             curly = max(0, curly - 1)
-            buf.append(chunk)
-            i += 2
-            continue
-        if chunk == "[[":
+        elif token == "[[":
             square += 1
-            buf.append(chunk)
-            i += 2
-            continue
-        if chunk == "]]":
+        else:
             square = max(0, square - 1)
-            buf.append(chunk)
-            i += 2
-            continue
-        if text[i] == "|" and curly == 0 and square == 0:
-            parts.append("".join(buf))
-            buf = []
-            i += 1
-            continue
-        buf.append(text[i])
-        i += 1
-    parts.append("".join(buf))
+    parts.append(text[last:])
     return parts
 
 
@@ -248,8 +450,10 @@ def parse_params(content):
     return params
 
 
-def extract_languages(wikitext):
-    lang_name, lang_content = find_template(wikitext, ["Languages"])
+def extract_languages(wikitext, index=None):
+    if index is None:
+        index = TemplateIndex(wikitext)
+    lang_name, lang_content = index.find(["Languages"])
     if not lang_name:
         return None
     return parse_params(lang_content)
@@ -265,11 +469,72 @@ def write_json(path, obj):
     path.write_text(json.dumps(obj, ensure_ascii=True, indent=2), encoding="utf-8")
 
 
-def main():
-    repo_root = Path(__file__).resolve().parents[1]
-    wiki_root = repo_root / "data" / "wiki"
+def parse_page(kind, templates, page):
+    """The parsed record for a fetched page, or None when it has none of `templates`."""
+    # One sweep over the page serves both the infobox and the Languages lookup.
+    index = TemplateIndex(page["content"])
+    template_name, template_content = index.find(templates)
+    if not template_name:
+        return None
+    params = parse_params(template_content)
+    languages = extract_languages(page["content"], index)
+    record = {
+        "kind": kind,
+        "title": page["title"],
+        "pageid": page["pageid"],
+        "revid": page["revid"],
+        "timestamp": page["timestamp"],
+        "url": f"{BASE_URL}/w/{page['title'].replace(' ', '_')}",
+        "template": template_name,
+        "params": params,
+    }
+    if languages:
+        record["languages"] = languages
+        if "internal" in languages:
+            record["internal_id"] = languages["internal"]
+    return record
+
+
+def load_previous(wiki_root, path_root):
+    """
+    The last sync's pages keyed by (kind, pageid): its meta.json page entry,
+    parsed record (None if the page had no infobox) and missing-template
+    entry. Pages whose raw file is gone are left out, so they get fetched.
+    """
+    meta_path = wiki_root / "meta.json"
+    if not meta_path.exists():
+        return {}
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    previous = {}
+    for entry in meta.get("pages", []):
+        if (path_root / entry["raw_path"]).exists():
+            previous[(entry["kind"], entry["pageid"])] = {"meta": entry, "record": None, "missing_template": None}
+    for entry in meta.get("missing_templates", []):
+        key = (entry["kind"], entry["pageid"])
+        if key in previous:
+            previous[key]["missing_template"] = entry
+    for kind in meta.get("counts", {}):
+        parsed_path = wiki_root / "parsed" / f"{kind}.json"
+        if not parsed_path.exists():
+            continue
+        for record in json.loads(parsed_path.read_text(encoding="utf-8")):
+            key = (kind, record["pageid"])
+            if key in previous:
+                previous[key]["record"] = record
+    return previous
+
+
+def sync(client, data_root, workers=WORKERS, incremental=False):
+    """
+    Downloads and parses every page of every kind. With `incremental`, the
+    previous meta.json is compared against current revision ids (prop=info)
+    and only new or changed pages are downloaded; unchanged pages keep
+    their parsed records and pages that left their categories are pruned.
+    """
+    wiki_root = data_root / "wiki"
     raw_root = wiki_root / "raw"
     parsed_root = wiki_root / "parsed"
+    path_root = data_root.parent
 
     fetched_at = datetime.now(timezone.utc).isoformat()
     meta = {
@@ -291,30 +556,71 @@ def main():
     )
     write_text(wiki_root / "LICENSE.txt", license_text, encoding="ascii")
 
+    categories = sorted({category for kind_cfg in KINDS for category in kind_cfg.get("categories", [])})
+    members = dict(zip(categories, client.map(lambda category: get_category_members(category, client),
+                                              categories, workers)))
+
+    kind_titles = {}
+    for kind_cfg in KINDS:
+        titles = set(kind_cfg.get("extra_titles", []))
+        for category in kind_cfg.get("categories", []):
+            titles.update(members[category])
+        kind_titles[kind_cfg["kind"]] = sorted(titles)
+
+    # One batched fetch for every kind, so batches stay full.
+    all_titles = sorted({title for titles in kind_titles.values() for title in titles})
+    previous = load_previous(wiki_root, path_root) if incremental else {}
+    reusable = {}
+    if incremental:
+        info = fetch_info(all_titles, client, workers)
+        for kind, titles in kind_titles.items():
+            for title in titles:
+                current = info.get(title)
+                if current is None:
+                    reusable[(kind, title)] = None  # missing now; nothing to download
+                    continue
+                old = previous.get((kind, current["pageid"]))
+                if old is None or old["meta"]["revid"] != current["revid"]:
+                    continue
+                # Only reuse when the parsed output of that revision is still on disk.
+                if (old["record"] is None) == (old["meta"]["template"] is None):
+                    reusable[(kind, title)] = old
+        fetch_titles = sorted({title for kind, titles in kind_titles.items() for title in titles
+                               if (kind, title) not in reusable})
+    else:
+        fetch_titles = all_titles
+    pages = fetch_pages(fetch_titles, client, workers)
+
+    kept_raw = set()
     for kind_cfg in KINDS:
         kind = kind_cfg["kind"]
-        categories = kind_cfg.get("categories", [])
         templates = kind_cfg.get("templates", [])
-        extra_titles = kind_cfg.get("extra_titles", [])
-
-        titles = set(extra_titles)
-        for category in categories:
-            for title in get_category_members(category):
-                titles.add(title)
 
         items = []
-        for title in sorted(titles):
-            page = fetch_page(title)
+        for title in kind_titles[kind]:
+            if (kind, title) in reusable:
+                old = reusable[(kind, title)]
+                if old is None:
+                    meta["missing_pages"].append({"kind": kind, "title": title})
+                    continue
+                if old["record"] is not None:
+                    items.append(old["record"])
+                if old["missing_template"] is not None:
+                    meta["missing_templates"].append(old["missing_template"])
+                meta["pages"].append(old["meta"])
+                kept_raw.add(old["meta"]["raw_path"])
+                continue
+
+            page = pages.get(title)
             if not page:
                 meta["missing_pages"].append({"kind": kind, "title": title})
                 continue
 
-            wikitext = page["content"]
             raw_path = raw_root / kind / f"{page['pageid']}.wiki"
-            write_text(raw_path, wikitext)
+            write_text(raw_path, page["content"])
 
-            template_name, template_content = find_template(wikitext, templates)
-            if not template_name:
+            record = parse_page(kind, templates, page)
+            if record is None:
                 meta["missing_templates"].append(
                     {
                         "kind": kind,
@@ -324,22 +630,6 @@ def main():
                     }
                 )
             else:
-                params = parse_params(template_content)
-                languages = extract_languages(wikitext)
-                record = {
-                    "kind": kind,
-                    "title": page["title"],
-                    "pageid": page["pageid"],
-                    "revid": page["revid"],
-                    "timestamp": page["timestamp"],
-                    "url": f"{BASE_URL}/w/{page['title'].replace(' ', '_')}",
-                    "template": template_name,
-                    "params": params,
-                }
-                if languages:
-                    record["languages"] = languages
-                    if "internal" in languages:
-                        record["internal_id"] = languages["internal"]
                 items.append(record)
 
             meta["pages"].append(
@@ -348,17 +638,158 @@ def main():
                     "title": page["title"],
                     "pageid": page["pageid"],
                     "revid": page["revid"],
-                    "raw_path": str(raw_path.relative_to(repo_root)),
-                    "template": template_name,
+                    "timestamp": page["timestamp"],
+                    "raw_path": str(raw_path.relative_to(path_root)),
+                    "template": record["template"] if record else None,
                 }
             )
-            time.sleep(REQUEST_DELAY)
+            kept_raw.add(meta["pages"][-1]["raw_path"])
 
         write_json(parsed_root / f"{kind}.json", items)
         meta["counts"][kind] = len(items)
 
+    # Prune raw pages of the previous sync that are no longer listed.
+    pruned = 0
+    for old in previous.values():
+        if old["meta"]["raw_path"] not in kept_raw:
+            (path_root / old["meta"]["raw_path"]).unlink(missing_ok=True)
+            pruned += 1
+
+    meta["sync"] = {
+        "incremental": incremental,
+        "fetched": len(fetch_titles),
+        "reused": sum(1 for old in reusable.values() if old is not None),
+        "pruned": pruned,
+    }
+    write_json(wiki_root / "meta.json", meta)
+    return meta
+
+
+def reparse_page(job):
+    """Process-pool task: parse one cached raw page. job = (kind, templates, meta entry, raw file)."""
+    kind, templates, entry, raw_file = job
+    page = {
+        "title": entry["title"],
+        "pageid": entry["pageid"],
+        "revid": entry["revid"],
+        "timestamp": entry.get("timestamp"),
+        "content": Path(raw_file).read_text(encoding="utf-8"),
+    }
+    return parse_page(kind, templates, page)
+
+
+class JsonArrayWriter:
+    """Writes a JSON array one element at a time, formatted exactly like write_json."""
+
+    def __init__(self, path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.tmp_path = path.with_name(path.name + ".tmp")
+        self.path = path
+        self.file = open(self.tmp_path, "w", encoding="utf-8")
+        self.count = 0
+
+    def write(self, obj):
+        text = json.dumps(obj, ensure_ascii=True, indent=2).replace("\n", "\n  ")
+        self.file.write(("[\n  " if self.count == 0 else ",\n  ") + text)
+        self.count += 1
+
+    def close(self):
+        self.file.write("\n]" if self.count else "[]")
+        self.file.close()
+        self.tmp_path.replace(self.path)
+
+
+def reparse(data_root, workers=None):
+    """
+    Rebuilds parsed/*.json and meta.json from the raw cache without any
+    network access: meta.json says which raw file belongs to which page,
+    parsing runs on a process pool and records stream to disk in order.
+    """
+    wiki_root = data_root / "wiki"
+    path_root = data_root.parent
+    old_meta = json.loads((wiki_root / "meta.json").read_text(encoding="utf-8"))
+    # Older meta.json files have no page timestamps; take them from the parsed records.
+    timestamps = {}
+    old_format = any("timestamp" not in entry for entry in old_meta.get("pages", []))
+    for kind in old_meta.get("counts", {}) if old_format else ():
+        parsed_path = wiki_root / "parsed" / f"{kind}.json"
+        if parsed_path.exists():
+            for record in json.loads(parsed_path.read_text(encoding="utf-8")):
+                timestamps[(kind, record["pageid"])] = record.get("timestamp")
+
+    meta = dict(old_meta, reparsed_at=datetime.now(timezone.utc).isoformat(),
+                counts={}, pages=[], missing_templates=[])
+    templates_by_kind = {kind_cfg["kind"]: kind_cfg.get("templates", []) for kind_cfg in KINDS}
+    entries_by_kind = {kind: [] for kind in templates_by_kind}
+    skipped = 0
+    for entry in old_meta.get("pages", []):
+        if entry["kind"] not in entries_by_kind or not (path_root / entry["raw_path"]).exists():
+            skipped += 1
+            continue
+        if entry.get("timestamp") is None:
+            entry = dict(entry, timestamp=timestamps.get((entry["kind"], entry["pageid"])))
+        entries_by_kind[entry["kind"]].append(entry)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for kind, entries in entries_by_kind.items():
+            templates = templates_by_kind[kind]
+            jobs = [(kind, templates, entry, str(path_root / entry["raw_path"])) for entry in entries]
+            writer = JsonArrayWriter(wiki_root / "parsed" / f"{kind}.json")
+            try:
+                for entry, record in zip(entries, pool.map(reparse_page, jobs, chunksize=REPARSE_CHUNK)):
+                    if record is None:
+                        meta["missing_templates"].append(
+                            {
+                                "kind": kind,
+                                "title": entry["title"],
+                                "pageid": entry["pageid"],
+                                "templates": templates,
+                            }
+                        )
+                    else:
+                        writer.write(record)
+                    meta["pages"].append(dict(entry, template=record["template"] if record else None))
+            finally:
+                writer.close()
+            meta["counts"][kind] = writer.count
+
+    meta["reparse"] = {"pages": len(meta["pages"]), "skipped": skipped}
     write_json(wiki_root / "meta.json", meta)
+    return meta
+
+
+def main():
+    repo_root = Path(__file__).resolve().parents[1]
+    parser = argparse.ArgumentParser(description="Sync game data from the Balatro Wiki")
+    parser.add_argument("command", nargs="?", choices=("sync", "reparse"), default="sync",
+                        help="sync: download from the wiki; reparse: rebuild parsed data from the raw cache, offline")
+    parser.add_argument("--api-url", default=API_URL, help="MediaWiki api.php endpoint")
+    parser.add_argument("--data-dir", type=Path, default=repo_root / "data",
+                        help="data directory; pages go under <data-dir>/wiki")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help="concurrent batch requests (sync) or parser processes (reparse)")
+    parser.add_argument("--rate", type=float, default=REQUESTS_PER_SECOND, help="requests per second")
+    parser.add_argument("--incremental", action="store_true",
+                        help="download only pages whose revision changed since the last meta.json")
+    args = parser.parse_args()
+
+    if args.command == "reparse":
+        started = time.perf_counter()
+        meta = reparse(args.data_dir.resolve(), args.workers)
+        print(f"reparsed {meta['reparse']['pages']} pages ({meta['reparse']['skipped']} without a raw file) "
+              f"in {time.perf_counter() - started:.1f}s")
+        return
+
+    client = ApiClient(args.api_url, rate=args.rate)
+    started = time.perf_counter()
+    try:
+        meta = sync(client, args.data_dir.resolve(), args.workers, args.incremental)
+    finally:
+        client.close()
+    print(f"synced {len(meta['pages'])} pages ({meta['sync']['fetched']} downloaded, "
+          f"{meta['sync']['reused']} unchanged, {meta['sync']['pruned']} pruned) "
+          f"in {time.perf_counter() - started:.1f}s with {client.requests} requests")
 
 
 if __name__ == "__main__":
-    main()
+    main()
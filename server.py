@@ -0,0 +1,293 @@
+"""
+Long-lived local recommendation server.
+
+    python server.py --port 8765 --workers 2
+
+POST /recommend   body: one state (state_example.json shape) -> recommendation
+GET  /metrics     Prometheus text: queue depth, latency/batch histograms, caches
+GET  /profile     aggregated per-stage engine timings as JSON (with --profile)
+GET  /health
+
+Keeps one warm DecisionEngine (compiled plans, caches) for the life of the
+process. Requests that arrive together are micro-batched: their best hands
+are scored in one vectorized pass, cheap answers are returned directly and
+sampling searches (discard EV, round planning) go to a process pool, or
+with --workers 0 to one background thread (the event loop stays
+responsive, but searches share the GIL with it).
+"""
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from engine.cache import state_fingerprint
+from engine.decision_engine import DecisionEngine
+from main import state_from_dict
+
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+# What a malformed state raises while parsing or scoring.
+STATE_ERRORS = (ValueError, KeyError, IndexError, TypeError, AttributeError)
+
+_worker_engine: Optional[DecisionEngine] = None
+
+
+def _worker_init(plan_rounds: bool):
+    global _worker_engine
+    _worker_engine = DecisionEngine(plan_rounds=plan_rounds)
+
+
+def _worker_recommend(raw_state: dict) -> dict:
+    return _worker_engine.recommend(state_from_dict(raw_state))
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.n = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+        self.n += 1
+
+    def render(self, name: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{le="+Inf"}} {self.n}')
+        lines.append(f"{name}_sum {self.total}")
+        lines.append(f"{name}_count {self.n}")
+        return lines
+
+
+class RecommendationServer:
+    def __init__(self, workers: int = 2, plan_rounds: bool = False,
+                 max_batch: int = 64, max_wait: float = 0.002, profile: bool = False):
+        self.engine = DecisionEngine(plan_rounds=plan_rounds, profile=profile)
+        if workers > 0:
+            self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_worker_init, initargs=(plan_rounds,))
+        else:
+            # Searches still leave the event loop; the thread gets its own engine.
+            self.pool = ThreadPoolExecutor(max_workers=1, initializer=_worker_init, initargs=(plan_rounds,))
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue: "asyncio.Queue[Tuple[dict, asyncio.Future, float]]" = None
+        self.latency = Histogram(LATENCY_BUCKETS_MS)
+        self.batch_sizes = Histogram(BATCH_BUCKETS)
+        self.requests = 0
+        self.errors = 0
+        self.offloaded = 0
+        self.in_flight: Dict[bytes, List[Tuple[asyncio.Future, float]]] = {}
+
+    # -- batching -------------------------------------------------------
+
+    async def submit(self, raw_state: dict) -> dict:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((raw_state, future, time.perf_counter()))
+        return await future
+
+    async def batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self.batch_sizes.observe(len(batch))
+            try:
+                self._process(batch)
+            except Exception as exc:
+                # A bad batch fails its own requests; the batcher keeps serving.
+                for _, future, started in batch:
+                    if not future.done():
+                        self._fail(future, started, exc)
+
+    def _process(self, batch: List[Tuple[dict, asyncio.Future, float]]):
+        states = []
+        for raw_state, future, started in batch:
+            try:
+                states.append((state_from_dict(raw_state, self.engine.profiler), raw_state, future, started))
+            except STATE_ERRORS as exc:
+                self._fail(future, started, exc)
+        try:
+            # One vectorized best-hand pass for the whole batch.
+            self.engine.warm_best_hands([state for state, _, _, _ in states])
+        except STATE_ERRORS:
+            pass  # only a cache warm-up: each state below reports its own error
+        for state, raw_state, future, started in states:
+            try:
+                if self.engine.needs_search(state):
+                    self._offload(state, raw_state, future, started)
+                else:
+                    self._finish(future, started, self.engine.recommend(state))
+            except STATE_ERRORS as exc:
+                self._fail(future, started, exc)
+
+    def _offload(self, state, raw_state, future, started):
+        key = state_fingerprint(state)
+        cached = self.engine.recommendation_cache.get(key)
+        if cached is not None:
+            self._finish(future, started, dict(cached))
+            return
+        # Identical states already being searched wait for that search.
+        if key in self.in_flight:
+            self.in_flight[key].append((future, started))
+            return
+        self.in_flight[key] = [(future, started)]
+        self.offloaded += 1
+        search = asyncio.get_running_loop().run_in_executor(self.pool, _worker_recommend, raw_state)
+
+        def done(task):
+            waiters = self.in_flight.pop(key)
+            # A search cancelled by a pool shutdown has no exception to report.
+            exc = asyncio.CancelledError("search cancelled") if task.cancelled() else task.exception()
+            if exc is not None:
+                for waiter, waiter_started in waiters:
+                    self._fail(waiter, waiter_started, exc)
+                return
+            self.engine.recommendation_cache.put(key, task.result())
+            for waiter, waiter_started in waiters:
+                self._finish(waiter, waiter_started, dict(task.result()))
+
+        search.add_done_callback(done)
+
+    def _finish(self, future, started, recommendation):
+        self.requests += 1
+        self.latency.observe((time.perf_counter() - started) * 1000)
+        if not future.done():
+            future.set_result(recommendation)
+
+    def _fail(self, future, started, exc):
+        self.errors += 1
+        self._finish(future, started, {"error": f"{type(exc).__name__}: {exc}"})
+
+    # -- metrics --------------------------------------------------------
+
+    def metrics(self) -> str:
+        lines = [
+            "# TYPE spectator_queue_depth gauge",
+            f"spectator_queue_depth {self.queue.qsize()}",
+            "# TYPE spectator_searches_in_flight gauge",
+            f"spectator_searches_in_flight {len(self.in_flight)}",
+            "# TYPE spectator_requests_total counter",
+            f"spectator_requests_total {self.requests}",
+            "# TYPE spectator_errors_total counter",
+            f"spectator_errors_total {self.errors}",
+            "# TYPE spectator_offloaded_total counter",
+            f"spectator_offloaded_total {self.offloaded}",
+            "# TYPE spectator_latency_ms histogram",
+            *self.latency.render("spectator_latency_ms"),
+            "# TYPE spectator_batch_size histogram",
+            *self.batch_sizes.render("spectator_batch_size"),
+        ]
+        for cache, stats in self.engine.cache_stats().items():
+            for field in ("entries", "hits", "misses", "evictions"):
+                lines.append(f'spectator_cache_{field}{{cache="{cache}"}} {stats[field]}')
+        text = "\n".join(lines) + "\n"
+        if self.engine.profiler is not None:
+            text += self.engine.profiler.prometheus()
+        return text
+
+    # -- HTTP -----------------------------------------------------------
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # Minimal HTTP/1.1 with keep-alive; enough for local clients and load tests.
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                status, content_type, payload = await self.route(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+                    + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method: str, path: str, body: bytes) -> Tuple[str, str, bytes]:
+        if method == "POST" and path == "/recommend":
+            try:
+                raw_state = json.loads(body)
+            except ValueError as exc:
+                return "400 Bad Request", "application/json", json.dumps({"error": str(exc)}).encode()
+            recommendation = await self.submit(raw_state)
+            return "200 OK", "application/json", json.dumps(recommendation).encode()
+        if method == "GET" and path == "/metrics":
+            return "200 OK", "text/plain; version=0.0.4", self.metrics().encode()
+        if method == "GET" and path == "/profile":
+            return "200 OK", "application/json", json.dumps(self.engine.profile_snapshot()).encode()
+        if method == "GET" and path == "/health":
+            return "200 OK", "application/json", b'{"status": "ok"}'
+        return "404 Not Found", "application/json", b'{"error": "not found"}'
+
+    async def serve(self, host: str, port: int):
+        self.queue = asyncio.Queue()
+        batcher = asyncio.ensure_future(self.batcher())
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Serving recommendations on http://{host}:{port}", flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            self.pool.shutdown(cancel_futures=True)
+            self.engine.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Balatro Spectator recommendation server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=2, help="processes for sampling searches (0 = one background thread)")
+    parser.add_argument("--plan-rounds", action="store_true", help="use the multi-turn round planner")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--profile", action="store_true", help="per-stage engine timings in /metrics and /profile")
+    args = parser.parse_args()
+    server = RecommendationServer(args.workers, args.plan_rounds, args.max_batch, args.max_wait_ms / 1000,
+                                  args.profile)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import itertools
+import random
+
+import pytest
+
+from engine.hand_evaluator import HandEvaluator
+from engine.scoring import Card, Joker, ScoringEngine, ENHANCEMENTS, EDITIONS, RANKS, SUITS
+from engine.simulator import HandSimulator
+
+pytest.importorskip("numpy")
+from engine.batch import BatchScorer  # noqa: E402
+
+LINEUPS = [
+    [],
+    [Joker('j_joker', 'Joker', 'add_mult', 4.0, 0),
+     Joker('j_duo', 'The Duo', 'x_mult', 2.0, 1, 'if played hand contains a Pair'),
+     Joker('j_bloodstone', 'Bloodstone', 'x_mult', 1.5, 2, 'played Hearts have a 1 in 2 chance to give x1.5 Mult'),
+     Joker('j_baron', 'Baron', 'x_mult', 1.5, 3, 'each King held in hand gives x1.5 Mult'),
+     Joker('j_half', 'Half', 'x_mult', 0.5, 4, 'played Spades give x0.5 Mult')],
+]
+
+
+def random_hand(rng, size):
+    hand = []
+    for _ in range(size):
+        if hand and rng.random() < 0.15:
+            hand.append(rng.choice(hand))
+        else:
+            hand.append(Card(rng.choice(RANKS[7:]), rng.choice(SUITS[::3]), rng.choice(ENHANCEMENTS),
+                             rng.choice(EDITIONS)))
+    return hand
+
+
+@pytest.mark.parametrize("jokers", LINEUPS, ids=["no_jokers", "jokers"])
+def test_batch_matches_exhaustive_search(jokers):
+    simulator = HandSimulator(ScoringEngine())
+    plan = simulator.engine.compile(jokers)
+    scorer = BatchScorer(plan)
+    rng = random.Random(17)
+    hands = [random_hand(rng, rng.randint(0, 8)) for _ in range(400)]
+    expected = [simulator.find_best_hand_exhaustive(hand, jokers, plan=plan) if hand else ("", [], {})
+                for hand in hands]
+    assert scorer.best_plays(hands) == expected
+    assert scorer.best_totals(hands) == [found[2].get('total', 0) for found in expected]
+
+
+def test_top_plays_follow_exhaustive_order():
+    engine = ScoringEngine()
+    jokers = LINEUPS[1]
+    plan = engine.compile(jokers)
+    hand = random_hand(random.Random(4), 7)
+    plays = []
+    for r in range(1, 6):
+        for idx in itertools.combinations(range(len(hand)), r):
+            played = [hand[i] for i in idx]
+            held = [hand[i] for i in range(len(hand)) if i not in idx]
+            hand_type = HandEvaluator.get_hand_type(played)
+            plays.append((hand_type, played, plan.score(hand_type, played, held)))
+    # Stable sort: ties keep the exhaustive order.
+    expected = sorted(plays, key=lambda play: -play[2]['total'])[:10]
+    assert BatchScorer(plan).top_plays(hand, 10) == expected
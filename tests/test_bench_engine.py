@@ -0,0 +1,48 @@
+import json
+import random
+import subprocess
+import sys
+from pathlib import Path
+
+from bench_engine import compare, random_hand, random_jokers, random_state
+from engine.cache import state_fingerprint
+
+BENCH = Path(__file__).resolve().parents[1] / "scripts" / "bench_engine.py"
+
+
+def run_bench(*args):
+    return subprocess.run([sys.executable, str(BENCH), "--quick", "--only", "calculate_score", "--sizes", "5",
+                           "--jokers", "0,2", *args], capture_output=True, text=True)
+
+
+def test_generators_are_seeded():
+    first, second = random.Random("1:recommend"), random.Random("1:recommend")
+    assert [state_fingerprint(random_state(first)) for _ in range(5)] == \
+        [state_fingerprint(random_state(second)) for _ in range(5)]
+    rng_a, rng_b = random.Random(3), random.Random(3)
+    assert random_hand(rng_a, 8) == random_hand(rng_b, 8)
+    assert random_jokers(rng_a, 4) == random_jokers(rng_b, 4)
+
+
+def test_compare_flags_slowdowns_over_the_threshold(capsys):
+    baseline = {"a": {"us_per_op": 10.0}, "b": {"us_per_op": 10.0}}
+    results = {"a": {"us_per_op": 11.0}, "b": {"us_per_op": 12.0}, "c": {"us_per_op": 1.0}}
+    assert compare(results, baseline, 0.15) == ["b"]
+    assert "new" in capsys.readouterr().out
+
+
+def test_stored_results_compare_against_a_rerun(tmp_path):
+    out = tmp_path / "bench.json"
+    first = run_bench("--out", str(out))
+    assert first.returncode == 0, first.stderr
+    report = json.loads(out.read_text())
+    assert report["meta"]["seed"] == 1 and report["results"]
+    assert all(case["us_per_op"] > 0 for case in report["results"].values())
+    assert run_bench("--compare", str(out), "--threshold", "100").returncode == 0
+    # A baseline far faster than anything measurable makes every case a regression.
+    for case in report["results"].values():
+        case["us_per_op"] = 1e-9
+    out.write_text(json.dumps(report))
+    rerun = run_bench("--compare", str(out))
+    assert rerun.returncode == 1
+    assert "REGRESSION" in rerun.stdout
@@ -0,0 +1,69 @@
+import dataclasses
+import random
+
+from engine.cache import LRUCache, state_fingerprint
+from engine.decision_engine import DecisionEngine, GameState
+from engine.scoring import Card, HandLevel, Joker, RANKS, SUITS
+from engine.simulator import HandSimulator
+
+DECK = [Card(rank, suit) for suit in SUITS for rank in RANKS]
+JOKERS = [Joker('j_joker', 'Joker', 'add_mult', 4.0, 0), Joker('j_cavendish', 'Cavendish', 'x_mult', 3.0, 1)]
+
+
+def make_state(seed=2, **changes):
+    cards = random.Random(seed).sample(DECK, 16)
+    state = GameState(jokers=list(JOKERS), hand=cards[:8], deck=cards[8:], consumables=["The Fool", "Pluto"],
+                      hand_levels={"Pair": HandLevel(25, 3)}, required_score=2000,
+                      shop_items=[{"type": "Tarot", "name": "The Fool", "cost": 3}, {"type": "Planet", "name": "Mars"}])
+    return dataclasses.replace(state, **changes)
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # evicts "b", the least recently used
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats() == {"entries": 2, "max_entries": 2, "hits": 3, "misses": 1, "evictions": 1,
+                             "hit_rate": 0.75}
+    disabled = LRUCache(0)
+    disabled.put("a", 1)
+    assert len(disabled) == 0
+
+
+def test_fingerprint_ignores_order_only_where_the_game_does():
+    state = make_state()
+    key = state_fingerprint(state)
+    rng = random.Random(0)
+    shuffled = make_state(hand=rng.sample(state.hand, 8), deck=rng.sample(state.deck, 8),
+                          consumables=state.consumables[::-1], shop_items=state.shop_items[::-1],
+                          jokers=state.jokers[::-1])
+    assert state_fingerprint(shuffled) == key
+    swapped = [dataclasses.replace(JOKERS[0], position=1), dataclasses.replace(JOKERS[1], position=0)]
+    changes = [{"jokers": swapped}, {"hand": state.hand[:-1]}, {"deck": state.deck[1:]}, {"money": 5},
+               {"hand_levels": {"Pair": HandLevel(25, 4)}}, {"current_score": 1}, {"discards_left": 2},
+               {"hand": state.hand[:-1] + [Card(state.hand[-1].rank, state.hand[-1].suit, 'Steel')]}]
+    for change in changes:
+        assert state_fingerprint(make_state(**change)) != key, change
+
+
+def test_cached_recommendations_match_fresh_ones():
+    engine = DecisionEngine(seed=0)
+    for seed in range(3):
+        state = make_state(seed)
+        first = engine.recommend(state)
+        hits = engine.recommendation_cache.hits
+        assert engine.recommend(state) == first
+        assert engine.recommendation_cache.hits == hits + 1
+        assert DecisionEngine(seed=0).recommend(state) == first
+        hand_type, cards, result = engine.best_hand(state)
+        assert (hand_type, cards, result) == \
+            HandSimulator(engine.scoring_engine).find_best_hand_exhaustive(state.hand, [], plan=engine.compile_plan(state))
+    # The same state with its hand in another order is answered from the cache.
+    state = make_state(0)
+    reordered = make_state(0, hand=state.hand[::-1])
+    assert engine.recommend(reordered) == engine.recommend(state)
+    fresh = DecisionEngine(seed=0).recommend(reordered)
+    assert fresh["action"] == engine.recommend(state)["action"]
+    assert sorted(fresh["cards"]) == sorted(engine.recommend(state)["cards"])
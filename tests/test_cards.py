@@ -0,0 +1,58 @@
+import itertools
+import pickle
+
+import pytest
+
+from engine.scoring import Card, EDITIONS, ENHANCEMENTS, RANKS, SEALS, SUITS
+from main import parse_card
+
+ALL_CARDS = [Card(*fields) for fields in itertools.product(RANKS, SUITS, ENHANCEMENTS, EDITIONS, SEALS)]
+
+
+def string_chips(card):
+    # How chips were read from the strings before cards were encoded.
+    if card.enhancement == 'Stone':
+        return 50
+    if card.rank == 'A':
+        return 11
+    return 10 if card.rank in ('J', 'Q', 'K') else int(card.rank)
+
+
+def test_cards_are_interned_and_immutable():
+    card = Card('K', 'Hearts', 'Steel', 'Foil', 'Red')
+    assert Card('K', 'Hearts', 'Steel', 'Foil', 'Red') is card
+    assert pickle.loads(pickle.dumps(card)) is card
+    with pytest.raises(AttributeError):
+        card.rank = 'Q'
+    with pytest.raises(ValueError):
+        Card('1', 'Hearts')
+
+
+def test_codes_round_trip_and_match_the_strings():
+    assert len({card.code for card in ALL_CARDS}) == len(ALL_CARDS)
+    for card in ALL_CARDS:
+        assert Card.from_code(card.code) is card
+        assert card.chips == card.get_base_chips() == string_chips(card)
+        assert RANKS[card.rank_index] == card.rank and SUITS[card.suit_index] == card.suit
+        if card.enhancement == 'Stone':
+            assert (card.prime, card.suit_mask) == (1, 0)
+        elif card.enhancement == 'Wild':
+            assert card.suit_mask == 0b1111
+        else:
+            assert card.suit_mask == 1 << SUITS.index(card.suit)
+
+
+def test_rank_primes_identify_rank_multisets():
+    by_product = {}
+    for size in range(1, 6):
+        for ranks in itertools.combinations_with_replacement(RANKS, size):
+            product = 1
+            for rank in ranks:
+                product *= Card(rank, 'Hearts').prime
+            assert by_product.setdefault(product, ranks) == ranks
+
+
+def test_parse_card_reads_tags():
+    assert parse_card("10 of Spades") is Card('10', 'Spades')
+    assert parse_card("Q of Hearts [Glass] [Polychrome] [Gold Seal]") is Card('Q', 'Hearts', 'Glass', 'Polychrome', 'Gold')
+    assert parse_card("A of Clubs [Gold]") is Card('A', 'Clubs', enhancement='Gold')
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from build_catalog import fake_wiki_data
+from engine.catalog import Catalog, _load_sources, build_catalog
+
+
+@pytest.fixture(scope="module")
+def built(tmp_path_factory):
+    base = tmp_path_factory.mktemp("catalog")
+    data_root = fake_wiki_data(12, base)
+    stats = build_catalog(data_root, base / "catalog.bin")
+    with Catalog(base / "catalog.bin") as catalog:
+        yield data_root, stats, catalog
+
+
+def test_every_source_record_round_trips(built):
+    data_root, stats, catalog = built
+    items = {}
+    for item in _load_sources(data_root):
+        items.setdefault(item["id"], item)
+    assert len(catalog) == stats["entries"] == len(items)
+    assert set(catalog.kinds) == {item["kind"] for item in items.values()}
+    for item in items.values():
+        entry = catalog.get(item["id"])
+        assert (entry.kind, entry.id, entry.name, entry.internal_id, entry.rarity) == \
+            (item["kind"], item["id"], item["name"], item["internal_id"], item["rarity"])
+        assert entry.effect == item["effect"]
+        assert entry.data == item["data"]
+        assert entry.wiki == item["wiki"]
+        assert item["id"] in [found.id for found in catalog.by_name(item["name"].upper())]
+        if item["internal_id"] is not None:
+            assert catalog.by_internal_id(item["internal_id"]).id == item["id"]
+
+
+def test_wiki_jokers_merge_into_data_jokers(built, tmp_path):
+    data_root, _, catalog = built
+    joker = catalog.get("j_joker")
+    assert joker.data["effect"] == {"type": "add_mult", "value": 4.0, "condition": None}
+    assert joker.to_joker(2).position == 2 and joker.to_joker(2).value == 4.0
+    assert [entry.id for entry in catalog.of_kind("jokers")][:3] == ["j_joker", "j_blueprint", "j_hologram"]
+
+    (tmp_path / "wiki" / "parsed").mkdir(parents=True)
+    (tmp_path / "jokers.json").write_text((data_root / "jokers.json").read_text(encoding="utf-8"), encoding="utf-8")
+    record = {"kind": "jokers", "title": "BluePrint", "pageid": 7, "revid": 70, "timestamp": "2024-01-01T00:00:00Z",
+              "url": "https://balatrowiki.org/w/BluePrint", "template": "Joker info",
+              "params": {"name": "Blueprint", "effect": "Copies ability of [[Joker]] to the right"}}
+    (tmp_path / "wiki" / "parsed" / "jokers.json").write_text(json.dumps([record]), encoding="utf-8")
+    build_catalog(tmp_path, tmp_path / "catalog.bin")
+    with Catalog(tmp_path / "catalog.bin") as merged:
+        assert len(merged) == 3
+        blueprint = merged.get("j_blueprint")
+        assert blueprint.wiki == record
+        assert blueprint.page.pageid == 7 and blueprint.params["name"] == "Blueprint"
+        assert blueprint.effect.type == "copy_joker"
+
+
+def test_missing_keys_and_foreign_files(built, tmp_path):
+    _, _, catalog = built
+    assert catalog.get("j_nope") is None
+    assert catalog.by_internal_id("j_nope") is None
+    assert catalog.by_name("No Such Card") == []
+    other = tmp_path / "other.bin"
+    other.write_bytes(b"{}")
+    with pytest.raises(ValueError):
+        Catalog(other)
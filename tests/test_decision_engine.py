@@ -0,0 +1,61 @@
+import dataclasses
+import random
+
+from engine.decision_engine import DecisionEngine, GameState
+from engine.discard import DiscardOption
+from engine.distribution import best_clear_play
+from engine.scoring import Card, Joker, RANKS, SUITS
+
+DECK = [Card(rank, suit) for suit in SUITS for rank in RANKS]
+JOKERS = [Joker('j_joker', 'Joker', 'add_mult', 4.0, 0)]
+
+
+def states(count, seed=5):
+    # One lineup, mostly distinct hands that need a discard search, a few repeats.
+    rng = random.Random(seed)
+    out = []
+    for _ in range(count):
+        if out and rng.random() < 0.2:
+            out.append(rng.choice(out))
+            continue
+        cards = rng.sample(DECK, 10)
+        out.append(GameState(jokers=list(JOKERS), hand=cards[:5], deck=cards[5:], required_score=400))
+    return out
+
+
+def test_recommend_many_matches_recommend_and_is_reproducible():
+    batch = states(24)
+    expected = [DecisionEngine(seed=0).recommend(state) for state in batch]
+    assert any(r["action"] == "discard" for r in expected)
+    first = list(DecisionEngine(seed=0).recommend_many(batch, workers=2, window=16, chunk_size=4))
+    second = list(DecisionEngine(seed=0).recommend_many(batch, workers=2, window=16, chunk_size=4))
+    in_process = list(DecisionEngine(seed=0).recommend_many(batch))
+    assert first == expected
+    assert second == expected
+    assert in_process == expected
+
+
+class FixedAdvisor:
+    def __init__(self, options):
+        self.options = options
+
+    def evaluate(self, hand, deck, plan, needed, cancel=None):
+        return self.options
+
+
+def test_discard_against_a_chance_play_compares_the_likeliest_to_clear():
+    hand = [Card('A', 'Hearts', 'Lucky'), Card('A', 'Spades'), Card('3', 'Clubs'), Card('7', 'Diamonds')]
+    state = GameState(hand=hand, deck=DECK[:10], required_score=200)
+    engine = DecisionEngine()
+    chance = best_clear_play(engine.compile_plan(state), hand, state.required_score)
+    assert 0 < chance.probability < 0.9
+    high_mean = DiscardOption([hand[2]], 64, 5000.0, 10.0, chance.probability / 2)
+    likely = DiscardOption([hand[3]], 64, 150.0, 10.0, chance.probability + 0.1)
+    engine.discard_advisor = FixedAdvisor([high_mean, likely])
+    recommendation = engine.recommend(state)
+    assert recommendation["action"] == "discard"
+    assert recommendation["cards"] == ["7 of Diamonds"]
+
+    engine = DecisionEngine()
+    engine.discard_advisor = FixedAdvisor([high_mean, dataclasses.replace(likely, clear_probability=0.0)])
+    assert engine.recommend(state)["action"] == "play"
@@ -0,0 +1,60 @@
+import itertools
+
+from engine.decision_engine import DecisionEngine
+from engine.discard import DiscardAdvisor
+from engine.scoring import Card, Joker, RANKS, SUITS, ScoringEngine
+from engine.simulator import HandSimulator
+
+DECK = [Card(rank, suit) for suit in SUITS for rank in RANKS]
+HAND = [Card('2', 'Hearts'), Card('5', 'Spades'), Card('9', 'Clubs'), Card('J', 'Diamonds'), Card('K', 'Hearts'),
+        Card('K', 'Spades'), Card('3', 'Clubs'), Card('7', 'Hearts')]
+
+
+def test_worker_pool_is_shut_down_on_close():
+    plan = ScoringEngine().compile([])
+    deck = [card for card in DECK if card not in HAND]
+    with DiscardAdvisor(workers=2, max_samples=16, seed=1) as advisor:
+        options = advisor.evaluate(HAND, deck, plan, 300)
+        pool = advisor._pool
+        assert pool is not None and options
+    assert advisor._pool is None
+    advisor.close()  # idempotent
+
+    engine = DecisionEngine(discard_workers=2)
+    engine.discard_advisor.evaluate(HAND, deck, plan, 300)
+    with engine:
+        assert engine.discard_advisor._pool is not None
+    assert engine.discard_advisor._pool is None
+
+
+def exact_options(hand, deck, plan, needed):
+    """Mean best total and P(clear) of every discard, over every equally likely redraw."""
+    simulator = HandSimulator(ScoringEngine())
+    exact = {}
+    for r in range(1, len(hand) + 1):
+        for idx in itertools.combinations(range(len(hand)), r):
+            kept = [hand[i] for i in range(len(hand)) if i not in idx]
+            totals = [simulator.find_best_hand_exhaustive(kept + list(draw), [], plan=plan)[2]['total']
+                      for draw in itertools.combinations(deck, min(r, len(deck)))]
+            exact[idx] = (sum(totals) / len(totals), sum(t >= needed for t in totals) / len(totals))
+    return exact
+
+
+def test_estimates_match_exact_expectations():
+    plan = ScoringEngine().compile([Joker('j_joker', 'Joker', 'add_mult', 4.0, 0)])
+    hand = [Card('K', 'Hearts'), Card('K', 'Spades'), Card('3', 'Clubs'), Card('7', 'Hearts', 'Glass')]
+    deck = [Card('K', 'Clubs'), Card('3', 'Hearts'), Card('9', 'Hearts'), Card('A', 'Spades', 'Mult'),
+            Card('7', 'Diamonds')]
+    exact = exact_options(hand, deck, plan, 600)
+    advisor = DiscardAdvisor(round_samples=64, max_samples=4096, tolerance=0.0, time_budget=float('inf'), seed=3)
+    options = advisor.evaluate(hand, deck, plan, 600)
+    assert len(options) == len(exact)
+    for option in options:
+        mean, clear = exact[tuple(hand.index(card) for card in option.discard)]
+        assert abs(option.mean_score - mean) <= 4 * option.std_error + 1e-9
+        assert abs(option.clear_probability - clear) <= 4 * (clear * (1 - clear) / option.samples) ** 0.5 + 1e-9
+    best = max(mean for mean, _ in exact.values())
+    top = exact[tuple(hand.index(card) for card in options[0].discard)][0]
+    assert top >= best - 8 * options[0].std_error
+    # Same seed, same draws, same answer.
+    assert advisor.evaluate(hand, deck, plan, 600) == options
@@ -0,0 +1,71 @@
+import math
+
+import pytest
+
+from engine.decision_engine import DecisionEngine, GameState
+from engine.distribution import score_distribution, best_clear_play
+from engine.hand_evaluator import HandEvaluator
+from engine.scoring import Card, Joker, ScoringEngine
+
+BLOODSTONE = Joker('j_bloodstone', 'Bloodstone', 'x_mult', 1.5, 0,
+                   'played Hearts have a 1 in 2 chance to give x1.5 Mult')
+
+
+def distribution(cards, held=(), jokers=()):
+    plan = ScoringEngine().compile(list(jokers))
+    return score_distribution(plan, HandEvaluator.get_hand_type(cards), list(cards), list(held))
+
+
+def test_deterministic_play_is_a_point_mass():
+    cards = [Card('A', 'Hearts'), Card('A', 'Spades')]
+    plan = ScoringEngine().compile([])
+    dist = distribution(cards)
+    assert dist.is_deterministic
+    assert dist.min == plan.score("Pair", cards, [])['total']
+
+
+def test_lucky_card_adds_twenty_mult_one_time_in_five():
+    # High Card: 5 + 11 chips, 1 mult; Lucky triggers to 21 mult.
+    dist = distribution([Card('A', 'Hearts', 'Lucky')])
+    assert dist.totals == [16, 336]
+    assert dist.probs == pytest.approx([0.8, 0.2])
+    assert dist.clear_probability(17) == pytest.approx(0.2)
+
+
+def test_lucky_cards_merge_into_binomial_states():
+    cards = [Card('2', 'Hearts', 'Lucky')] * 5
+    dist = distribution(cards)
+    assert len(dist) == 6
+    expected = [math.comb(5, k) * 0.2 ** k * 0.8 ** (5 - k) for k in range(6)]
+    assert dist.probs == pytest.approx(expected)
+    assert sum(dist.probs) == pytest.approx(1.0)
+
+
+def test_chance_joker_branches_per_matching_card():
+    cards = [Card('K', 'Hearts'), Card('K', 'Spades')]
+    dist = distribution(cards, jokers=[BLOODSTONE])
+    # Only the Heart can trigger: two outcomes, even odds.
+    assert dist.probs == pytest.approx([0.5, 0.5])
+    assert dist.max == distribution(cards).max * 1.5
+
+
+def test_best_clear_play_keeps_the_lucky_card_in_the_play():
+    hand = [Card('A', 'Hearts', 'Lucky'), Card('K', 'Spades'), Card('K', 'Clubs')]
+    # The Pair alone scores 60 and cannot clear; with the Lucky Ace it can, 1 time in 5.
+    chance = best_clear_play(ScoringEngine().compile([]), hand, needed=300)
+    assert chance.hand_type == "Pair"
+    assert chance.cards == hand
+    assert chance.probability == pytest.approx(0.2)
+    assert best_clear_play(ScoringEngine().compile([]), hand[1:], needed=300) is None
+
+
+def test_reported_distribution_holds_duplicate_cards_by_position():
+    steel_king = Card('K', 'Hearts', 'Steel')
+    state = GameState(jokers=[BLOODSTONE], hand=[steel_king] * 6, deck=[],
+                      discards_left=0, required_score=10 ** 9)
+    recommendation = DecisionEngine().recommend(state)
+    assert recommendation["hand_type"] == "Flush Five"
+    plan = ScoringEngine().compile([BLOODSTONE])
+    dist = score_distribution(plan, "Flush Five", [steel_king] * 5, [steel_king])
+    assert recommendation["expected_score"] == round(dist.mean)
+    assert recommendation["distribution"] == dist.summary()
@@ -0,0 +1,79 @@
+import pytest
+
+from engine.effects import (
+    ANY_CARD, HELD_PHASE, JOKER_PHASE, PLAYED_PHASE, CardFilter, compile_lineup, parse_condition,
+)
+from engine.scoring import Card, Joker, ScoringEngine
+
+PLAYED = [Card('K', 'Hearts'), Card('K', 'Spades')]
+HELD = [Card('Q', 'Spades'), Card('Q', 'Clubs'), Card('3', 'Diamonds')]
+
+
+def score(jokers, played=PLAYED, held=HELD, hand_type='Pair'):
+    return ScoringEngine().compile(jokers, None).score(hand_type, played, held)
+
+
+@pytest.mark.parametrize("text", [
+    None,
+    "",
+    "X3 Mult if all cards held in hand are Spades or Clubs",
+    "+3 Mult for each Joker card",
+    "gives a bonus when something unusual happens",
+])
+def test_unrecognized_conditions_are_unconditional(text):
+    assert parse_condition(text) == parse_condition(None)
+    assert parse_condition(text).phase == JOKER_PHASE
+
+
+def test_triggers_need_a_rank_or_suit():
+    played = parse_condition("played Hearts give +4 Mult when scored")
+    assert played.phase == PLAYED_PHASE and played.cards != ANY_CARD
+    assert played.cards(Card('2', 'Hearts')) and not played.cards(Card('2', 'Spades'))
+    held = parse_condition("each King held in hand gives x1.5 Mult")
+    assert held.phase == HELD_PHASE and held.cards == CardFilter(ranks=held.cards.ranks)
+    assert parse_condition("each played card gives +1 Mult").phase == JOKER_PHASE
+
+
+def test_blackboard_applies_once():
+    blackboard = Joker('j_blackboard', 'Blackboard', 'x_mult', 3.0, 0,
+                       condition="X3 Mult if all cards held in hand are Spades or Clubs")
+    plain = Joker('j_blackboard', 'Blackboard', 'x_mult', 3.0, 0)
+    assert score([blackboard]) == score([plain])
+    assert score([blackboard])['mult'] == 2 * 3
+
+
+def test_joker_card_phrase_is_flat():
+    joker = Joker('j_x', 'X', 'add_mult', 3.0, 0, condition="+3 Mult for each Joker card")
+    assert score([joker]) == score([Joker('j_x', 'X', 'add_mult', 3.0, 0)])
+    assert score([joker])['mult'] == 2 + 3
+
+
+def test_held_add_mult_keeps_flat_contribution():
+    moon = Joker('j_shoot_the_moon', 'Shoot the Moon', 'add_mult', 13.0, 0,
+                 condition="Each Queen held in hand gives +13 Mult")
+    assert [e.phase for e in compile_lineup([moon])] == [JOKER_PHASE]
+    assert score([moon])['mult'] == 2 + 13
+
+
+def test_joker_phase_chance_keeps_flat_contribution():
+    joker = Joker('j_x', 'X', 'x_mult', 2.0, 0, condition="1 in 2 chance for X2 Mult")
+    assert score([joker])['mult'] == 2 * 2
+
+
+def test_copies_resolve_to_the_right_and_leftmost():
+    cavendish = Joker('j_cavendish', 'Cavendish', 'x_mult', 3.0, 2)
+    joker = Joker('j_joker', 'Joker', 'add_mult', 4.0, 0)
+    blueprint = Joker('j_blueprint', 'Blueprint', 'copy_joker', 0, 1)
+    brainstorm = Joker('j_brainstorm', 'Brainstorm', 'copy_joker', 0, 3,
+                       condition="Copies the ability of leftmost Joker")
+    effects = compile_lineup([cavendish, brainstorm, joker, blueprint])
+    assert [(e.source, e.mult, e.x) for e in effects] == [
+        ('j_joker', 4.0, 1.0),
+        ('j_blueprint', 0.0, 3.0),
+        ('j_cavendish', 0.0, 3.0),
+        ('j_brainstorm', 4.0, 1.0),
+    ]
+    # A copy with nothing to its right, or a loop of copies, has no effect.
+    assert compile_lineup([blueprint]) == []
+    assert compile_lineup([Joker('a', 'A', 'copy_joker', 0, 0), Joker('b', 'B', 'copy_joker', 0, 1,
+                                                                       condition="leftmost")]) == []
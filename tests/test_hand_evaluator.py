@@ -0,0 +1,73 @@
+import itertools
+from collections import Counter
+
+import pytest
+
+from engine.hand_evaluator import HandEvaluator, HAND_TYPES, HAND_TYPE_BIT, achievable_hand_types
+from engine.scoring import Card, RANKS, SUITS
+
+# Straights by rank index, the wheel (A-2-3-4-5) included.
+STRAIGHTS = [set(range(low, low + 5)) for low in range(9)] + [{12, 0, 1, 2, 3}]
+
+
+def reference_hand_type(cards):
+    """Balatro's rules, spelled out: Stone cards have no rank or suit, Wild cards every suit."""
+    ranked = [c for c in cards if c.enhancement != 'Stone']
+    counts = sorted(Counter(c.rank_index for c in ranked).values(), reverse=True) + [0, 0]
+    five = len(cards) == 5 and len(ranked) == 5
+    suits = [{c.suit} if c.enhancement != 'Wild' else set(SUITS) for c in ranked]
+    flush = five and bool(set.intersection(*suits))
+    straight = five and {c.rank_index for c in ranked} in STRAIGHTS
+    found = {
+        "Flush Five": flush and counts[0] == 5,
+        "Flush House": flush and counts[:2] == [3, 2],
+        "Five of a Kind": counts[0] == 5,
+        "Straight Flush": flush and straight,
+        "Four of a Kind": counts[0] == 4,
+        "Full House": counts[:2] == [3, 2],
+        "Flush": flush,
+        "Straight": straight,
+        "Three of a Kind": counts[0] == 3,
+        "Two Pair": counts[:2] == [2, 2],
+        "Pair": counts[0] == 2,
+    }
+    return next((t for t in HAND_TYPES if found.get(t)), "High Card")
+
+
+# Few ranks, plain / Wild / Stone variants and exact duplicates, so every hand type occurs.
+POOL = [Card(rank, suit) for rank in ('2', '3', '4', '5', 'A') for suit in ('Hearts', 'Spades')]
+POOL += [Card('2', 'Clubs', 'Wild'), Card('A', 'Diamonds', 'Wild'), Card('K', 'Hearts', 'Stone')]
+POOL += [Card('2', 'Hearts'), Card('2', 'Clubs', 'Wild'), Card('2', 'Hearts', 'Mult'), Card('A', 'Hearts', 'Bonus', 'Foil')]
+
+
+def subsets(pool, sizes):
+    for size in sizes:
+        yield from itertools.combinations(pool, size)
+
+
+def test_matches_reference_on_every_subset_of_enhanced_and_duplicate_cards():
+    tally = Counter()
+    for combo in subsets(POOL, range(0, 6)):
+        got = HandEvaluator.get_hand_type(list(combo))
+        assert got == reference_hand_type(combo), combo
+        tally[got] += 1
+    assert set(tally) == set(HAND_TYPES)
+
+
+def test_matches_reference_on_every_five_card_hand_of_a_standard_deck_suit_pair():
+    deck = [Card(rank, suit) for rank in RANKS for suit in ('Hearts', 'Spades')]
+    for combo in itertools.combinations(deck, 5):
+        assert HandEvaluator.get_hand_type(list(combo)) == reference_hand_type(combo), combo
+
+
+def test_rejects_more_than_five_cards():
+    with pytest.raises(ValueError):
+        HandEvaluator.get_hand_type(POOL[:6])
+
+
+def test_achievable_types_cover_every_subset():
+    for start in range(len(POOL) - 6):
+        hand = POOL[start:start + 7]
+        achievable = achievable_hand_types(hand)
+        for combo in subsets(hand, range(1, 6)):
+            assert achievable & HAND_TYPE_BIT[HandEvaluator.get_hand_type(list(combo))], (hand, combo)
@@ -0,0 +1,55 @@
+import itertools
+import random
+
+import pytest
+
+from engine.ordering import JokerOrderAdvisor, _placed
+from engine.scoring import Card, Joker, ScoringEngine, RANKS, SUITS
+from engine.simulator import HandSimulator
+
+DECK = [Card(rank, suit) for suit in SUITS for rank in RANKS]
+LINEUPS = {
+    'independent': [Joker('j_cavendish', 'Cavendish', 'x_mult', 3.0, 0),
+                    Joker('j_half', 'Half', 'x_mult', 0.5, 1, 'played Spades give x0.5 Mult'),
+                    Joker('j_joker', 'Joker', 'add_mult', 4.0, 2),
+                    Joker('j_duo', 'The Duo', 'x_mult', 2.0, 3, 'if played hand contains a Pair'),
+                    Joker('j_banner', 'Banner', 'add_chips', 30.0, 4)],
+    'blueprint': [Joker('j_cavendish', 'Cavendish', 'x_mult', 3.0, 0),
+                  Joker('j_joker', 'Joker', 'add_mult', 4.0, 1),
+                  Joker('j_blueprint', 'Blueprint', 'copy_joker', 1.0, 2, 'copies the joker to its right'),
+                  Joker('j_banner', 'Banner', 'add_chips', 30.0, 3)],
+}
+
+
+def brute_force(advisor, hand, deck, jokers):
+    # Every permutation of the lineup, scored on the plays the advisor samples.
+    current = sorted(jokers, key=lambda j: j.position)
+    plays = advisor._candidate_plays(hand, deck, [current, advisor.exchange_order(current)], None)
+    best = None
+    for order in itertools.permutations(current):
+        plan = advisor.simulator.engine.compile(_placed(list(order)))
+        score = sum(max(plan.score(t, played, held)['total'] for t, played, held in hand_plays)
+                    for hand_plays in plays) / len(plays)
+        best = score if best is None else max(best, score)
+    return best
+
+
+@pytest.mark.parametrize("name", LINEUPS)
+def test_recommendation_matches_every_permutation(name):
+    advisor = JokerOrderAdvisor(HandSimulator(ScoringEngine()), samples=8, seed=0)
+    for seed in range(3):
+        cards = random.Random(seed).sample(DECK, 20)
+        hand, deck = cards[:8], cards[8:]
+        jokers = _placed(random.Random(seed).sample(LINEUPS[name], len(LINEUPS[name])))
+        result = advisor.recommend(hand, deck, jokers)
+        assert result.method == ('search' if name == 'blueprint' else 'exchange')
+        assert result.expected_score == pytest.approx(brute_force(advisor, hand, deck, jokers))
+        assert result.expected_score >= result.current_score
+        assert [j.position for j in result.jokers] == list(range(len(jokers)))
+        assert sorted(j.id for j in result.jokers) == sorted(j.id for j in jokers)
+
+
+def test_exchange_order_sorts_by_effect_class():
+    jokers = _placed(LINEUPS['independent'])
+    assert [j.id for j in JokerOrderAdvisor(HandSimulator(ScoringEngine())).exchange_order(jokers)] == \
+        ['j_half', 'j_joker', 'j_banner', 'j_cavendish', 'j_duo']
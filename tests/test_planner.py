@@ -0,0 +1,42 @@
+import random
+from dataclasses import replace
+
+from engine.decision_engine import GameState
+from engine.planner import RoundPlanner
+from engine.scoring import Card, Joker, ScoringEngine, RANKS, SUITS
+from engine.simulator import HandSimulator
+
+
+def make_state():
+    deck = [Card(rank, suit) for suit in SUITS for rank in RANKS]
+    random.Random(1).shuffle(deck)
+    return GameState(hand=deck[:8], deck=deck[8:20], hands_left=2, discards_left=1, required_score=150)
+
+
+def make_planner():
+    return RoundPlanner(HandSimulator(ScoringEngine()), play_width=2, discard_width=2, chance_samples=2)
+
+
+def plan(planner, state):
+    return planner.plan_round(state, planner.simulator.engine.compile(state.jokers, state.hand_levels))
+
+
+def test_table_is_not_shared_across_joker_lineups():
+    planner = make_planner()
+    state = make_state()
+    assert plan(planner, state).win_probability == 1.0
+
+    weak = replace(state, jokers=[Joker('j_weak', 'Weak', 'x_mult', 0.01, 0)])
+    reused = plan(planner, weak)
+    fresh = plan(make_planner(), weak)
+    assert reused.win_probability == fresh.win_probability < 1.0
+    assert reused.cache_hit_rate < 1.0
+
+
+def test_repeated_state_hits_the_table():
+    planner = make_planner()
+    state = make_state()
+    first = plan(planner, state)
+    again = plan(planner, state)
+    assert again.win_probability == first.win_probability
+    assert again.cache_hit_rate == 1.0
@@ -0,0 +1,49 @@
+import time
+
+import pytest
+
+from engine.decision_engine import DecisionEngine, GameState
+from engine.profiling import Profiler, STAGES, stage
+from engine.scoring import Card, Joker, ScoringEngine
+
+
+def test_nested_stages_report_exclusive_time():
+    profiler = Profiler()
+    with profiler.stage('search'):
+        time.sleep(0.02)
+        with profiler.stage('scoring'):
+            time.sleep(0.02)
+    timings = profiler.take()
+    assert timings["stages_ms"]["search"] == pytest.approx(20, abs=10)
+    assert timings["stages_ms"]["scoring"] == pytest.approx(20, abs=10)
+    assert timings["total_ms"] == pytest.approx(sum(timings["stages_ms"].values()), abs=1e-3)
+
+
+def test_stage_is_a_shared_no_op_without_a_profiler():
+    assert stage(None, 'search') is stage(None, 'scoring')
+
+
+def test_calculate_score_opens_one_scoring_stage():
+    engine = ScoringEngine()
+    engine.profiler = Profiler()
+    engine.calculate_score("Pair", [Card('A', 'Hearts'), Card('A', 'Spades')], [],
+                           [Joker('j_joker', 'Joker', 'add_mult', 4.0, 0)])
+    engine.profiler.take()
+    snapshot = engine.profiler.snapshot()
+    assert snapshot["stages"]["scoring"]["calls"] == 1
+    assert snapshot["counters"] == {"scores": 1}
+
+
+def test_recommendations_carry_timings_only_when_profiling():
+    state = GameState(hand=[Card('A', 'Hearts'), Card('A', 'Spades'), Card('2', 'Clubs')], required_score=100)
+    assert "timings" not in DecisionEngine().recommend(state)
+
+    engine = DecisionEngine(profile=True)
+    timings = engine.recommend(state)["timings"]
+    assert set(timings["stages_ms"]) <= set(STAGES)
+    # Each figure is rounded to 0.1 us.
+    assert timings["total_ms"] == pytest.approx(sum(timings["stages_ms"].values()), abs=1e-3)
+    # A repeated state is a cache hit and does no stage work.
+    again = engine.recommend(state)["timings"]
+    assert again["counters"].get("recommendation_cache_hits") == 1
+    assert engine.profile_snapshot()["recommendations"] == 2
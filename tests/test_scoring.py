@@ -0,0 +1,84 @@
+import random
+
+from engine.effects import HAND_CONTAINS
+from engine.hand_evaluator import HAND_TYPES
+from engine.scoring import Card, EDITIONS, ENHANCEMENTS, HandLevel, Joker, RANKS, SUITS, ScoringEngine
+
+PAIR_ONLY = 'if played hand contains a Pair'
+
+
+def reference_score(engine, hand_type, played, held, jokers, hand_levels=None):
+    # The card-by-card pipeline calculate_score ran before lineups were compiled.
+    levels = dict(engine.hand_base_stats, **(hand_levels or {}))
+    base = levels.get(hand_type, HandLevel(0, 0))
+    chips = float(base.chips)
+    mult = float(base.mult)
+    for card in played:
+        chips += card.chips
+        if card.enhancement == 'Bonus':
+            chips += 30
+        elif card.enhancement == 'Mult':
+            mult += 4
+        elif card.enhancement == 'Glass':
+            mult *= 2
+        if card.edition == 'Foil':
+            chips += 50
+        elif card.edition == 'Holographic':
+            mult += 10
+        elif card.edition == 'Polychrome':
+            mult *= 1.5
+    for card in held:
+        if card.enhancement == 'Steel':
+            mult *= 1.5
+    for joker in sorted(jokers, key=lambda j: j.position):
+        if joker.condition == PAIR_ONLY and hand_type not in HAND_CONTAINS['Pair']:
+            continue
+        if joker.effect_type == 'add_chips':
+            chips += joker.value
+        elif joker.effect_type == 'add_mult':
+            mult += joker.value
+        elif joker.effect_type == 'x_mult':
+            mult *= joker.value
+    chips = round(max(0.0, chips))
+    mult = round(max(1.0, mult))
+    return {"chips": chips, "mult": mult, "total": chips * mult}
+
+
+def random_lineup(rng):
+    jokers = []
+    for position in range(rng.randint(0, 5)):
+        effect_type = rng.choice(('add_chips', 'add_mult', 'x_mult'))
+        value = rng.choice((1.5, 2.0, 3.0)) if effect_type == 'x_mult' else float(rng.randint(1, 40))
+        condition = PAIR_ONLY if rng.random() < 0.3 else None
+        jokers.append(Joker(f'j_{position}', 'Test', effect_type, value, position, condition))
+    rng.shuffle(jokers)  # scoring follows position, not list order
+    return jokers
+
+
+def random_card(rng):
+    return Card(rng.choice(RANKS), rng.choice(SUITS), rng.choice(ENHANCEMENTS), rng.choice(EDITIONS))
+
+
+def test_compiled_plan_matches_the_card_by_card_pipeline():
+    engine = ScoringEngine()
+    rng = random.Random(11)
+    for _ in range(300):
+        jokers = random_lineup(rng)
+        levels = {'Pair': HandLevel(25, 4)} if rng.random() < 0.5 else None
+        plan = engine.compile(jokers, levels)
+        # One plan serves every combination of the state.
+        for _ in range(10):
+            hand_type = rng.choice(HAND_TYPES)
+            played = [random_card(rng) for _ in range(rng.randint(1, 5))]
+            held = [random_card(rng) for _ in range(rng.randint(0, 4))]
+            expected = reference_score(engine, hand_type, played, held, jokers, levels)
+            assert plan.score(hand_type, played, held) == expected, (hand_type, played, held, jokers)
+            assert engine.calculate_score(hand_type, played, held, jokers, levels) == expected
+
+
+def test_plan_terms_are_memoized_per_card():
+    plan = ScoringEngine().compile([])
+    card = Card('Q', 'Hearts', 'Glass', 'Holographic')
+    assert plan.term(card) is plan.term(card)
+    # Holographic after Glass: (mult + 0) * 2 + 10, folded into one (+5, x2) term.
+    assert plan.term(card) == (10, 5.0, 2.0, 1.0)
@@ -0,0 +1,67 @@
+import asyncio
+import json
+import threading
+import time
+
+from main import state_from_dict
+from server import RecommendationServer
+
+VALID = {"hand": ["A of Hearts", "A of Spades", "2 of Clubs"], "required_score": 100,
+         "discards_left": 0}
+# Needs a discard search, which goes to the background thread with --workers 0.
+SEARCH = {"hand": ["2 of Hearts", "5 of Spades", "9 of Clubs", "J of Diamonds", "K of Hearts"],
+          "deck": ["A of Hearts", "A of Spades", "K of Spades", "K of Clubs"], "required_score": 5000}
+
+
+def post_all(bodies):
+    server = RecommendationServer(workers=0)
+
+    async def drive():
+        server.queue = asyncio.Queue()
+        batcher = asyncio.ensure_future(server.batcher())
+        responses = []
+        for body in bodies:
+            status, _, payload = await asyncio.wait_for(server.route("POST", "/recommend", body.encode()), 30)
+            responses.append((status, json.loads(payload)))
+        batcher.cancel()
+        return responses
+
+    try:
+        return server, asyncio.run(drive())
+    finally:
+        server.pool.shutdown()
+
+
+def test_malformed_bodies_do_not_stop_the_batcher():
+    server, responses = post_all(["[1]", '{"hand": 5}', "{", json.dumps(VALID)])
+    assert [status for status, _ in responses] == ["200 OK", "200 OK", "400 Bad Request", "200 OK"]
+    assert "AttributeError" in responses[0][1]["error"]
+    assert "TypeError" in responses[1][1]["error"]
+    assert responses[3][1]["action"] == "play"
+    assert server.errors == 2
+
+
+def test_inline_searches_run_off_the_event_loop():
+    server, responses = post_all([json.dumps(SEARCH)])
+    assert "error" not in responses[0][1]
+    assert server.offloaded == 1
+
+
+def test_cancelled_search_fails_its_waiters():
+    server = RecommendationServer(workers=0)
+
+    async def drive():
+        loop = asyncio.get_running_loop()
+        blocker = threading.Event()
+        busy = loop.run_in_executor(server.pool, blocker.wait)
+        future = loop.create_future()
+        server._offload(state_from_dict(SEARCH), SEARCH, future, time.perf_counter())
+        # The queued search is cancelled, not run, when the pool shuts down.
+        server.pool.shutdown(wait=False, cancel_futures=True)
+        blocker.set()
+        await busy
+        return await asyncio.wait_for(future, 5)
+
+    recommendation = asyncio.run(drive())
+    assert recommendation["error"].startswith("CancelledError")
+    assert server.errors == 1 and not server.in_flight
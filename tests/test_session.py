@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from engine.cache import plan_key
+from engine.scoring import Card, Joker, ScoringEngine, RANKS, SUITS, ENHANCEMENTS
+from engine.session import IncrementalSession
+from engine.simulator import HandSimulator
+
+pytest.importorskip("numpy")
+
+JOKERS = [Joker('j_baron', 'Baron', 'x_mult', 1.5, 0, 'each King held in hand gives x1.5 Mult'),
+          Joker('j_duo', 'The Duo', 'x_mult', 2.0, 1, 'if played hand contains a Pair')]
+
+
+def result(play):
+    hand_type, cards, scored = play
+    return hand_type, cards, scored['total']
+
+
+def random_card(rng):
+    return Card(rng.choice(RANKS), rng.choice(SUITS), rng.choice(ENHANCEMENTS))
+
+
+def test_incremental_results_match_exhaustive_over_a_game():
+    simulator = HandSimulator(ScoringEngine())
+    session = IncrementalSession(simulator)
+    rng = random.Random(11)
+    hand = [random_card(rng) for _ in range(8)]
+    for step in range(120):
+        # Mostly play/discard a card or two and draw; sometimes shuffle or change jokers.
+        jokers = JOKERS if step % 40 < 20 else JOKERS[:1]
+        if step % 15 == 14:
+            rng.shuffle(hand)
+        else:
+            for _ in range(rng.randint(1, 2)):
+                hand.pop(rng.randrange(len(hand)))
+            while len(hand) < 8:
+                hand.insert(rng.randrange(len(hand) + 1), rng.choice(hand + [random_card(rng)]))
+        plan = simulator.engine.compile(jokers)
+        assert result(session.best_hand(hand, plan, plan_key(jokers, {}))) == \
+            result(simulator.find_best_hand_exhaustive(hand, jokers, plan=plan)), hand
+    stats = session.stats()
+    assert stats["rows_reused"] > 0
+    assert stats["full_rescores"] >= 3
+
+
+def test_replacing_one_card_reuses_every_play_without_it():
+    simulator = HandSimulator(ScoringEngine())
+    session = IncrementalSession(simulator)
+    plan = simulator.engine.compile([])
+    hand = [Card(rank, 'Hearts') for rank in ('2', '4', '6', '8', '10', 'Q', 'A')] + [Card('3', 'Spades')]
+    session.best_hand(hand, plan, plan_key([], {}))
+    before = session.stats()
+    session.best_hand(hand[:3] + hand[4:] + [Card('9', 'Clubs')], plan, plan_key([], {}))
+    after = session.stats()
+    # 1-5 card plays of the 7 kept cards: 7 + 21 + 35 + 35 + 21
+    assert after["rows_reused"] - before["rows_reused"] == 119
+    assert after["full_rescores"] == before["full_rescores"]
+
+
+def test_changed_plan_rescores_the_whole_hand():
+    simulator = HandSimulator(ScoringEngine())
+    session = IncrementalSession(simulator)
+    hand = [Card('K', 'Hearts'), Card('K', 'Spades'), Card('2', 'Clubs'), Card('7', 'Diamonds')]
+    for jokers in ([], JOKERS):
+        plan = simulator.engine.compile(jokers)
+        assert result(session.best_hand(hand, plan, plan_key(jokers, {}))) == \
+            result(simulator.find_best_hand_exhaustive(hand, jokers, plan=plan))
+    assert session.stats()["full_rescores"] == 2
+    assert session.stats()["rows_reused"] == 0
@@ -0,0 +1,68 @@
+from dataclasses import replace
+
+import pytest
+
+from engine.decision_engine import GameState
+from engine.scoring import Card, Joker, HandLevel
+from engine.session_log import SessionLogReader, SessionLogWriter, index_path, encode_state
+
+
+def make_state(**fields):
+    state = GameState(
+        ante=2, blind_type="Big Blind", money=7,
+        jokers=[Joker('j_duo', 'The Duo', 'x_mult', 2.0, 0, 'if played hand contains a Pair', 3)],
+        consumables=['The Fool'],
+        hand=[Card('A', 'Hearts', 'Lucky', 'Foil', 'Red'), Card('A', 'Hearts', 'Lucky', 'Foil', 'Red'),
+              Card('K', 'Spades', 'Stone')],
+        deck=[Card('2', 'Clubs')],
+        hand_levels={'Pair': HandLevel(25, 3), 'Custom': HandLevel(1.5, 2)},
+        required_score=1200, current_score=40,
+        shop_items=[{'id': 'j_joker', 'cost': 2}],
+    )
+    return replace(state, **fields)
+
+
+def test_round_trip_and_select(tmp_path):
+    path = tmp_path / "session.log"
+    with SessionLogWriter(path) as writer:
+        for seq, blind in enumerate(("Small Blind", "Big Blind", "The Wall")):
+            writer.append(make_state(blind_type=blind), {"action": "play", "seq": seq}, session=5, seq=seq)
+    with SessionLogReader(path) as reader:
+        assert len(reader) == 6
+        state = reader[2].value
+        assert state == make_state(blind_type="Big Blind")
+        assert state.hand[0] is state.hand[1]
+        assert reader[5].value == {"action": "play", "seq": 2}
+        assert [r.seq for r in reader.select(5, 2, "Big Blind")] == [1, 1]
+        assert [r.kind for r in reader.select(5, kind="state")] == ["state"] * 3
+        assert reader.sessions() == [5]
+
+
+def test_reopen_drops_torn_record_and_rebuilds_index(tmp_path):
+    path = tmp_path / "session.log"
+    with SessionLogWriter(path) as writer:
+        writer.append(make_state(), {"action": "play"})
+    size = path.stat().st_size
+    with open(path, "ab") as f:
+        f.write(b"\x40\x00\x00\x00\x00\x01")  # a crash mid-record
+    index_path(path).unlink()
+    with SessionLogWriter(path) as writer:
+        assert path.stat().st_size == size
+        assert writer.records == 2
+        writer.append(make_state(ante=3), None)
+    with SessionLogReader(path) as reader:
+        assert [r.ante for r in reader] == [2, 2, 3]
+
+
+@pytest.mark.parametrize("fields", [{"hands_left": 300}, {"discards_left": -1}, {"ante": 70000},
+                                    {"required_score": 1.5}, {"money": 1 << 40}])
+def test_out_of_range_state_raises_value_error_and_leaves_log_unchanged(tmp_path, fields):
+    path = tmp_path / "session.log"
+    with SessionLogWriter(path) as writer:
+        with pytest.raises(ValueError):
+            writer.append(make_state(**fields), {"action": "play"})
+        with pytest.raises(ValueError):
+            encode_state(make_state(), seq=-1)
+        writer.append(make_state(), {"action": "play"})
+    with SessionLogReader(path) as reader:
+        assert [r.kind for r in reader] == ["state", "recommendation"]
@@ -0,0 +1,53 @@
+import pytest
+
+from engine.decision_engine import DecisionEngine, GameState
+from engine.scoring import Card, Joker, RANKS, SUITS
+from engine.shop import ShopEvaluator, interest
+
+DECK = [Card(rank, suit) for suit in SUITS for rank in RANKS]
+CAVENDISH = {"type": "Joker", "name": "Cavendish", "cost": 4,
+             "effect": {"type": "x_mult", "value": 3.0, "condition": None}}
+JOKER = {"type": "Joker", "name": "Joker", "cost": 2,
+         "effect": {"type": "add_mult", "value": 4.0, "condition": None}}
+
+
+def evaluate(items, money=10, jokers=(), samples=32):
+    engine = DecisionEngine()
+    evaluator = ShopEvaluator(engine, samples=samples)
+    state = GameState(money=money, deck=list(DECK), jokers=list(jokers), shop_items=items)
+    return evaluator, state, evaluator.evaluate(state)
+
+
+@pytest.mark.parametrize("money, expected", [(-3, 0), (4, 0), (5, 1), (24, 4), (25, 5), (100, 5)])
+def test_interest_is_a_dollar_per_five_up_to_five(money, expected):
+    assert interest(money) == expected
+
+
+def test_items_rank_by_gain_net_of_lost_interest():
+    eris = {"type": "Planet", "name": "Eris", "cost": 3}  # Flush Five: never in a standard deck
+    tarot = {"type": "Tarot", "name": "The Fool", "cost": 3}
+    _, _, options = evaluate([eris, tarot, JOKER, CAVENDISH, dict(CAVENDISH, name="Pricey", cost=11)], money=10)
+    names = [option.item["name"] for option in options]
+    assert "Pricey" not in names
+    assert names[:2] == ["Cavendish", "Joker"]
+    by_name = {option.item["name"]: option for option in options}
+    assert by_name["Cavendish"].mean_gain > by_name["Joker"].mean_gain > 0
+    assert by_name["Eris"].mean_gain == 0 and by_name["The Fool"].mean_gain == 0
+    assert by_name["The Fool"].notes == ["no score model for this item type"]
+    # $10 -> $6 drops interest from $2 to $1.
+    assert by_name["Cavendish"].interest_lost == 1
+    assert by_name["Cavendish"].value == pytest.approx(by_name["Cavendish"].gain_ratio - 0.05)
+
+
+def test_full_joker_slots_price_the_best_replacement():
+    weak = [Joker(f"j_{i}", f"Weak {i}", 'add_chips', 1.0 + i, i) for i in range(5)]
+    _, _, options = evaluate([CAVENDISH], jokers=weak)
+    assert options[0].notes == ["replaces Weak 0"]
+    assert options[0].mean_gain > 0
+
+
+def test_reroll_scenarios_reuse_the_hand_sample():
+    evaluator, state, first = evaluate([JOKER])
+    again = evaluator.evaluate(state, [JOKER, CAVENDISH])
+    assert again[1].mean_gain == first[0].mean_gain
+    assert evaluator._samples.hits == 1
@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+from engine.scoring import Card, Joker, ScoringEngine, ENHANCEMENTS, EDITIONS
+from engine.simulator import HandSimulator
+
+JOKERS = [
+    Joker('j_joker', 'Joker', 'add_mult', 4.0, 0),
+    Joker('j_duo', 'The Duo', 'x_mult', 2.0, 1, 'if played hand contains a Pair'),
+    Joker('j_baron', 'Baron', 'x_mult', 1.5, 2, 'each King held in hand gives x1.5 Mult'),
+]
+# Multipliers below 1, after which later +mult is worth more than the bound assumed.
+SHRINKING = [
+    Joker('j_half', 'Half', 'x_mult', 0.5, 0, 'played Hearts give +3 Mult'),
+    Joker('j_mult', 'Mult', 'add_mult', 3.0, 1, 'played Spades give +3 Mult'),
+    Joker('j_held', 'Held', 'x_mult', 0.5, 2, 'each King held in hand gives x0.5 Mult'),
+]
+
+
+def result(play):
+    hand_type, cards, scored = play
+    return hand_type, cards, scored['total']
+
+
+def random_hand(rng, size):
+    # Few ranks and mostly one suit, so multiples, flushes, Wild / Stone cards
+    # and exact duplicates (the same interned card twice) are all common.
+    hand = []
+    for _ in range(size):
+        if hand and rng.random() < 0.2:
+            hand.append(rng.choice(hand))
+            continue
+        hand.append(Card(rng.choice(('6', '6', '6', 'K', '2')), 'Hearts' if rng.random() < 0.75 else 'Spades',
+                         rng.choice(ENHANCEMENTS), rng.choice(EDITIONS)))
+    return hand
+
+
+@pytest.mark.parametrize("jokers", [[], JOKERS, SHRINKING], ids=["no_jokers", "jokers", "x_below_one"])
+def test_find_best_hand_matches_exhaustive(jokers):
+    simulator = HandSimulator(ScoringEngine())
+    plan = simulator.engine.compile(jokers)
+    rng = random.Random(3)
+    for _ in range(4000):
+        hand = random_hand(rng, rng.randint(1, 8))
+        assert result(simulator.find_best_hand(hand, jokers, plan=plan)) == \
+            result(simulator.find_best_hand_exhaustive(hand, jokers, plan=plan)), hand
+
+
+def test_flushable_five_of_a_kind_is_not_pruned():
+    simulator = HandSimulator(ScoringEngine())
+    hand = [
+        Card('6', 'Hearts', 'Bonus'), Card('Q', 'Hearts', 'Stone'),
+        Card('6', 'Hearts', None, 'Holographic'), Card('6', 'Hearts', None, 'Holographic'),
+        Card('3', 'Hearts', 'Lucky'), Card('6', 'Diamonds', 'Bonus', 'Polychrome'),
+        Card('6', 'Hearts', 'Bonus'),
+    ]
+    hand_type, cards, _ = simulator.find_best_hand(hand, [])
+    assert hand_type == "Five of a Kind"
+    assert result(simulator.find_best_hand(hand, [])) == result(simulator.find_best_hand_exhaustive(hand, []))
+
+
+def test_duplicate_cards_are_held_by_position():
+    simulator = HandSimulator(ScoringEngine())
+    steel_king = Card('K', 'Spades', 'Steel')
+    hand = [steel_king, steel_king, Card('2', 'Hearts'), Card('2', 'Clubs')]
+    assert result(simulator.find_best_hand(hand, JOKERS)) == \
+        result(simulator.find_best_hand_exhaustive(hand, JOKERS))
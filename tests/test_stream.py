@@ -0,0 +1,50 @@
+import asyncio
+import io
+import json
+
+from engine.decision_engine import DecisionEngine
+from engine.session_log import SessionLogReader, SessionLogWriter
+from main import StreamSpectator
+
+VALID = {"hand": ["A of Hearts", "A of Spades", "2 of Clubs"], "required_score": 100}
+
+
+def run_stream(lines, **kwargs):
+    """Feeds each line once the previous one is answered; returns the output rows."""
+    spectator = StreamSpectator(DecisionEngine(), out=io.StringIO(), **kwargs)
+
+    async def drive():
+        evaluator = asyncio.ensure_future(spectator.run_evaluator())
+        for line in lines:
+            spectator.feed(line)
+            await asyncio.wait_for(_answered(spectator, spectator.received), timeout=30)
+        evaluator.cancel()
+
+    asyncio.run(drive())
+    spectator.executor.shutdown()
+    return spectator, [json.loads(row) for row in spectator.out.getvalue().splitlines()]
+
+
+async def _answered(spectator, count):
+    while spectator.emitted < count:
+        await asyncio.sleep(0.001)
+
+
+def test_malformed_states_do_not_stop_the_stream():
+    bad = ["[1]", '{"hand": 5}', '{"hand": ["Z of Nowhere"]}', "not json"]
+    spectator, rows = run_stream(bad + [json.dumps(dict(VALID, seq=7))])
+    assert [("error" in row) for row in rows] == [True] * len(bad) + [False]
+    assert rows[-1]["seq"] == 7
+    assert rows[-1]["recommendation"]["action"] == "play"
+    assert spectator.errors == len(bad)
+
+
+def test_unloggable_state_is_still_answered(tmp_path):
+    path = tmp_path / "stream.log"
+    with SessionLogWriter(path) as log:
+        spectator, rows = run_stream([json.dumps(dict(VALID, seq=1, hands_left=300)),
+                                      json.dumps(dict(VALID, seq=2))], log=log)
+    assert [row["seq"] for row in rows] == [1, 2]
+    assert spectator.log_errors == 1
+    with SessionLogReader(path) as reader:
+        assert [(r.kind, r.seq) for r in reader] == [("state", 2), ("recommendation", 2)]
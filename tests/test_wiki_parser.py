@@ -0,0 +1,39 @@
+from pathlib import Path
+
+import pytest
+
+import wiki_sync
+from bench_wiki_parser import FIXTURES, captured_pages, check, load_corpus
+
+FIXTURE_PAGES = sorted(FIXTURES.glob("*.wiki"))
+CAPTURED_PAGES = captured_pages()
+TEMPLATES = [name for kind_cfg in wiki_sync.KINDS for name in kind_cfg["templates"]]
+
+
+def test_single_pass_parser_matches_the_legacy_parser():
+    checked, mismatches = check(load_corpus(generated=60), fuzz=3000, seed=7)
+    assert checked == len(FIXTURE_PAGES) + len(CAPTURED_PAGES) + 60 + 3000
+    assert mismatches == 0
+
+
+@pytest.mark.parametrize("path", FIXTURE_PAGES, ids=lambda path: path.stem)
+def test_fixture_infobox_parses(path: Path):
+    if path.stem == "edge_cases":
+        pytest.skip("malformed on purpose")
+    page = {"title": "Fixture", "pageid": 1, "revid": 2, "timestamp": "", "content": path.read_text(encoding="utf-8")}
+    record = wiki_sync.parse_page("fixture", TEMPLATES, page)
+    assert record is not None
+    assert record["params"].get("name")
+
+
+@pytest.mark.skipif(not CAPTURED_PAGES, reason="no captured wiki responses (bench_wiki_parser.py --capture)")
+@pytest.mark.parametrize("page", CAPTURED_PAGES, ids=lambda page: page["title"])
+def test_captured_page_infobox_parses(page):
+    record = wiki_sync.parse_page("captured", TEMPLATES, page)
+    assert record is not None
+    assert record["params"].get("name")
+
+
+def test_parse_params_keeps_nested_templates_and_links_whole():
+    params = wiki_sync.parse_params(" name = Joker |effect = {{Mult|+4}} Mult | [[Independent|Indep.]] ")
+    assert params == {"name": "Joker", "effect": "{{Mult|+4}} Mult", "1": "[[Independent|Indep.]]"}
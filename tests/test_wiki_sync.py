@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+import wiki_sync
+from bench_wiki_parser import RecordingClient, ReplayClient, load_responses
+from fake_wiki_api import FakeWiki, FakeWikiServer, check_incremental, check_reparse, run_sync, verify
+
+CAPTURED = load_responses()
+
+
+@pytest.fixture
+def server():
+    server = FakeWikiServer(FakeWiki(pages_per_kind=12)).start()
+    yield server
+    server.stop()
+
+
+def test_sync_phases_share_one_pool_of_connections(server, tmp_path):
+    client = wiki_sync.ApiClient(server.api_url, rate=1000.0)
+    try:
+        wiki_sync.sync(client, tmp_path / "data", workers=4)
+        wiki_sync.sync(client, tmp_path / "data", workers=4, incremental=True)
+    finally:
+        client.close()
+    assert verify(server.wiki, tmp_path / "data") == []
+    # Categories, page batches and the incremental info pass all reuse the
+    # client's threads: at most one connection each, plus the caller's.
+    assert server.connections <= 4 + 1
+    assert client.pool is None
+
+
+def test_incremental_sync_fetches_only_changed_pages(server):
+    # check_incremental edits two pages, adds one and removes one between syncs,
+    # then compares the incremental result with a fresh full sync.
+    report = check_incremental(server, server.wiki, 4, 1000.0)
+    pages = report["full"]["pages"]
+    assert report["full"]["downloaded"] == pages
+    assert (report["noop"]["downloaded"], report["noop"]["reused"]) == (0, pages)
+    assert (report["changed"]["downloaded"], report["changed"]["pruned"]) == (3, 1)
+    assert report["changed"]["reused"] == pages - 3
+    assert [stage["problems"] for stage in report.values()] == [[], [], []]
+
+
+def test_reparse_rebuilds_the_sync_output_offline(server, tmp_path):
+    assert check_reparse(server, server.wiki, 2, 1000.0)["reparse"]["problems"] == []
+
+    data_root = tmp_path / "data"
+    run_sync(server, server.wiki, 4, 1000.0, data_root)
+    parsed_root = data_root / "wiki" / "parsed"
+    synced = {path.name: path.read_bytes() for path in parsed_root.glob("*.json")}
+    # meta.json from before page timestamps were recorded: they come from the parsed records.
+    meta_path = data_root / "wiki" / "meta.json"
+    meta = json.loads(meta_path.read_text())
+    for entry in meta["pages"]:
+        entry.pop("timestamp", None)
+    meta_path.write_text(json.dumps(meta))
+    wiki_sync.reparse(data_root, workers=2)
+    assert {path.name: path.read_bytes() for path in parsed_root.glob("*.json")} == synced
+
+    # A page whose raw file is gone is skipped, not an error (redirects share raw files; pick one that does not).
+    raw_paths = [entry["raw_path"] for entry in meta["pages"]]
+    entry = next(entry for entry in meta["pages"] if raw_paths.count(entry["raw_path"]) == 1)
+    (data_root.parent / entry["raw_path"]).unlink()
+    meta = wiki_sync.reparse(data_root, workers=2)
+    assert meta["reparse"]["skipped"] == 1
+    titles = [record["title"] for record in json.loads((parsed_root / f"{entry['kind']}.json").read_text())]
+    assert entry["title"] not in titles
+
+
+def fetch_both(client, titles):
+    return wiki_sync.fetch_pages(titles, client, workers=1), wiki_sync.fetch_info(titles, client, workers=1)
+
+
+def test_recorded_responses_replay_identically(server):
+    titles = sorted(server.wiki.pages)[:30] + ["No such page"]
+    recorder = RecordingClient(server.api_url)
+    try:
+        expected = fetch_both(recorder, titles)
+    finally:
+        recorder.close()
+    replay = ReplayClient(recorder.exchanges)
+    assert fetch_both(replay, titles) == expected
+    assert replay.requests == len(recorder.exchanges)
+
+
+@pytest.mark.skipif(not CAPTURED, reason="no captured wiki responses (bench_wiki_parser.py --capture)")
+def test_captured_wiki_responses_agree():
+    exchanges = CAPTURED.get("revisions", []) + CAPTURED.get("info", [])
+    titles = list(dict.fromkeys(title for exchange in CAPTURED.get("revisions", [])
+                                for title in exchange["params"]["titles"].split("|")))
+    pages, info = fetch_both(ReplayClient(exchanges), titles)
+    for title in titles:
+        assert (pages[title] is None) == (info[title] is None), title
+        if pages[title] is not None:
+            assert (info[title]["pageid"], info[title]["revid"]) == (pages[title]["pageid"], pages[title]["revid"])